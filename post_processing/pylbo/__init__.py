@@ -1,24 +1,71 @@
+"""
+The public API of pylbo. Submodules are only imported when one of their
+attributes is first accessed, such that ``import pylbo`` stays cheap and loading
+datfiles does not pull in matplotlib or the automation dependencies.
+"""
+
+import importlib
+
 from pylbo._version import __version__
-from pylbo.automation.api import generate_parfiles, run_legolas
 from pylbo.utilities import logger
-from pylbo.utilities.datfiles.file_loader import load, load_logfile, load_series
-from pylbo.utilities.eq_balance import get_equilibrium_balance
 from pylbo.utilities.logger import disable_logging, set_loglevel
-from pylbo.visualisation.api import (
-    plot_continua,
-    plot_equilibrium,
-    plot_equilibrium_balance,
-    plot_matrices,
-    plot_merged_spectrum,
-    plot_spectrum,
-    plot_spectrum_comparison,
-    plot_spectrum_multi,
-)
-from pylbo.visualisation.modes.api import (
-    plot_1d_temporal_evolution,
-    plot_2d_slice,
-    plot_3d_slice,
-    prepare_vtk_export,
-)
+
+#: public attributes mapped to the module they are imported from on first access
+_LAZY_ATTRIBUTES = {
+    "generate_parfiles": "pylbo.automation.api",
+    "iter_parfiles": "pylbo.automation.api",
+    "run_legolas": "pylbo.automation.api",
+    "run_and_load": "pylbo.automation.api",
+    "run_adaptive_sweep": "pylbo.automation.adaptive",
+    "load": "pylbo.utilities.datfiles.file_loader",
+    "load_logfile": "pylbo.utilities.datfiles.file_loader",
+    "load_series": "pylbo.utilities.datfiles.file_loader",
+    "read_header": "pylbo.utilities.datfiles.file_loader",
+    "get_equilibrium_balance": "pylbo.utilities.eq_balance",
+    "plot_continua": "pylbo.visualisation.api",
+    "plot_equilibrium": "pylbo.visualisation.api",
+    "plot_equilibrium_balance": "pylbo.visualisation.api",
+    "plot_matrices": "pylbo.visualisation.api",
+    "plot_merged_spectrum": "pylbo.visualisation.api",
+    "plot_spectrum": "pylbo.visualisation.api",
+    "plot_spectrum_comparison": "pylbo.visualisation.api",
+    "plot_spectrum_multi": "pylbo.visualisation.api",
+    "render_batch": "pylbo.visualisation.batch",
+    "plot_1d_temporal_evolution": "pylbo.visualisation.modes.api",
+    "plot_2d_slice": "pylbo.visualisation.modes.api",
+    "plot_3d_slice": "pylbo.visualisation.modes.api",
+    "prepare_vtk_export": "pylbo.visualisation.modes.api",
+}
+
+__all__ = [
+    "__version__",
+    "logger",
+    "disable_logging",
+    "set_loglevel",
+    *_LAZY_ATTRIBUTES,
+]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        # subpackages that were not imported yet, e.g. pylbo.visualisation
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(
+                f"module {__name__!r} has no attribute {name!r}"
+            ) from None
+    value = getattr(importlib.import_module(module), name)
+    # cache the attribute, next accesses no longer go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 logger.init_logger()
@@ -1,4 +1,3 @@
-import matplotlib
 from packaging import version
 
 # The current pylbo version number.
@@ -55,5 +54,12 @@ class VersionHandler:
         return str(self._version_number)
 
 
-# package versions etc, allows backwards compatibility (especially matplotlib...)
-_mpl_version = VersionHandler(matplotlib.__version__)
+def __getattr__(name):
+    # package versions etc, allows backwards compatibility (especially matplotlib...)
+    # these are resolved on first access to avoid importing matplotlib on startup
+    if name == "_mpl_version":
+        import matplotlib
+
+        globals()[name] = VersionHandler(matplotlib.__version__)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,397 @@
+"""
+Adaptive parameter sweeps. Parameter space is covered by a coarse grid of cells,
+which are repeatedly halved where a scalar computed from the datasets crosses a
+given level (e.g. a marginal stability boundary) or varies strongly. Only the new
+cell corners are run, every refinement batch in parallel.
+"""
+
+from __future__ import annotations
+
+import copy
+import itertools
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from pylbo.automation.api import generate_parfiles, run_and_load
+from pylbo.automation.jobs import get_datfile_path
+from pylbo.automation.sweeps import Samples
+from pylbo.utilities.logger import pylboLogger
+
+
+class AdaptiveSweep:
+    """
+    Drives an adaptive sweep over a box in parameter space. The box is divided in
+    `initial_points - 1` cells along every parameter. A cell is halved along every
+    parameter if the quantity is at most `level` at some of its corners and larger
+    at others, or if it differs by more than `tolerance` times the range of all
+    values so far.
+    Cells are halved at most `max_level` times.
+
+    Points are kept on an integer lattice fine enough for the deepest refinement,
+    such that corners shared by neighbouring cells are run only once.
+
+    Parameters
+    ----------
+    parfile_dict : dict
+        The items that are the same for every run, as for
+        :func:`~pylbo.automation.api.generate_parfiles`.
+    bounds : dict
+        The lower and upper bound of every swept parameter, as `name: (low, high)`.
+        Swept items should take real values, e.g. equilibrium parameters.
+    quantity : callable
+        Computes the scalar from the :class:`~pylbo.data_containers.LegolasDataSet`
+        of a run, e.g. ``lambda ds: ds.get_omega_max(real=False).imag``.
+    initial_points : int
+        The number of points along every parameter in the initial grid.
+    max_level : int
+        The maximum number of times a cell is halved.
+    tolerance : float
+        Cells over which the quantity varies more than this fraction of its
+        overall range are refined.
+    level : float
+        Cells where the quantity is at most this value at some corners and larger
+        at others are refined, e.g. a small positive growth rate.
+
+    Attributes
+    ----------
+    names : tuple[str]
+        The names of the swept parameters.
+    results : dict
+        The quantity (NaN for runs that did not complete) and datfile of every run,
+        keyed by lattice point.
+    """
+
+    def __init__(
+        self,
+        parfile_dict: dict,
+        bounds: dict,
+        quantity: Callable,
+        initial_points: int = 5,
+        max_level: int = 3,
+        tolerance: float = 0.1,
+        level: float = 0.0,
+    ) -> None:
+        if not bounds:
+            raise ValueError("at least one parameter should be swept")
+        if initial_points < 2:
+            raise ValueError(
+                f"initial_points should be at least 2, got {initial_points}"
+            )
+        for key in ("sweep", "number_of_runs"):
+            if key in parfile_dict:
+                raise ValueError(f"'{key}' is set by the adaptive sweep")
+        self.parfile_dict = copy.deepcopy(parfile_dict)
+        self.names = tuple(bounds)
+        self.bounds = np.array(list(bounds.values()), dtype=float)
+        self.quantity = quantity
+        self.max_level = max_level
+        self.tolerance = tolerance
+        self.level = level
+        self.results = {}
+        self._scale = 2**max_level
+        self._nb_lattice_points = (initial_points - 1) * self._scale
+        self._offsets = list(itertools.product((0, 1), repeat=len(self.names)))
+        # leaf cells, as (origin, refinement level)
+        self._cells = [
+            (tuple(self._scale * i for i in origin), 0)
+            for origin in itertools.product(
+                range(initial_points - 1), repeat=len(self.names)
+            )
+        ]
+        self._pending = sorted(
+            {point for cell in self._cells for point in self._get_corners(cell)}
+        )
+
+    def _get_corners(self, cell: tuple) -> list[tuple]:
+        """Returns the lattice points at the corners of a cell."""
+        origin, level = cell
+        size = self._scale >> level
+        return [
+            tuple(i + size * offset for i, offset in zip(origin, offsets))
+            for offsets in self._offsets
+        ]
+
+    def get_values(self, point: tuple) -> tuple:
+        """Returns the parameter values of a lattice point."""
+        low, high = self.bounds.T
+        values = low + np.array(point) / self._nb_lattice_points * (high - low)
+        return tuple(values.tolist())
+
+    def _get_score(self, cell: tuple, value_range: float) -> float:
+        """
+        Returns the refinement score of a cell, infinite if the quantity crosses
+        the level and 0 if the cell should not be refined.
+        """
+        origin, level = cell
+        values = [
+            self.results.get(point, (np.nan, None))[0]
+            for point in self._get_corners(cell)
+        ]
+        if level >= self.max_level or np.any(np.isnan(values)):
+            return 0
+        low, high = min(values), max(values)
+        if low <= self.level < high:
+            return np.inf
+        if value_range > 0 and high - low > self.tolerance * value_range:
+            return (high - low) / value_range
+        return 0
+
+    def refine(self, max_points: int = None) -> list[tuple]:
+        """
+        Halves the cells that should be refined, those with the largest score first.
+
+        Parameters
+        ----------
+        max_points : int
+            The maximum number of new points, cells whose new points do not fit are
+            not refined. If None, there is no limit.
+
+        Returns
+        -------
+        list[tuple]
+            The new lattice points, which still have to be run.
+        """
+        values = np.array([value for value, _ in self.results.values()])
+        values = values[~np.isnan(values)]
+        value_range = np.ptp(values) if len(values) > 0 else 0
+        scores = [self._get_score(cell, value_range) for cell in self._cells]
+        new_points = set()
+        refined = set()
+        for index in np.argsort(scores, kind="stable")[::-1]:
+            if scores[index] == 0:
+                break
+            origin, level = self._cells[index]
+            children = [
+                (corner, level + 1) for corner in self._get_corners((origin, level + 1))
+            ]
+            points = {
+                point
+                for child in children
+                for point in self._get_corners(child)
+                if point not in self.results
+            }
+            if max_points is not None and len(new_points | points) > max_points:
+                continue
+            new_points |= points
+            refined.add(index)
+            self._cells.extend(children)
+        self._cells = [
+            cell for index, cell in enumerate(self._cells) if index not in refined
+        ]
+        self._pending = sorted(new_points)
+        return self._pending
+
+    def _run_batch(self, iteration, output_dir, nb_cpus, executable, **kwargs):
+        """Runs the pending points and adds their results."""
+        parfile_dict = copy.deepcopy(self.parfile_dict)
+        basename = f"{parfile_dict.get('basename_datfile', 'adaptive')}_{iteration:02d}"
+        parfile_dict.update(
+            {
+                "basename_datfile": basename,
+                "sweep": Samples(
+                    self.names, [self.get_values(point) for point in self._pending]
+                ),
+            }
+        )
+        parfiles = generate_parfiles(
+            parfile_dict, basename=basename, output_dir=output_dir
+        )
+        points = {
+            get_datfile_path(parfile, executable): point
+            for parfile, point in zip(parfiles, self._pending)
+        }
+        for point in self._pending:
+            self.results[point] = (np.nan, None)
+        for ds in run_and_load(
+            parfiles,
+            nb_cpus=nb_cpus,
+            executable=executable,
+            remove_parfiles=True,
+            **kwargs,
+        ):
+            datfile = Path(ds.datfile).resolve()
+            self.results[points[datfile]] = (float(self.quantity(ds)), str(datfile))
+        self._pending = []
+
+    def run(
+        self,
+        nb_cpus: int = 1,
+        executable: os.PathLike = None,
+        output_dir: os.PathLike = None,
+        max_runs: int = None,
+        **kwargs,
+    ) -> AdaptiveSweep:
+        """
+        Runs the initial grid and refines it until no cell needs refinement, or
+        until `max_runs` runs were done.
+
+        Parameters
+        ----------
+        nb_cpus : int
+            The number of Legolas runs executed at the same time.
+        executable : str, ~os.PathLike
+            The path to the legolas executable.
+        output_dir : str, ~os.PathLike
+            The directory in which the parfiles of every batch are generated,
+            defaults to the current working directory. The results are written to
+            `adaptive.json` in this directory after every batch.
+        max_runs : int
+            The maximum total number of runs. If None, there is no limit.
+        kwargs
+            Additional keyword arguments passed to :func:`pylbo.run_and_load`.
+
+        Returns
+        -------
+        AdaptiveSweep
+            The sweep itself.
+        """
+        if executable is None:
+            raise TypeError("No executable was specified.")
+        output_dir = Path.cwd() if output_dir is None else Path(output_dir)
+        iteration = 0
+        while self._pending:
+            if max_runs is not None:
+                self._pending = self._pending[: max_runs - len(self.results)]
+            pylboLogger.info(
+                f"adaptive sweep: batch {iteration} with {len(self._pending)} run(s)"
+            )
+            self._run_batch(iteration, output_dir, nb_cpus, executable, **kwargs)
+            self.write_manifest(output_dir / "adaptive.json")
+            iteration += 1
+            remaining = None if max_runs is None else max_runs - len(self.results)
+            if remaining == 0:
+                break
+            self.refine(max_points=remaining)
+        pylboLogger.info(f"adaptive sweep done after {len(self.results)} run(s)")
+        return self
+
+    def get_samples(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the sampled points and the quantity at every point.
+
+        Returns
+        -------
+        points : numpy.ndarray
+            The parameter values, one row per run and one column per name.
+        values : numpy.ndarray
+            The quantity of every run, NaN for runs that did not complete.
+        """
+        points = sorted(self.results)
+        values = np.array([self.results[point][0] for point in points])
+        samples = np.array([self.get_values(point) for point in points])
+        return samples.reshape(-1, len(self.names)), values
+
+    def write_manifest(self, filepath: os.PathLike) -> None:
+        """
+        Writes the parameter values, quantity and datfile of every run to a json
+        file.
+
+        Parameters
+        ----------
+        filepath : str, ~os.PathLike
+            The path to the manifest.
+        """
+        runs = [
+            {
+                **dict(zip(self.names, self.get_values(point))),
+                "value": None if np.isnan(value) else value,
+                "datfile": datfile,
+            }
+            for point, (value, datfile) in sorted(self.results.items())
+        ]
+        with open(filepath, "w") as f:
+            json.dump({"names": list(self.names), "runs": runs}, f, indent=2)
+
+
+def run_adaptive_sweep(
+    parfile_dict: dict,
+    bounds: dict,
+    quantity: Callable,
+    nb_cpus: int = 1,
+    executable: os.PathLike = None,
+    output_dir: os.PathLike = None,
+    initial_points: int = 5,
+    max_level: int = 3,
+    tolerance: float = 0.1,
+    level: float = 0.0,
+    max_runs: int = None,
+    **kwargs,
+) -> AdaptiveSweep:
+    """
+    Runs an adaptive sweep, refining the parameter grid where a quantity computed
+    from the datasets crosses `level` or changes fastest. See :class:`AdaptiveSweep`
+    for the refinement criteria.
+
+    Parameters
+    ----------
+    parfile_dict : dict
+        The items that are the same for every run, as for
+        :func:`~pylbo.automation.api.generate_parfiles`.
+    bounds : dict
+        The lower and upper bound of every swept parameter, as `name: (low, high)`.
+    quantity : callable
+        Computes a real scalar from the dataset of a run.
+    nb_cpus : int
+        The number of Legolas runs executed at the same time.
+    executable : str, ~os.PathLike
+        The path to the legolas executable.
+    output_dir : str, ~os.PathLike
+        The directory in which the parfiles are generated and the results are
+        written to `adaptive.json`, defaults to the current working directory.
+    initial_points : int
+        The number of points along every parameter in the initial grid.
+    max_level : int
+        The maximum number of times a cell of the initial grid is halved.
+    tolerance : float
+        Cells over which the quantity varies more than this fraction of its
+        overall range are refined.
+    level : float
+        Cells where the quantity is at most this value at some corners and larger
+        at others are refined, e.g. a small positive growth rate.
+    max_runs : int
+        The maximum total number of runs. If None, there is no limit.
+    kwargs
+        Additional keyword arguments passed to :func:`pylbo.run_and_load`, e.g.
+        `timeout` or `cache_dir`.
+
+    Returns
+    -------
+    AdaptiveSweep
+        The sweep, use :meth:`AdaptiveSweep.get_samples` to get the points and the
+        quantity at every point.
+
+    Examples
+    --------
+    Locating the marginal stability curve in the (k2, k3) plane, where the growth
+    rate becomes larger than 1e-8.
+
+    >>> import pylbo
+    >>> sweep = pylbo.run_adaptive_sweep(
+    >>>     {"equilibrium_type": "suydam_cluster", "gridpoints": 51},
+    >>>     bounds={"k2": (0, 2), "k3": (0, 2)},
+    >>>     quantity=lambda ds: ds.get_omega_max(real=False).imag,
+    >>>     level=1e-8,
+    >>>     nb_cpus=8,
+    >>>     executable="legolas",
+    >>> )
+    >>> points, growth_rates = sweep.get_samples()
+    """
+    sweep = AdaptiveSweep(
+        parfile_dict,
+        bounds,
+        quantity,
+        initial_points=initial_points,
+        max_level=max_level,
+        tolerance=tolerance,
+        level=level,
+    )
+    return sweep.run(
+        nb_cpus=nb_cpus,
+        executable=executable,
+        output_dir=output_dir,
+        max_runs=max_runs,
+        **kwargs,
+    )
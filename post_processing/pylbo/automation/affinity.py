@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import psutil
+
+#: environment variables controlling the number of OpenMP and BLAS threads
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def get_available_cpus() -> list[int]:
+    """
+    Returns the logical CPUs this process is allowed to run on.
+
+    Returns
+    -------
+    list[int]
+        The sorted CPU numbers.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(psutil.cpu_count() or 1))
+
+
+def _parse_cpulist(cpulist: str) -> list[int]:
+    """Parses a Linux cpu list such as ``0-3,8-11``."""
+    cpus = []
+    for item in cpulist.strip().split(","):
+        if not item:
+            continue
+        start, _, end = item.partition("-")
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+def get_numa_nodes() -> list[list[int]]:
+    """
+    Returns the logical CPUs of every NUMA node, read from sysfs. If the topology
+    is not available all CPUs are considered to be on a single node.
+
+    Returns
+    -------
+    list[list[int]]
+        The CPUs per NUMA node.
+    """
+    nodes = []
+    node_dir = Path("/sys/devices/system/node")
+    for cpulist in sorted(node_dir.glob("node[0-9]*/cpulist")):
+        try:
+            cpus = _parse_cpulist(cpulist.read_text())
+        except (OSError, ValueError):
+            return [list(range(psutil.cpu_count() or 1))]
+        if cpus:
+            nodes.append(cpus)
+    return nodes or [list(range(psutil.cpu_count() or 1))]
+
+
+def get_thread_env(threads: int) -> dict:
+    """
+    Returns the environment variables limiting OpenMP and BLAS to a number of
+    threads.
+
+    Parameters
+    ----------
+    threads : int
+        The number of threads.
+
+    Returns
+    -------
+    dict
+        The environment variables in :data:`THREAD_ENV_VARS` set to `threads`.
+    """
+    return {name: str(threads) for name in THREAD_ENV_VARS}
+
+
+def get_core_sets(
+    nb_sets: int,
+    threads: int,
+    cpus: list[int] = None,
+    numa_nodes: list[list[int]] = None,
+) -> list[list[int]]:
+    """
+    Divides the available CPUs into disjoint sets, one for every concurrently
+    running job. Sets are taken from a single NUMA node where possible, such that
+    the threads of a job share the same memory.
+
+    Parameters
+    ----------
+    nb_sets : int
+        The number of sets.
+    threads : int
+        The number of CPUs in every set.
+    cpus : list[int]
+        The CPUs to divide, defaults to :func:`get_available_cpus`.
+    numa_nodes : list[list[int]]
+        The CPUs per NUMA node, defaults to :func:`get_numa_nodes`.
+
+    Raises
+    ------
+    ValueError
+        If there are not enough CPUs for `nb_sets` disjoint sets of `threads` CPUs.
+
+    Returns
+    -------
+    list[list[int]]
+        The CPU sets.
+    """
+    cpus = get_available_cpus() if cpus is None else sorted(cpus)
+    if nb_sets * threads > len(cpus):
+        raise ValueError(
+            f"{nb_sets} runs x {threads} threads does not fit on the "
+            f"{len(cpus)} available CPUs"
+        )
+    numa_nodes = get_numa_nodes() if numa_nodes is None else numa_nodes
+    available = set(cpus)
+    sets = []
+    # first fill every NUMA node with as many sets as fit entirely on it
+    for node in numa_nodes:
+        node_cpus = [cpu for cpu in node if cpu in available]
+        while len(node_cpus) >= threads and len(sets) < nb_sets:
+            sets.append(node_cpus[:threads])
+            available.difference_update(node_cpus[:threads])
+            node_cpus = node_cpus[threads:]
+    # the remaining sets span multiple nodes
+    remaining = sorted(available)
+    while len(sets) < nb_sets:
+        sets.append(remaining[:threads])
+        remaining = remaining[threads:]
+    return sets
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
 import os
-from typing import Union
+import queue
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Iterator, Union
 
 from pylbo.automation.generator import ParfileGenerator
 from pylbo.automation.runner import LegolasRunner
+from pylbo.automation.scheduler import CostModel
+from pylbo.data_containers import LegolasDataSet
+from pylbo.utilities.datfiles.file_loader import load
 
 
 def generate_parfiles(
@@ -14,6 +20,8 @@ def generate_parfiles(
     subdir: bool = True,
     prefix_numbers: bool = True,
     nb_prefix_digits: int = 4,
+    nb_workers: int = 1,
+    bundle: bool = False,
 ) -> list[str]:
     """
     Generates parfiles based on a given configuration dictionary.
@@ -43,6 +51,13 @@ def generate_parfiles(
     nb_prefix_digits : int
         Number of digits to prepend to the `basename` if `prefix_numbers` is `True`.
         Defaults to 4.
+    nb_workers : int
+        The number of processes writing the parfiles, only worthwhile for many
+        thousands of runs.
+    bundle : bool
+        If `True`, all parfiles are written into a single bundle file together with
+        an index, instead of one file per run. The returned list then only contains
+        the path to the bundle, which can be passed to :func:`pylbo.run_legolas`.
 
     Notes
     -----
@@ -51,6 +66,18 @@ def generate_parfiles(
     This routine will automatically generate multiple parfiles if lists/numpy arrays
     are present.
 
+    Multi-dimensional sweeps are given as a :class:`~pylbo.automation.sweeps.Sweep`
+    under the `"sweep"` key, e.g. the cartesian product of parameter values or a
+    Latin hypercube sample of parameter space. The number of runs then follows
+    from the sweep. A compact manifest of the sweep is written to `sweep.json` in
+    the parfile directory, from which the parameters of every run can be retrieved
+    with :func:`~pylbo.automation.sweeps.load_sweep_manifest`.
+
+    Parfiles are rendered from a template compiled once, in which only the items
+    that differ between runs are filled in. For very large sweeps, use
+    `nb_workers` to write in parallel and `bundle` to avoid creating a file for
+    every run.
+
     Returns
     -------
     parfiles : list
@@ -93,6 +120,17 @@ def generate_parfiles(
     >>>    "output_folder": "output",
     >>> }
     >>> parfile_list = pylbo.generate_parfiles(config, output_dir="my_parfiles")
+
+    This will generate 50 x 40 = 2000 parfiles, one for every combination of the
+    values of `k2` and `k3`.
+
+    >>> from pylbo.automation.sweeps import Product
+    >>> config = {
+    >>>    "equilibrium_type": "adiabatic_homo",
+    >>>    "gridpoints": 100,
+    >>>    "sweep": Product(k2=np.linspace(0, 1, 50), k3=np.linspace(0, 2, 40)),
+    >>> }
+    >>> parfile_list = pylbo.generate_parfiles(config, output_dir="my_parfiles")
     """
     pfgen = ParfileGenerator(
         parfile_dict=parfile_dict,
@@ -103,7 +141,64 @@ def generate_parfiles(
         nb_prefix_digits=nb_prefix_digits,
     )
     pfgen.create_namelist_from_dict()
-    return pfgen.generate_parfiles()
+    return pfgen.generate_parfiles(nb_workers=nb_workers, bundle=bundle)
+
+
+def iter_parfiles(
+    parfile_dict: dict,
+    basename: str = None,
+    output_dir: Union[str, os.PathLike] = None,
+    subdir: bool = True,
+    prefix_numbers: bool = True,
+    nb_prefix_digits: int = 4,
+) -> Iterator[str]:
+    """
+    Generates parfiles lazily, the same way as :func:`generate_parfiles`. Every
+    parfile is written and yielded only when the next one is requested, such that
+    large sweeps can be processed while they are being generated and are never
+    completely held in memory.
+
+    Parameters
+    ----------
+    parfile_dict : dict
+        Dictionary containing the keys to be placed in the parfile.
+    basename : str
+        The basename for the parfile, see :func:`generate_parfiles`.
+    output_dir : str, ~os.PathLike
+        Output directory where the parfiles are saved, defaults to the current
+        working directory if not specified.
+    subdir : boolean
+        If `True` (default), creates a subdirectory `parfiles` in the output folder.
+    prefix_numbers : boolean
+        If `True` prepends the `basename` by a n-digit number (e.g. xxxxmyparfile.par).
+    nb_prefix_digits : int
+        Number of digits to prepend to the `basename` if `prefix_numbers` is `True`.
+
+    Yields
+    ------
+    parfile : str
+        The path to every parfile, right after it is written.
+
+    Examples
+    --------
+    >>> from pylbo.automation.sweeps import Product
+    >>> config = {
+    >>>    "equilibrium_type": "adiabatic_homo",
+    >>>    "sweep": Product(k2=np.linspace(0, 1, 500), k3=np.linspace(0, 2, 400)),
+    >>> }
+    >>> for parfile in pylbo.iter_parfiles(config, output_dir="my_parfiles"):
+    >>>    submit_to_cluster(parfile)
+    """
+    pfgen = ParfileGenerator(
+        parfile_dict=parfile_dict,
+        basename=basename,
+        output_dir=output_dir,
+        subdir=subdir,
+        prefix_numbers=prefix_numbers,
+        nb_prefix_digits=nb_prefix_digits,
+    )
+    pfgen.create_namelist_from_dict()
+    yield from pfgen.iter_parfiles()
 
 
 def run_legolas(
@@ -111,14 +206,29 @@ def run_legolas(
     remove_parfiles: bool = False,
     nb_cpus: int = 1,
     executable: Union[str, os.PathLike] = None,
-) -> None:
+    timeout: float = None,
+    retries: int = 0,
+    work_dir: Union[str, os.PathLike] = None,
+    threads_per_run: int = None,
+    pin_cpus: bool = False,
+    memory_budget: Union[int, float, str] = None,
+    cost_model: CostModel = None,
+    cache_dir: Union[str, os.PathLike] = None,
+    executor: Executor = None,
+) -> list[dict]:
     """
     Runs the legolas executable for a given list of parfiles. If more than one parfile
-    is passed, the runs can be performed in parallel using the multiprocessing module.
-    Parallelisation can be enabled by setting the `nb_cpus` kwarg to a number greater
-    than one, and is disabled by default.
+    is passed, the runs can be performed in parallel by setting the `nb_cpus` kwarg
+    to a number greater than one, parallelisation is disabled by default.
     Every CPU will have a single legolas executable subprocess associated
-    with it.
+    with it, all of these are managed from a single thread unless an `executor` is
+    given.
+
+    Every run is a job with its own working directory, in which the standard output
+    and error of Legolas are captured. Runs can be given a time limit and can be
+    retried if they fail. Once all runs are done a manifest is written (and
+    returned) that maps every parfile to its datfile, status, exit code and wall
+    time, such that failed runs can be inspected and run again.
 
     Parameters
     ----------
@@ -126,9 +236,10 @@ def run_legolas(
         A string, list or array containing the paths to the parfile(s).
         Accepts the output of :func:`pylbo.generate_parfiles`.
     remove_parfiles : bool
-        If `True`, removes the parfiles after running Legolas. This will also remove
-        the containing folder if it turns out to be empty after the parfiles are
-        removed. If there are other files still in the folder it remains untouched.
+        If `True`, removes the parfiles of the completed runs after running Legolas.
+        This will also remove the containing folder if it turns out to be empty after
+        the parfiles are removed. If there are other files still in the folder it
+        remains untouched. Parfiles of runs that did not complete are kept.
     nb_cpus : int
         The number of CPUs to use when running Legolas. If equal to 1 then
         parallelisation is disabled. Defaults to the maximum number of CPUs available
@@ -136,9 +247,70 @@ def run_legolas(
     executable : str, ~os.PathLike
         The path to the legolas executable. If not specified, defaults to the
         standard one in the legolas home directory.
+    timeout : float
+        The wall-clock time limit of a single run in seconds. Runs exceeding it are
+        killed together with all of their child processes. No limit by default.
+    retries : int
+        The number of times a failed or timed out run is retried, defaults to 0.
+    work_dir : str, ~os.PathLike
+        The directory containing the job directories and `manifest.json`. Defaults
+        to a folder `legolas_jobs` in the output folder of the first datfile.
+    threads_per_run : int
+        The number of OpenMP/BLAS threads every run may use, set through the
+        ``OMP_NUM_THREADS``, ``OPENBLAS_NUM_THREADS`` and ``MKL_NUM_THREADS``
+        environment variables. By default these are inherited from this process.
+        `nb_cpus` times `threads_per_run` can not exceed the available CPUs.
+    pin_cpus : bool
+        If `True`, pins every run to its own set of `threads_per_run` CPUs, taken
+        from a single NUMA node where possible. If `threads_per_run` is not given
+        the available CPUs are divided evenly over the `nb_cpus` runs.
+    memory_budget : int, float, str
+        The memory available to all concurrently running runs, in bytes or as a
+        string such as ``"16G"``. Runs are only started while their estimated memory
+        fits in the budget, a run exceeding it on its own is started once nothing
+        else is running. Not limited by default.
+    cost_model : ~pylbo.automation.scheduler.CostModel
+        The model estimating the wall time and memory of every run from its
+        parfile. Runs are started longest-first according to these estimates.
+        Defaults to an uncalibrated model, use
+        :meth:`~pylbo.automation.scheduler.CostModel.from_manifests` to calibrate
+        it on previous runs.
+    cache_dir : str, ~os.PathLike
+        A directory in which the datfiles of completed runs are kept, keyed by the
+        hash of their (normalised) parfile and of the executable. Runs found in
+        the cache are not computed again, their datfile is hard linked (or copied)
+        from the cache instead. The output folder and datfile name are not part of
+        the key. No cache is used by default.
+    executor : ~concurrent.futures.Executor
+        Runs the jobs instead of the default
+        :class:`~pylbo.automation.executors.SubprocessPool`, e.g. a
+        :class:`~concurrent.futures.ProcessPoolExecutor`, an executor submitting to
+        a cluster, or a :class:`~pylbo.automation.executors.BatchExecutor`. At most
+        `nb_cpus` runs are submitted at the same time. Progress, cancellation and
+        `remove_parfiles` behave the same for every executor, provided it shares
+        the file system. The executor is not shut down afterwards.
+
+    Returns
+    -------
+    manifest : list[dict]
+        One entry per parfile, with keys `"parfile"`, `"datfile"`, `"status"` (one of
+        ``"completed"``, ``"failed"``, ``"timeout"`` or ``"cancelled"``),
+        `"returncode"`, `"wall_time"`, `"attempts"`, `"job_dir"`, `"stdout"` and
+        `"stderr"`, together with the features of the run (`"gridpoints"`,
+        `"dim_matrix"`, `"solver"`, ...) and its `"estimated_time"` and
+        `"estimated_memory"`. Runs taken from the cache have `"cached"` set to
+        `True`. The resources used by every run are sampled while it runs, and
+        given as `"cpu_time"` (seconds), `"peak_rss"`, `"read_bytes"`,
+        `"write_bytes"` (bytes) and `"max_threads"`.
 
     Notes
     -----
+    The resources used are also written to ``telemetry.json`` and
+    ``telemetry.csv`` in the output folder of the datfiles, keyed by parfile.
+    These accumulate over multiple calls, use
+    :func:`~pylbo.automation.telemetry.fit_scaling` to fit how the wall time and
+    memory scale with the number of gridpoints.
+
     If multiprocessing is enabled, it is usually a good idea to have the number
     of runs requested divisible by the number of CPUs that are available. For example,
     if 24 runs are requested it is good practice to use either 2, 4, 6 or 8 CPUs,
@@ -153,6 +325,145 @@ def run_legolas(
     >>> from pathlib import Path
     >>> files = sorted(Path("parfiles").glob("*.dat"))
     >>> pylbo.run_legolas(files, nb_cpus=4, executable="legolas")
+
+    On a machine with 64 cores, 8 runs with 8 threads each pinned to their own
+    cores avoid oversubscribing the CPUs with OpenMP and BLAS threads.
+
+    >>> pylbo.run_legolas(files, nb_cpus=8, threads_per_run=8, pin_cpus=True)
+
+    Runs taking longer than an hour are killed and retried once, the runs that
+    still failed can be run again afterwards.
+
+    >>> exe = "legolas"
+    >>> manifest = pylbo.run_legolas(files, timeout=3600, retries=1, executable=exe)
+    >>> failed = [job["parfile"] for job in manifest if job["status"] != "completed"]
+    >>> pylbo.run_legolas(failed, executable=exe)
+
+    A sweep over the resolution is scheduled on a machine with 32 GB of memory,
+    using a cost model calibrated on the timings of the previous sweep.
+
+    >>> from pylbo.automation.scheduler import CostModel
+    >>> model = CostModel.from_manifests("output/legolas_jobs/manifest.json")
+    >>> pylbo.run_legolas(files, nb_cpus=8, memory_budget="32G", cost_model=model)
+
+    With a cache, extending a sweep only computes the new runs.
+
+    >>> pylbo.run_legolas(files, nb_cpus=8, cache_dir="legolas_cache")
+
+    Runs can be submitted in batches, e.g. to mimic a cluster queue.
+
+    >>> from pylbo.automation.executors import BatchExecutor
+    >>> with BatchExecutor(batch_size=4, max_batches=2) as executor:
+    ...     pylbo.run_legolas(files, nb_cpus=8, executor=executor)
+    """
+    runner = LegolasRunner(
+        parfiles,
+        remove_parfiles,
+        nb_cpus,
+        executable,
+        timeout=timeout,
+        retries=retries,
+        work_dir=work_dir,
+        threads_per_run=threads_per_run,
+        pin_cpus=pin_cpus,
+        memory_budget=memory_budget,
+        cost_model=cost_model,
+        cache_dir=cache_dir,
+        executor=executor,
+    )
+    return runner.execute()
+
+
+def run_and_load(
+    parfiles: Union[str, list, os.PathLike],
+    nb_cpus: int = 1,
+    executable: Union[str, os.PathLike] = None,
+    load_workers: int = 1,
+    **kwargs,
+) -> Iterator[LegolasDataSet]:
     """
-    runner = LegolasRunner(parfiles, remove_parfiles, nb_cpus, executable)
-    runner.execute()
+    Runs Legolas for a given list of parfiles and yields every dataset as soon as
+    its run is completed, such that the analysis of finished runs overlaps with the
+    runs that are still computing. Runs are executed as in :func:`run_legolas`,
+    datfiles are loaded on a separate pool of `load_workers` threads.
+
+    Parameters
+    ----------
+    parfiles : str, list, numpy.ndarray
+        A string, list or array containing the paths to the parfile(s).
+        Accepts the output of :func:`pylbo.generate_parfiles`.
+    nb_cpus : int
+        The number of Legolas runs executed at the same time.
+    executable : str, ~os.PathLike
+        The path to the legolas executable.
+    load_workers : int
+        The number of threads loading datfiles.
+    kwargs
+        Additional keyword arguments passed to :func:`run_legolas`, e.g.
+        `timeout`, `memory_budget` or `cache_dir`.
+
+    Yields
+    ------
+    ds : ~pylbo.data_containers.LegolasDataSet
+        The dataset of every completed run, in the order in which loading
+        finished.
+        Runs that did not complete are skipped, these are listed in the manifest.
+
+    Notes
+    -----
+    Runs that are not finished when the loop is exited early (using `break` or
+    through an exception) are cancelled. Errors raised while running are re-raised
+    once the datasets loaded before have been yielded.
+
+    Examples
+    --------
+    >>> import pylbo
+    >>> growth_rates = {}
+    >>> for ds in pylbo.run_and_load(files, nb_cpus=16, executable="legolas"):
+    ...     growth_rates[ds.parameters["k2"]] = ds.get_omega_max(real=False)
+    """
+    runner = LegolasRunner(
+        parfiles,
+        kwargs.pop("remove_parfiles", False),
+        nb_cpus,
+        executable,
+        **kwargs,
+    )
+    loader = ThreadPoolExecutor(
+        max_workers=load_workers, thread_name_prefix="pylbo-loader"
+    )
+    loaded = queue.Queue()
+    closing = threading.Event()
+    errors = []
+
+    def _load_finished(job):
+        if job.status == "completed" and not closing.is_set():
+            loader.submit(load, job.datfile).add_done_callback(loaded.put)
+
+    def _execute():
+        # the loader is only shut down here, after the last submit from this thread
+        try:
+            runner.execute(callback=_load_finished)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            loader.shutdown(wait=True, cancel_futures=closing.is_set())
+            loaded.put(None)
+
+    thread = threading.Thread(target=_execute, name="pylbo-runner", daemon=True)
+    thread.start()
+    exhausted = False
+    try:
+        while True:
+            future = loaded.get()
+            if future is None:
+                break
+            yield future.result()
+        exhausted = True
+        if errors:
+            raise errors[0]
+    finally:
+        closing.set()
+        if not exhausted:
+            runner.cancel()
+        thread.join()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from pylbo.utilities.logger import pylboLogger
+
+#: savelist items that only determine where and how output is written, these do
+#: not change the contents of the datfile
+_IGNORED_ITEMS = {
+    "savelist": ("output_folder", "basename_datfile", "show_results", "logging_level")
+}
+#: size of the blocks in which the executable is hashed
+_BLOCK_SIZE = 1024**2
+
+
+def get_file_hash(filepath: os.PathLike) -> str:
+    """
+    Returns the SHA-256 hash of the contents of a file.
+
+    Parameters
+    ----------
+    filepath : str, ~os.PathLike
+        The path to the file.
+
+    Returns
+    -------
+    str
+        The hexadecimal digest.
+    """
+    sha = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(_BLOCK_SIZE), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def normalise_namelist(namelist: dict) -> dict:
+    """
+    Normalises a namelist such that parfiles describing the same run are equal,
+    regardless of the order of namelists and items, the case of their names and
+    the location of the output.
+
+    Parameters
+    ----------
+    namelist : dict, ~f90nml.namelist.Namelist
+        The namelist of a parfile.
+
+    Returns
+    -------
+    dict
+        The namelists with lowercase names, sorted, without the items in
+        :data:`_IGNORED_ITEMS` and without empty namelists.
+    """
+    normalised = {}
+    for name, items in namelist.items():
+        name = name.lower()
+        ignored = _IGNORED_ITEMS.get(name, ())
+        items = {
+            key.lower(): value
+            for key, value in items.items()
+            if key.lower() not in ignored
+        }
+        if items:
+            normalised[name] = dict(sorted(items.items()))
+    return dict(sorted(normalised.items()))
+
+
+def get_run_key(namelist: dict, executable_hash: str) -> str:
+    """
+    Returns the key identifying the datfile of a run: the hash of its normalised
+    namelist together with the hash of the executable.
+
+    Parameters
+    ----------
+    namelist : dict, ~f90nml.namelist.Namelist
+        The namelist of the parfile.
+    executable_hash : str
+        The hash of the Legolas executable, see :func:`get_file_hash`.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA-256 digest.
+    """
+    content = json.dumps(
+        {"namelist": normalise_namelist(namelist), "executable": executable_hash},
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """
+    Atomically places `source` at `target`, as a hard link if both are on the same
+    filesystem and as a copy otherwise.
+    """
+    tmp_target = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        os.link(source, tmp_target)
+    except OSError:
+        shutil.copy2(source, tmp_target)
+    os.replace(tmp_target, target)
+
+
+class RunCache:
+    """
+    A content-addressed cache of completed Legolas runs. Every datfile is stored
+    under the key of its run (see :func:`get_run_key`), such that identical runs
+    are only computed once, even across different sweeps and output folders.
+    Datfiles are hard linked into and out of the cache where possible, which costs
+    no additional disk space, and copied otherwise.
+
+    Parameters
+    ----------
+    cache_dir : str, ~os.PathLike
+        The directory of the cache, created if it does not exist.
+    executable : str, ~os.PathLike
+        The Legolas executable, runs with a different executable never share
+        datfiles.
+
+    Attributes
+    ----------
+    executable_hash : str
+        The hash of the executable.
+    """
+
+    def __init__(self, cache_dir: os.PathLike, executable: os.PathLike) -> None:
+        self.cache_dir = Path(cache_dir).resolve()
+        self.executable_hash = get_file_hash(executable)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_key(self, namelist: dict) -> str:
+        """Returns the key of a run with the given namelist."""
+        return get_run_key(namelist, self.executable_hash)
+
+    def get_path(self, key: str) -> Path:
+        """Returns the path of the cached datfile for a key."""
+        return self.cache_dir / key[:2] / f"{key}.dat"
+
+    def fetch(self, key: str, datfile: os.PathLike) -> bool:
+        """
+        Places the cached datfile of a run at the given path, if it is cached.
+
+        Parameters
+        ----------
+        key : str
+            The key of the run.
+        datfile : str, ~os.PathLike
+            The path the datfile should be placed at.
+
+        Returns
+        -------
+        bool
+            Whether the run was cached.
+        """
+        cached = self.get_path(key)
+        if not cached.is_file():
+            return False
+        datfile = Path(datfile)
+        if datfile.exists() and os.path.samefile(cached, datfile):
+            return True
+        os.makedirs(datfile.parent, exist_ok=True)
+        _link_or_copy(cached, datfile)
+        pylboLogger.debug(f"cache hit: {datfile.name} ({key[:12]})")
+        return True
+
+    def store(self, key: str, datfile: os.PathLike) -> None:
+        """
+        Adds the datfile of a completed run to the cache.
+
+        Parameters
+        ----------
+        key : str
+            The key of the run.
+        datfile : str, ~os.PathLike
+            The path to the datfile.
+        """
+        cached = self.get_path(key)
+        os.makedirs(cached.parent, exist_ok=True)
+        _link_or_copy(Path(datfile), cached)
@@ -0,0 +1,271 @@
+"""
+Executor backends of the Legolas runner. Jobs run on a :class:`SubprocessPool` by
+default, which manages the Legolas processes of all running jobs from a single
+thread. Any :class:`concurrent.futures.Executor` can be used instead, jobs are
+then submitted as calls of :func:`run_job`. :class:`BatchExecutor` groups calls
+into batches, as a local stand-in for the batch queues of clusters.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from pylbo.automation.jobs import LegolasJob
+
+
+def run_job(job: LegolasJob) -> LegolasJob:
+    """
+    Runs a job to completion. This is the call submitted to executors, if these
+    run it in another process the job returned is a copy of the one submitted.
+
+    Parameters
+    ----------
+    job : LegolasJob
+        The job.
+
+    Returns
+    -------
+    LegolasJob
+        The finished job.
+    """
+    return job.run()
+
+
+class SubprocessPool:
+    """
+    Runs jobs as Legolas subprocesses, all managed by a single thread which polls
+    the running processes. This takes no Python worker per running job, the number
+    of concurrent jobs is limited by the runner.
+
+    Parameters
+    ----------
+    poll_interval : float
+        The time in seconds between two checks of the running processes.
+    """
+
+    def __init__(self, poll_interval: float = 0.01) -> None:
+        self.poll_interval = poll_interval
+        self._submitted = queue.Queue()
+        self._shutdown = False
+        self._thread = threading.Thread(
+            target=self._manage, name="pylbo-subprocess-pool", daemon=True
+        )
+        self._thread.start()
+
+    def submit_job(self, job: LegolasJob) -> Future:
+        """
+        Submits a job, which is started on the next poll.
+
+        Parameters
+        ----------
+        job : LegolasJob
+            The job.
+
+        Returns
+        -------
+        ~concurrent.futures.Future
+            The future of the job, its result is the job once it is finished.
+        """
+        if self._shutdown:
+            raise RuntimeError("cannot submit jobs after shutdown")
+        future = Future()
+        self._submitted.put((job, future))
+        return future
+
+    def _manage(self) -> None:
+        """Starts submitted jobs and polls the running ones until shut down."""
+        running = {}
+        while True:
+            try:
+                # only block when there is nothing to poll
+                item = self._submitted.get(block=not running, timeout=None)
+            except queue.Empty:
+                item = False
+            while item:
+                job, future = item
+                if future.set_running_or_notify_cancel():
+                    self._step(job, future, job.start, running)
+                try:
+                    item = self._submitted.get_nowait()
+                except queue.Empty:
+                    item = False
+            if item is None:
+                # shut down, jobs submitted before are still finished
+                self._submitted.put(None)
+                if not running:
+                    return
+            for job, future in list(running.items()):
+                self._step(job, future, job.poll, running)
+            if running:
+                time.sleep(self.poll_interval)
+
+    def _step(self, job, future, step, running) -> None:
+        """Advances a job and resolves its future once it is finished."""
+        try:
+            finished = step()
+        except Exception as e:
+            job.cancel()
+            running.pop(job, None)
+            future.set_exception(e)
+            return
+        if finished:
+            running.pop(job, None)
+            future.set_result(job)
+        else:
+            running[job] = future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """
+        Shuts the pool down once all submitted jobs are finished.
+
+        Parameters
+        ----------
+        wait : bool
+            Whether to wait for all submitted jobs to finish.
+        cancel_futures : bool
+            Whether to cancel the jobs that were not started yet.
+        """
+        if not self._shutdown:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        _, future = self._submitted.get_nowait()
+                    except queue.Empty:
+                        break
+                    future.cancel()
+            self._submitted.put(None)
+        if wait:
+            self._thread.join()
+
+
+def _run_batch(calls: list[tuple]) -> list:
+    """Runs the calls of a batch concurrently, returns their results or errors."""
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(fn, *args, **kwargs) for fn, args, kwargs in calls]
+    return [future.exception() or future.result() for future in futures]
+
+
+class BatchExecutor(Executor):
+    """
+    Collects submitted calls into batches and submits every batch at once. A
+    batch is submitted when it holds `batch_size` calls, or `max_delay` seconds
+    after its first call was submitted.
+
+    Parameters
+    ----------
+    submit_batch : callable
+        Submits a batch, given as a list of `(fn, args, kwargs)` tuples, and returns
+        a :class:`~concurrent.futures.Future` resolving to the list of results, in
+        which exceptions stand for calls that raised them. If None (default),
+        every batch runs in a separate Python process in which all calls of the
+        batch run concurrently, as on a node allocated by a batch queue.
+    batch_size : int
+        The maximum number of calls in a batch.
+    max_delay : float
+        The maximum time in seconds a call waits for its batch to fill up.
+    max_batches : int
+        The maximum number of batches running at the same time, if `submit_batch`
+        is not given.
+
+    Examples
+    --------
+    Runs Legolas in batches of 4 runs, at most 2 batches at the same time.
+
+    >>> from pylbo.automation.executors import BatchExecutor
+    >>> executor = BatchExecutor(batch_size=4, max_batches=2)
+    >>> pylbo.run_legolas(parfiles, nb_cpus=8, executor=executor)
+    """
+
+    def __init__(
+        self,
+        submit_batch: Callable = None,
+        batch_size: int = 8,
+        max_delay: float = 1.0,
+        max_batches: int = 1,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError(f"batch_size should be positive, got {batch_size}")
+        self._pool = None
+        if submit_batch is None:
+            self._pool = ProcessPoolExecutor(max_workers=max_batches)
+            submit_batch = self._submit_local
+        self.submit_batch = submit_batch
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._batch = []
+        self._timer = None
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def _submit_local(self, calls: list[tuple]) -> Future:
+        return self._pool.submit(_run_batch, calls)
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit calls after shutdown")
+            future = Future()
+            self._batch.append((future, (fn, args, kwargs)))
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def flush(self) -> None:
+        """Submits the calls collected so far as a batch."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # calls cancelled while waiting for their batch are dropped
+        batch = [
+            (future, call)
+            for future, call in self._batch
+            if future.set_running_or_notify_cancel()
+        ]
+        self._batch = []
+        if not batch:
+            return
+        futures, calls = zip(*batch)
+        try:
+            batch_future = self.submit_batch(list(calls))
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        batch_future.add_done_callback(
+            lambda done: self._resolve(futures, done),
+        )
+
+    @staticmethod
+    def _resolve(futures: tuple[Future], batch_future: Future) -> None:
+        """Resolves the futures of the calls in a finished batch."""
+        error = batch_future.exception()
+        results = [error] * len(futures) if error else batch_future.result()
+        for future, result in zip(futures, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                for future, _ in self._batch:
+                    future.cancel()
+            self._flush()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import copy
+import itertools
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Union
+from typing import Iterator, Union
 
-import f90nml
 from pylbo.automation.defaults import namelist_items
+from pylbo.automation.parfile_writer import BUNDLE_SUFFIX, ParfileTemplate, write_bundle
+from pylbo.automation.sweeps import Sweep, write_sweep_manifest
 from pylbo.exceptions import ParfileGenerationError
 from pylbo.utilities.logger import pylboLogger
 from pylbo.utilities.toolbox import transform_to_list
 
+#: the minimal number of runs written by a single worker
+_MIN_CHUNK_SIZE = 256
+
 
 def _ensure_nb_names_and_nb_runs_matches(
     names: Union[str, list[str]], nb_runs: int
@@ -122,6 +128,14 @@ class ParfileGenerator:
     nb_prefix_digits : int
         Number of digits to prepend to the `basename` if `prefix_numbers` is `True`.
         Defaults to 4.
+
+    Attributes
+    ----------
+    sweep : ~pylbo.automation.sweeps.Sweep
+        The sweep given under the `"sweep"` key of `parfile_dict`, None if not
+        given. If given, the number of runs is the length of the sweep.
+    sweep_manifest : ~pathlib.Path
+        The path to the sweep manifest, written in `output_dir` if there is a sweep.
     """
 
     def __init__(
@@ -134,7 +148,18 @@ class ParfileGenerator:
         nb_prefix_digits=4,
     ):
         self.parfile_dict = copy.deepcopy(parfile_dict)
-        self.nb_runs = self.parfile_dict.pop("number_of_runs", 1)
+        self.sweep = self.parfile_dict.pop("sweep", None)
+        self.nb_runs = self.parfile_dict.pop("number_of_runs", None)
+        if self.sweep is not None:
+            if not isinstance(self.sweep, Sweep):
+                raise TypeError(f"expected a Sweep but got {type(self.sweep)}")
+            if self.nb_runs not in (None, len(self.sweep)):
+                raise ValueError(
+                    f"number_of_runs ({self.nb_runs}) does not match the number of "
+                    f"runs in the sweep ({len(self.sweep)})"
+                )
+            self.nb_runs = len(self.sweep)
+        self.nb_runs = 1 if self.nb_runs is None else self.nb_runs
 
         names = _ensure_nb_names_and_nb_runs_matches(basename, self.nb_runs)
         self.basenames = _validate_basenames(transform_to_list(names))
@@ -143,6 +168,7 @@ class ParfileGenerator:
         self._nb_prefix_digits = nb_prefix_digits
         self.parfiles = []
         self.container = {}
+        self.sweep_manifest = None
 
     def _get_and_check_item(self, namelist, name, allowed_dtypes):
         """
@@ -216,11 +242,15 @@ class ParfileGenerator:
         if len(self.parfile_dict) != 0:
             raise ParfileGenerationError(self.parfile_dict)
 
+        if self.sweep is not None:
+            self._add_sweep_to_container()
+
         # update container for number of runs, all items are lists
         for namelist, items in self.container.items():
             for key, values in items.items():
                 if len(values) == 1:
-                    values_list = values * self.nb_runs
+                    # a sweep is generated lazily, single values are not repeated
+                    values_list = values if self.sweep else values * self.nb_runs
                 elif len(values) == self.nb_runs:
                     values_list = values
                 else:
@@ -230,47 +260,205 @@ class ParfileGenerator:
                     values_list = [complex(value) for value in values_list]
                 self.container.get(namelist).update({key: values_list})
 
-    def generate_parfiles(self):
+    def _add_sweep_to_container(self):
+        """
+        Finds the namelist of every swept item and checks that these are not also
+        given as fixed values. Swept names that are not namelist items are
+        equilibrium parameters.
+
+        Raises
+        ------
+        ValueError
+            If a swept item is also given in the dictionary.
+        """
+        item_namelists = {
+            name: (namelist, dtypes)
+            for namelist, items in namelist_items.items()
+            for name, dtypes in items
+        }
+        self._sweep_items = []
+        for name in self.sweep.names:
+            namelist, dtypes = item_namelists.get(name, ("paramlist", None))
+            if name in self.container.get(namelist, {}):
+                raise ValueError(f"'{name}' is both swept and given as a fixed value")
+            self._sweep_items.append((namelist, name, dtypes))
+            self.container.setdefault(namelist, {})
+        if "paramlist" in self.container:
+            self.container.setdefault("equilibriumlist", {})
+            self.container["equilibriumlist"].update({"use_defaults": [False]})
+
+    def _get_sweep_values(self, values: tuple) -> Iterator[tuple]:
+        """Yields the namelist, name and type-checked value of the swept items."""
+        for (namelist, name, dtypes), value in zip(self._sweep_items, values):
+            if dtypes is not None and not isinstance(value, dtypes):
+                raise TypeError(
+                    f"namelist '{namelist}' expected swept item '{name}' to be of "
+                    f"type {dtypes} but got {type(value)}. \n"
+                    f"item value = {value}"
+                )
+            yield namelist, name, complex(value) if name == "sigma" else value
+
+    def _compile_template(self) -> None:
+        """
+        Compiles the parfile template, the items given as a single value are
+        rendered once. Items with a value for every run, the swept items and the
+        datfile name vary between runs.
+        """
+        namelists = {"savelist": {}}
+        varying = []
+        self._varying_values = []
+        for namelist, items in self.container.items():
+            namelists.setdefault(namelist, {})
+            for key, values in items.items():
+                namelists[namelist][key] = values[0]
+                if len(values) > 1 and key != "basename_datfile":
+                    varying.append((namelist, key))
+                    self._varying_values.append(values)
+        for namelist, name, _ in self._sweep_items if self.sweep else ():
+            namelists[namelist][name] = None
+            varying.append((namelist, name))
+        namelists["savelist"]["basename_datfile"] = None
+        varying.append(("savelist", "basename_datfile"))
+        self._template = ParfileTemplate(namelists, varying)
+
+    def _write_sweep_manifest(self) -> None:
+        """Writes the sweep manifest to the output directory."""
+        self.sweep_manifest = self.output_dir / "sweep.json"
+        write_sweep_manifest(
+            self.sweep_manifest,
+            self.sweep,
+            output_dir=str(self.output_dir),
+            first_parfile=self._get_parfile_name(0),
+            last_parfile=self._get_parfile_name(self.nb_runs - 1),
+        )
+
+    def _render_runs(self, start: int, stop: int) -> Iterator[tuple[str, str]]:
+        """
+        Renders the parfiles of a range of runs. Runs of a sweep are only created
+        when their parfile is rendered, such that the runs of a sweep are never
+        all in memory.
+
+        Yields
+        ------
+        parfile_name : str
+            The name of the parfile.
+        text : str
+            The contents of the parfile.
+        """
+        datfile_names = self.container.get("savelist", {}).get("basename_datfile")
+        for current_run in range(start, stop):
+            values = [values[current_run] for values in self._varying_values]
+            if self.sweep is not None:
+                sweep_values = self._get_sweep_values(self.sweep[current_run])
+                values.extend(value for _, _, value in sweep_values)
+            # datfile name (no extension .dat needed)
+            if datfile_names is None:
+                datfile_name = self.basenames[current_run]
+            else:
+                datfile_name = datfile_names[
+                    current_run if len(datfile_names) > 1 else 0
+                ]
+            values.append(f"{self._get_prefix(current_run)}{datfile_name}")
+            yield self._get_parfile_name(current_run), self._template.render(values)
+
+    def _write_runs(self, start: int, stop: int) -> list[str]:
+        """Writes the parfiles of a range of runs, returns their paths."""
+        parfiles = []
+        for parfile_name, text in self._render_runs(start, stop):
+            parfile_path = self.output_dir / parfile_name
+            with open(parfile_path, "w") as f:
+                f.write(text)
+            parfiles.append(str(parfile_path))
+        return parfiles
+
+    def _get_chunks(self, nb_workers: int) -> list[tuple[int, int]]:
+        """Divides the runs in chunks of runs written by a single worker."""
+        size = max(_MIN_CHUNK_SIZE, -(-self.nb_runs // (4 * nb_workers)))
+        return [
+            (start, min(start + size, self.nb_runs))
+            for start in range(0, self.nb_runs, size)
+        ]
+
+    def iter_parfiles(self) -> Iterator[str]:
+        """
+        Creates separate parfiles from the main namelist container and writes them
+        to disk one by one, yielding every parfile as soon as it is written. Runs
+        of a sweep are only created when their parfile is written, such that the
+        runs of a sweep are never all in memory.
+
+        Yields
+        ------
+        parfile : str
+            The path of the parfile that was written.
+        """
+        self._compile_template()
+        if self.sweep is not None:
+            self._write_sweep_manifest()
+        for current_run in range(self.nb_runs):
+            yield from self._write_runs(current_run, current_run + 1)
+        pylboLogger.info(f"parfiles generated and saved to {self.output_dir}")
+
+    def _get_prefix(self, current_run: int) -> str:
+        """Returns the number prepended to the names of a run."""
+        if self._use_prefix and self.nb_runs > 1:
+            return f"{current_run + 1:0{self._nb_prefix_digits}d}"
+        return ""
+
+    def _get_parfile_name(self, current_run: int) -> str:
+        """Returns the name of the parfile of a run."""
+        return f"{self._get_prefix(current_run)}{self.basenames[current_run]}.par"
+
+    def generate_parfiles(self, nb_workers=1, bundle=False):
         """
         Creates separate parfiles from the main namelist container and writes
         the individual parfiles to disk.
 
+        Parameters
+        ----------
+        nb_workers : int
+            The number of processes writing parfiles. Runs are divided in chunks,
+            parallelisation only pays off for large numbers of runs.
+        bundle : bool
+            If `True`, writes all parfiles into a single
+            :class:`~pylbo.automation.parfile_writer.ParfileBundle` instead of
+            separate files, together with its index. The bundle is named after the
+            first basename and can be passed to the legolas runner as a parfile.
+
         Returns
         -------
         parfiles : list of str
-            List containing the paths of the parfiles, can be passed to the legolas
-            runner.
+            List containing the paths of the parfiles, or the path to the bundle,
+            can be passed to the legolas runner.
 
         """
-        run_dict = {key: {} for key in self.container.keys()}
-        # savelist must be present
+        if nb_workers < 1:
+            raise ValueError(f"nb_workers should be positive, got {nb_workers}")
+        self._compile_template()
+        if self.sweep is not None:
+            self._write_sweep_manifest()
+        chunks = self._get_chunks(nb_workers)
+        nb_workers = min(nb_workers, len(chunks))
+        function = self._render_chunk if bundle else self._write_runs
+        executor = None
+        if nb_workers == 1:
+            results = itertools.starmap(function, chunks)
+        else:
+            executor = ProcessPoolExecutor(max_workers=nb_workers)
+            results = executor.map(function, *zip(*chunks))
         try:
-            run_dict["savelist"]
-        except KeyError:
-            run_dict.update({"savelist": {}})
-
-        for current_run in range(self.nb_runs):
-            prefix = (
-                f"{current_run + 1:0{self._nb_prefix_digits}d}"
-                if self._use_prefix and self.nb_runs > 1
-                else ""
-            )
-            # generate dictionary for this specific run
-            for namelist, items in self.container.items():
-                for key, values in items.items():
-                    run_dict[namelist].update({key: values[current_run]})
-            basename = self.basenames[current_run]
-            parfile_name = f"{prefix}{basename}.par"
-            # datfile name (no extension .dat needed)
-            datfile_name = (
-                f"{prefix}{run_dict['savelist'].get('basename_datfile', basename)}"
-            )
-            run_dict["savelist"].update({"basename_datfile": datfile_name})
-            # set paths and write parfile
-            parfile_path = (self.output_dir / parfile_name).resolve()
-            self.parfiles.append(str(parfile_path))
-            f90nml.write(run_dict, parfile_path, force=True)
-            # clear dictionary but keep keys
-            run_dict.update({key: {} for key in run_dict})
+            if bundle:
+                bundle_file = self.output_dir / f"{self.basenames[0]}{BUNDLE_SUFFIX}"
+                runs = itertools.chain.from_iterable(results)
+                self.parfiles.append(str(write_bundle(bundle_file, runs)))
+            else:
+                for parfiles in results:
+                    self.parfiles.extend(parfiles)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
         pylboLogger.info(f"parfiles generated and saved to {self.output_dir}")
         return self.parfiles
+
+    def _render_chunk(self, start: int, stop: int) -> list[tuple[str, str]]:
+        """Renders the parfiles of a range of runs for a bundle."""
+        return list(self._render_runs(start, stop))
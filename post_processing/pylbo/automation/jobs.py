@@ -0,0 +1,463 @@
+from __future__ import annotations
+
+import copy
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import f90nml
+import psutil
+from pylbo.automation.scheduler import get_run_features
+from pylbo.automation.telemetry import TELEMETRY_FIELDS, ProcessMonitor
+from pylbo.utilities.logger import pylboLogger
+
+#: the statuses a job can have, jobs end up in one of the last four
+JOB_STATUSES = ("pending", "running", "completed", "failed", "timeout", "cancelled")
+#: the attributes of a job that are not copied to other processes
+_TRANSIENT_ATTRIBUTES = ("_process", "_monitor", "_output", "_lock")
+#: the file in the job directory that cancels the job
+CANCEL_FILE = "cancelled"
+
+
+def kill_process_tree(pid: int, timeout: float = 2) -> None:
+    """
+    Kills a process together with all of its children. Only the children are waited
+    for, the parent process should be reaped by its owner (e.g. through
+    :meth:`subprocess.Popen.wait`) to retrieve its exit code.
+
+    Parameters
+    ----------
+    pid : int
+        The process ID of the parent process.
+    timeout : float
+        The time in seconds to wait for the child processes to terminate.
+    """
+    try:
+        parent = psutil.Process(pid)
+        children = parent.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return
+    for process in (parent, *children):
+        try:
+            process.kill()
+        except psutil.NoSuchProcess:
+            pass
+    psutil.wait_procs(children, timeout=timeout)
+
+
+def get_datfile_path(
+    parfile: os.PathLike, executable: os.PathLike, namelist: dict = None
+) -> Path:
+    """
+    Returns the path of the datfile Legolas writes for a given parfile. Relative
+    output folders are taken relative to the directory of the executable, as Legolas
+    has always been run from there.
+
+    Parameters
+    ----------
+    parfile : str, ~os.PathLike
+        The path to the parfile.
+    executable : str, ~os.PathLike
+        The path to the Legolas executable.
+    namelist : dict, ~f90nml.namelist.Namelist
+        The namelist of the parfile, if already read.
+
+    Returns
+    -------
+    ~pathlib.Path
+        The absolute path to the datfile.
+    """
+    if namelist is None:
+        namelist = f90nml.read(parfile)
+    savelist = namelist.get("savelist", {})
+    output_folder = Path(savelist.get("output_folder", "output"))
+    if not output_folder.is_absolute():
+        output_folder = Path(executable).resolve().parent / output_folder
+    basename = savelist.get("basename_datfile", "datfile")
+    return (output_folder / f"{basename}.dat").resolve()
+
+
+class LegolasJob:
+    """
+    A single Legolas run in its own working directory. The parfile is copied into
+    the job directory with the output folder made absolute, Legolas is run from
+    there with its standard output and error captured to files, such that jobs
+    never depend on (or change) the working directory of the Python process.
+
+    A job is either run to completion with :meth:`run`, or driven without blocking
+    by calling :meth:`start` once and :meth:`poll` until it is finished, such that
+    a single thread can manage many jobs.
+
+    Parameters
+    ----------
+    parfile : str, ~os.PathLike
+        The path to the parfile.
+    executable : str, ~os.PathLike
+        The path to the Legolas executable.
+    job_dir : str, ~os.PathLike
+        The working directory of the job, created if it does not exist.
+    timeout : float
+        The wall-clock time limit of a single attempt in seconds. If exceeded, the
+        process and all of its children are killed. None (default) means no limit.
+    retries : int
+        The number of times a failed or timed out run is retried.
+    env : dict
+        Environment variables set for Legolas, on top of those of this process.
+    cpus : list[int]
+        The CPUs Legolas is pinned to. If None (default), it is not pinned.
+    sample_interval : float
+        The time in seconds between two samples of the resources used by Legolas.
+    namelist : dict, ~f90nml.namelist.Namelist
+        The namelist of the parfile. If given, the parfile is not read and does not
+        have to exist, e.g. for parfiles in a bundle.
+
+    Attributes
+    ----------
+    datfile : ~pathlib.Path
+        The datfile written by the job.
+    cancel_file : ~pathlib.Path
+        The file that cancels the job when it exists, see :meth:`cancel`.
+    features : dict
+        The quantities determining the cost of the run, see
+        :func:`~pylbo.automation.scheduler.get_run_features`.
+    estimated_time : float
+        The estimated wall time in seconds, set by the scheduler.
+    estimated_memory : float
+        The estimated peak memory in bytes, set by the scheduler.
+    cached : bool
+        Whether the datfile was taken from the run cache instead of running Legolas.
+    status : str
+        The status of the job, one of :data:`JOB_STATUSES`.
+    returncode : int
+        The exit code of the last attempt, negative if the process was killed.
+    wall_time : float
+        The wall time of the last attempt in seconds.
+    attempts : int
+        The number of attempts made.
+    telemetry : dict
+        The resources used by the last attempt, see
+        :meth:`~pylbo.automation.telemetry.ProcessMonitor.stop`.
+    """
+
+    def __init__(
+        self,
+        parfile: os.PathLike,
+        executable: os.PathLike,
+        job_dir: os.PathLike,
+        timeout: float = None,
+        retries: int = 0,
+        env: dict = None,
+        cpus: list[int] = None,
+        sample_interval: float = 0.1,
+        namelist: dict = None,
+    ) -> None:
+        if timeout is not None and timeout <= 0:
+            raise ValueError(f"timeout should be positive, got {timeout}")
+        if retries < 0:
+            raise ValueError(f"retries should be non-negative, got {retries}")
+        self.parfile = Path(parfile).resolve()
+        self.executable = Path(executable).resolve()
+        self.job_dir = Path(job_dir).resolve()
+        self.timeout = timeout
+        self.retries = retries
+        self.env = dict(env or {})
+        self.cpus = cpus
+        self.sample_interval = sample_interval
+
+        self.job_parfile = self.job_dir / self.parfile.name
+        self.stdout = self.job_dir / "stdout.log"
+        self.stderr = self.job_dir / "stderr.log"
+        self.cancel_file = self.job_dir / CANCEL_FILE
+        self.namelist = f90nml.read(self.parfile) if namelist is None else namelist
+        self.features = get_run_features(self.namelist)
+        self.datfile = get_datfile_path(self.parfile, self.executable, self.namelist)
+        self.estimated_time = None
+        self.estimated_memory = None
+        self.cached = False
+        self.status = "pending"
+        self.returncode = None
+        self.wall_time = None
+        self.attempts = 0
+        self.telemetry = {}
+        self._process = None
+        self._monitor = None
+        self._output = ()
+        self._start_time = None
+        self._last_sample = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job is done, either successfully or not."""
+        return self.status in ("completed", "failed", "timeout", "cancelled")
+
+    def prepare(self) -> None:
+        """
+        Creates the job directory and the output folder, and writes the parfile of
+        the job. Results are never shown interactively for jobs. An existing datfile
+        is removed, Legolas would otherwise write into it, which also changes all
+        hard links to it.
+        """
+        os.makedirs(self.job_dir, exist_ok=True)
+        os.makedirs(self.datfile.parent, exist_ok=True)
+        if self.datfile.is_file():
+            os.remove(self.datfile)
+        namelist = copy.deepcopy(self.namelist)
+        namelist.setdefault("savelist", {}).update(
+            {
+                "output_folder": str(self.datfile.parent),
+                "basename_datfile": self.datfile.stem,
+                "show_results": False,
+            }
+        )
+        f90nml.write(namelist, self.job_parfile, force=True)
+
+    def get_command(self) -> list[str]:
+        """Returns the command running Legolas for this job."""
+        return [str(self.executable), "-i", str(self.job_parfile)]
+
+    def run(self) -> LegolasJob:
+        """
+        Runs the job, retrying failed attempts. This blocks until the job is done.
+
+        Returns
+        -------
+        LegolasJob
+            The job itself.
+        """
+        finished = self.start()
+        while not finished:
+            with self._lock:
+                process = self._process
+            if process is not None:
+                try:
+                    # returns as soon as Legolas exits
+                    process.wait(timeout=self.sample_interval)
+                except subprocess.TimeoutExpired:
+                    pass
+            finished = self.poll()
+        return self
+
+    def start(self) -> bool:
+        """
+        Prepares the job and starts the first attempt, without waiting for it.
+        The job is then advanced by calling :meth:`poll` until it is finished.
+
+        Returns
+        -------
+        bool
+            Whether the job is already finished, e.g. if it was cancelled.
+        """
+        if self.cancel_file.is_file():
+            # cancelled by a runner in another process
+            self._cancelled = True
+        if not self._cancelled:
+            self.prepare()
+        return self._advance()
+
+    def poll(self) -> bool:
+        """
+        Checks on a started job without blocking. Samples the resources used at
+        every `sample_interval`, enforces the timeout and starts a new attempt if
+        the current one failed and retries are left.
+
+        Returns
+        -------
+        bool
+            Whether the job is finished.
+        """
+        with self._lock:
+            process = self._process
+        if process is None:
+            return self._advance()
+        returncode = process.poll()
+        now = time.perf_counter()
+        if returncode is not None:
+            self._finish_attempt(returncode, timed_out=False)
+        elif self.timeout is not None and now - self._start_time > self.timeout:
+            kill_process_tree(process.pid)
+            self._finish_attempt(process.wait(), timed_out=True)
+        else:
+            if now - self._last_sample >= self.sample_interval:
+                self._last_sample = now
+                self._monitor.sample()
+                if not self._cancelled and self.cancel_file.is_file():
+                    self.cancel()
+            return False
+        return self._advance()
+
+    def _advance(self) -> bool:
+        """
+        Starts attempts until one is running or the job is finished.
+
+        Returns
+        -------
+        bool
+            Whether the job is finished.
+        """
+        while True:
+            if self.status == "completed" or self._cancelled:
+                break
+            if self.attempts > self.retries:
+                break
+            if self.attempts > 0:
+                pylboLogger.warning(
+                    f"{self.parfile.name}: attempt {self.attempts} {self.status}, "
+                    "retrying"
+                )
+            self.attempts += 1
+            if self._launch():
+                return False
+        if self._cancelled:
+            self.status = "cancelled"
+        return True
+
+    def _launch(self) -> bool:
+        """
+        Starts a single attempt, with the output of Legolas captured to files.
+
+        Returns
+        -------
+        bool
+            Whether Legolas was started.
+        """
+        with self._lock:
+            if self._cancelled:
+                return False
+            self._output = (open(self.stdout, "w"), open(self.stderr, "w"))
+            self.status = "running"
+            self._start_time = time.perf_counter()
+            pin_in_child = self.cpus is not None and hasattr(os, "sched_setaffinity")
+            try:
+                self._process = subprocess.Popen(
+                    self.get_command(),
+                    cwd=self.job_dir,
+                    stdout=self._output[0],
+                    stderr=self._output[1],
+                    start_new_session=True,
+                    env={**os.environ, **self.env} if self.env else None,
+                    # pinned before exec, such that all threads of Legolas inherit it
+                    preexec_fn=self._pin_cpus if pin_in_child else None,
+                )
+                if self.cpus is not None and not pin_in_child:
+                    # fallback, threads started before this call are not pinned
+                    psutil.Process(self._process.pid).cpu_affinity(self.cpus)
+            except psutil.NoSuchProcess:
+                # already finished before it could be pinned
+                pass
+            except OSError as e:
+                self._output[1].write(f"{type(e).__name__}: {e}\n")
+                self._close_output()
+                self.status = "failed"
+                self.wall_time = time.perf_counter() - self._start_time
+                return False
+            self._monitor = ProcessMonitor(self._process.pid)
+            self._monitor.sample()
+            self._last_sample = self._start_time
+        return True
+
+    def _pin_cpus(self) -> None:
+        """Pins the calling process to the CPUs of the job, run in the child."""
+        os.sched_setaffinity(0, self.cpus)
+
+    def _finish_attempt(self, returncode: int, timed_out: bool) -> None:
+        """Sets the status, exit code, wall time and resources of an attempt."""
+        self.wall_time = time.perf_counter() - self._start_time
+        self.returncode = returncode
+        if timed_out:
+            self.status = "timeout"
+        else:
+            self.status = "completed" if returncode == 0 else "failed"
+        self.telemetry = self._monitor.stop()
+        self._close_output()
+        with self._lock:
+            self._process = None
+            self._monitor = None
+
+    def _close_output(self) -> None:
+        for file in self._output:
+            file.close()
+        self._output = ()
+
+    def cancel(self) -> None:
+        """
+        Cancels the job. A job that did not start yet will not start, a running job
+        is killed together with all of its child processes. If the job directory
+        exists, a cancel file is written to it, such that a copy of the job running
+        in another process (e.g. on a process pool or a batch queue) is cancelled
+        as well. Jobs that are already finished are left untouched.
+        """
+        if self.finished:
+            return
+        with self._lock:
+            self._cancelled = True
+            process = self._process
+        if process is not None:
+            kill_process_tree(process.pid)
+        if self.job_dir.is_dir():
+            self.cancel_file.touch()
+        if not self.finished:
+            self.status = "cancelled"
+
+    def update(self, job: LegolasJob) -> None:
+        """
+        Takes over the state of a copy of this job, e.g. the copy that was run by
+        an executor in another process.
+
+        Parameters
+        ----------
+        job : LegolasJob
+            The copy of the job.
+        """
+        self.__dict__.update(job.__getstate__())
+
+    def __getstate__(self) -> dict:
+        # processes, files and locks only exist in the process running the job
+        return {
+            key: value
+            for key, value in self.__dict__.items()
+            if key not in _TRANSIENT_ATTRIBUTES
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._process = None
+        self._monitor = None
+        self._output = ()
+        self._lock = threading.Lock()
+
+    def to_dict(self) -> dict:
+        """
+        Returns the manifest entry of the job.
+
+        Returns
+        -------
+        dict
+            Dictionary with the parfile, datfile, status, exit code, wall time,
+            number of attempts, pinned CPUs, job directory and captured output of
+            the job, together with its features, its estimated cost and the
+            resources it used, such that the cost model can be calibrated on it.
+        """
+        threads = self.env.get("OMP_NUM_THREADS")
+        return {
+            **self.features,
+            "parfile": str(self.parfile),
+            "datfile": str(self.datfile),
+            "status": self.status,
+            "returncode": self.returncode,
+            "wall_time": self.wall_time,
+            "attempts": self.attempts,
+            "cpus": self.cpus,
+            "job_dir": str(self.job_dir),
+            "stdout": str(self.stdout),
+            "stderr": str(self.stderr),
+            "estimated_time": self.estimated_time,
+            "estimated_memory": self.estimated_memory,
+            "cached": self.cached,
+            "threads_per_run": None if threads is None else int(threads),
+            # the wall time is measured by the job itself
+            **{field: self.telemetry.get(field) for field in TELEMETRY_FIELDS[1:]},
+        }
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import numbers
+import os
+from pathlib import Path
+from typing import Iterator
+
+import f90nml
+
+#: suffix of parfile bundles, the index has an additional ``.json`` suffix
+BUNDLE_SUFFIX = ".parbundle"
+
+
+def format_value(value) -> str:
+    """
+    Formats a namelist value the same way as :mod:`f90nml` does when writing.
+
+    Parameters
+    ----------
+    value : bool, int, float, complex, str
+        The value.
+
+    Raises
+    ------
+    ValueError
+        If the value has a type that can not be written to a namelist.
+
+    Returns
+    -------
+    str
+        The Fortran representation of the value.
+    """
+    if isinstance(value, bool):
+        return ".true." if value else ".false."
+    if isinstance(value, numbers.Integral):
+        return str(value)
+    if isinstance(value, numbers.Real):
+        return format(value, "")
+    if isinstance(value, numbers.Complex):
+        return f"({format(value.real, '')}, {format(value.imag, '')})"
+    if isinstance(value, str):
+        # same escaping as f90nml: Python quotes, with Fortran-style doubled quotes
+        result = repr(value).replace("\\'", "''").replace('\\"', '""')
+        return result.replace("\\\\", "\\")
+    raise ValueError(f"Type {type(value)} of {value} cannot be written to a parfile")
+
+
+class ParfileTemplate:
+    """
+    A precompiled parfile. The text of all items that are the same for every run is
+    rendered once, only the varying items are formatted for every run. The output
+    is identical to that of :func:`f90nml.write`, which sorts namelists and items.
+
+    Parameters
+    ----------
+    namelists : dict
+        The namelists, mapping every namelist name to a dictionary of its items.
+        Items that vary between runs should be present with any value.
+    varying : list[tuple[str, str]]
+        The varying items as `(namelist, name)` tuples. The values passed to
+        :meth:`render` are in this order.
+    """
+
+    def __init__(self, namelists: dict, varying: list[tuple[str, str]]) -> None:
+        slots = {item: index for index, item in enumerate(varying)}
+        self._literals = []
+        self._slots = []
+        text = ""
+        for i, (group, items) in enumerate(sorted(namelists.items())):
+            # namelists are separated by an empty line
+            text += f"&{group.lower()}\n" if i == 0 else f"\n&{group.lower()}\n"
+            for name, value in sorted(items.items()):
+                text += f"    {name.lower()} = "
+                if (group, name) in slots:
+                    self._literals.append(text)
+                    self._slots.append(slots[(group, name)])
+                    text = "\n"
+                else:
+                    text += f"{format_value(value)}\n"
+            text += "/\n"
+        self._literals.append(text)
+        missing = set(slots) - {varying[slot] for slot in self._slots}
+        if missing:
+            raise ValueError(f"varying items not present in the namelists: {missing}")
+
+    def render(self, values: list) -> str:
+        """
+        Renders the parfile of a single run.
+
+        Parameters
+        ----------
+        values : list
+            The values of the varying items.
+
+        Returns
+        -------
+        str
+            The contents of the parfile.
+        """
+        parts = [self._literals[0]]
+        for slot, literal in zip(self._slots, self._literals[1:]):
+            parts.append(format_value(values[slot]))
+            parts.append(literal)
+        return "".join(parts)
+
+
+def write_bundle(bundle_file: os.PathLike, runs) -> Path:
+    """
+    Writes the parfiles of multiple runs into a single bundle, together with an
+    index containing the name, offset and size of every parfile in the bundle.
+
+    Parameters
+    ----------
+    bundle_file : str, ~os.PathLike
+        The path to the bundle, should end in :data:`BUNDLE_SUFFIX`.
+    runs : iterable[tuple[str, str]]
+        The name and contents of every parfile.
+
+    Returns
+    -------
+    ~pathlib.Path
+        The path to the bundle.
+    """
+    bundle_file = Path(bundle_file)
+    index = []
+    offset = 0
+    with open(bundle_file, "wb") as f:
+        for name, text in runs:
+            data = text.encode()
+            f.write(data)
+            index.append([name, offset, len(data)])
+            offset += len(data)
+    with open(f"{bundle_file}.json", "w") as f:
+        json.dump({"bundle": bundle_file.name, "runs": index}, f)
+    return bundle_file
+
+
+class ParfileBundle:
+    """
+    The parfiles of multiple runs, stored in a single file. Bundles are written by
+    the parfile generator and can be passed to the runner like a regular parfile.
+
+    Parameters
+    ----------
+    bundle_file : str, ~os.PathLike
+        The path to the bundle, its index is expected next to it.
+
+    Attributes
+    ----------
+    names : list[str]
+        The names of the parfiles in the bundle.
+    """
+
+    def __init__(self, bundle_file: os.PathLike) -> None:
+        self.bundle_file = Path(bundle_file).resolve()
+        self.index_file = Path(f"{self.bundle_file}.json")
+        with open(self.index_file) as f:
+            self._index = json.load(f)["runs"]
+        self.names = [name for name, _, _ in self._index]
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        """Yields the name and contents of every parfile in the bundle."""
+        with open(self.bundle_file, "rb") as f:
+            for name, offset, size in self._index:
+                f.seek(offset)
+                yield name, f.read(size).decode()
+
+    def read(self, index: int) -> str:
+        """Returns the contents of a single parfile."""
+        _, offset, size = self._index[index]
+        with open(self.bundle_file, "rb") as f:
+            f.seek(offset)
+            return f.read(size).decode()
+
+    def read_namelists(self) -> Iterator[tuple[str, f90nml.Namelist]]:
+        """Yields the name and namelist of every parfile in the bundle."""
+        for name, text in self:
+            yield name, f90nml.reads(text)
+
+    def remove(self) -> None:
+        """Removes the bundle and its index."""
+        os.remove(self.bundle_file)
+        os.remove(self.index_file)
+
+
+def is_bundle(filepath: os.PathLike) -> bool:
+    """Whether a file is a parfile bundle."""
+    return Path(filepath).suffix == BUNDLE_SUFFIX
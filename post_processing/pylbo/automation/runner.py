@@ -1,11 +1,25 @@
+import collections
+import json
 import multiprocessing
 import os
-import signal
-import subprocess
+import queue
+from concurrent.futures import FIRST_COMPLETED, wait
 from pathlib import Path
+from typing import Iterator
 
 import psutil
 import tqdm
+from pylbo.automation.affinity import (
+    get_available_cpus,
+    get_core_sets,
+    get_thread_env,
+)
+from pylbo.automation.cache import RunCache
+from pylbo.automation.executors import SubprocessPool, run_job
+from pylbo.automation.jobs import LegolasJob, get_datfile_path
+from pylbo.automation.parfile_writer import ParfileBundle, is_bundle
+from pylbo.automation.scheduler import JobScheduler
+from pylbo.automation.telemetry import write_reports
 from pylbo.utilities.logger import pylboLogger
 from pylbo.utilities.toolbox import transform_to_list
 
@@ -41,7 +55,7 @@ def _validate_executable(executable):
 
 def _validate_nb_cpus(cpus):
     """
-    Validates the number of cpus passed to the multiprocessing pool.
+    Validates the number of cpus, i.e. the number of runs executed at the same time.
     Defaults to the maximum available number if exceeded.
 
     Parameters
@@ -49,12 +63,19 @@ def _validate_nb_cpus(cpus):
     cpus : int
         The number of cpus to use.
 
+    Raises
+    ------
+    ValueError
+        If the number of cpus is not positive.
+
     Returns
     -------
     cpus : int
         The number of cpus to use, limited to the maximum number available.
 
     """
+    if cpus < 1:
+        raise ValueError(f"nb_cpus should be positive, got {cpus}")
     cpus_available = multiprocessing.cpu_count()
     if cpus > cpus_available:
         pylboLogger.warning(
@@ -71,7 +92,7 @@ def _validate_parfiles(files):
 
     Parameters
     ----------
-    files : (list of) str, (list of) ~os.PathLike
+    files : (list of) str, (list of) ~os.PathLike, iterator
         Paths to the parfiles.
 
     Raises
@@ -85,6 +106,9 @@ def _validate_parfiles(files):
         A list of resolved filepaths for the parfiles.
 
     """
+    if isinstance(files, Iterator):
+        # e.g. parfiles generated lazily
+        files = list(files)
     files_list = transform_to_list(files)
     files_list = [Path(file).resolve() for file in files_list]
     for file in files_list:
@@ -93,146 +117,435 @@ def _validate_parfiles(files):
     return files_list
 
 
+def _read_bundles(parfiles):
+    """
+    Reads the parfiles in bundles.
+
+    Parameters
+    ----------
+    parfiles : list[~pathlib.Path]
+        The paths to the parfiles and bundles.
+
+    Returns
+    -------
+    runs : list[tuple]
+        The path and namelist of every run, together with the bundle containing it.
+        The namelist and bundle are None for regular parfiles, runs in a bundle are
+        named after their parfile in the directory of the bundle.
+    """
+    runs = []
+    for parfile in parfiles:
+        if not is_bundle(parfile):
+            runs.append((parfile, None, None))
+            continue
+        bundle = ParfileBundle(parfile)
+        runs.extend(
+            (bundle.bundle_file.parent / name, namelist, bundle)
+            for name, namelist in bundle.read_namelists()
+        )
+    return runs
+
+
 class LegolasRunner:
     """
-    Handles running legolas.
+    Handles running legolas. Every parfile becomes a :class:`LegolasJob` with its
+    own working directory inside `work_dir`, at most `nb_cpus` jobs run at the same
+    time. Jobs run on a :class:`~pylbo.automation.executors.SubprocessPool` by
+    default, or on any given executor. Jobs are started longest-first according to
+    their estimated cost, while the estimated memory of the running jobs fits in
+    `memory_budget`. After all jobs are done a manifest is written to `work_dir`,
+    mapping every parfile to its datfile, status, exit code and wall time. If a
+    `cache_dir` is given, runs that were computed before are taken from the cache
+    instead. The resources used by every run are sampled and written to telemetry
+    reports next to the datfiles.
 
     Parameters
     ----------
     parfiles : list, numpy.ndarray
-        A list or array containing the names or paths to the parfiles.
+        A list or array containing the names or paths to the parfiles. Parfile
+        bundles (see :class:`~pylbo.automation.parfile_writer.ParfileBundle`) are
+        expanded into a job for every parfile in the bundle.
     remove_parfiles : bool
-        If `True`, removes the parfiles after running Legolas. This will also remove
-        the containing folder if it turns out to be empty after the parfiles are
-        removed. If there are other files still in the folder it remains untouched.
+        If `True`, removes the parfiles of the completed runs after running Legolas.
+        This will also remove the containing folder if it turns out to be empty after
+        the parfiles are removed. If there are other files still in the folder it
+        remains untouched. Parfiles of runs that did not complete are kept, bundles
+        are only removed if all of their runs completed.
     nb_cpus : int
         The number of CPUs to use when running Legolas. If equal to 1 then
         parallelisation is disabled. Defaults to the maximum number of CPUs available
         if a number larger than the available number is specified.
     executable : str, ~os.PathLike
         The path to the legolas executable.
+    timeout : float
+        The wall-clock time limit of a single run in seconds, runs exceeding it are
+        killed together with all of their child processes. None means no limit.
+    retries : int
+        The number of times a failed or timed out run is retried.
+    work_dir : str, ~os.PathLike
+        The directory containing the job directories and the manifest. Defaults to
+        a folder `legolas_jobs` in the output folder of the first datfile.
+    threads_per_run : int
+        The number of OpenMP/BLAS threads of every run, set through
+        ``OMP_NUM_THREADS``, ``OPENBLAS_NUM_THREADS`` and ``MKL_NUM_THREADS``. If
+        None (default), the environment is left untouched unless `pin_cpus` is set.
+    pin_cpus : bool
+        If `True`, every concurrently running job is pinned to its own disjoint set
+        of `threads_per_run` CPUs, taken from a single NUMA node where possible. If
+        `threads_per_run` is not given, the available CPUs are divided evenly.
+    memory_budget : int, float, str
+        The memory available to all concurrently running jobs, in bytes or as a
+        string such as ``"16G"``. If None (default), memory is not limited.
+    cost_model : ~pylbo.automation.scheduler.CostModel
+        The model estimating the wall time and memory of every job, defaults to an
+        uncalibrated model.
+    cache_dir : str, ~os.PathLike
+        The directory of the :class:`~pylbo.automation.cache.RunCache`. If given,
+        jobs with the same namelist and executable as a run in the cache are not
+        run, their datfile is linked from the cache instead. Completed runs are
+        added to the cache. If None (default), no cache is used.
+    executor : ~concurrent.futures.Executor
+        The executor running the jobs, e.g. a
+        :class:`~concurrent.futures.ProcessPoolExecutor` or a
+        :class:`~pylbo.automation.executors.BatchExecutor`. Jobs are submitted as
+        calls of :func:`~pylbo.automation.executors.run_job`, at most `nb_cpus` at
+        the same time. Executors running jobs in other processes should share the
+        file system, such that jobs can be cancelled. The executor is not shut
+        down by the runner. If None (default), jobs run on a
+        :class:`~pylbo.automation.executors.SubprocessPool`.
+
+    Raises
+    ------
+    ValueError
+        If `nb_cpus` runs with `threads_per_run` threads each do not fit on the
+        available CPUs, or if CPU pinning is not supported on this platform.
+
+    Attributes
+    ----------
+    jobs : list[LegolasJob]
+        The jobs, in the same order as the parfiles.
+    scheduler : ~pylbo.automation.scheduler.JobScheduler
+        The scheduler deciding the order in which jobs start, created when the
+        jobs are executed.
+    cache : ~pylbo.automation.cache.RunCache
+        The run cache, None if not used.
+    manifest_file : ~pathlib.Path
+        The path to the manifest.
     """
 
-    def __init__(self, parfiles, remove_parfiles, nb_cpus, executable=None):
+    def __init__(
+        self,
+        parfiles,
+        remove_parfiles,
+        nb_cpus,
+        executable=None,
+        timeout=None,
+        retries=0,
+        work_dir=None,
+        threads_per_run=None,
+        pin_cpus=False,
+        memory_budget=None,
+        cost_model=None,
+        cache_dir=None,
+        executor=None,
+    ):
         self.parfiles = _validate_parfiles(parfiles)
         self.parfile_dir = self.parfiles[0].parent
         self.executable = _validate_executable(executable)
         self.nb_cpus = _validate_nb_cpus(nb_cpus)
         self.remove_parfiles = remove_parfiles
 
+        runs = _read_bundles(self.parfiles)
+        if work_dir is None:
+            parfile, namelist, _ = runs[0]
+            datfile = get_datfile_path(parfile, self.executable, namelist)
+            work_dir = datfile.parent / "legolas_jobs"
+        self.work_dir = Path(work_dir).resolve()
+        names = [parfile.stem for parfile, _, _ in runs]
+        name_counts = collections.Counter(names)
+        self.jobs = [
+            LegolasJob(
+                parfile,
+                self.executable,
+                self.work_dir / (name if name_counts[name] == 1 else f"{name}_{i}"),
+                timeout=timeout,
+                retries=retries,
+                namelist=namelist,
+            )
+            for i, ((parfile, namelist, _), name) in enumerate(zip(runs, names))
+        ]
+        self._bundles = [bundle for _, _, bundle in runs]
+        self.manifest_file = self.work_dir / "manifest.json"
+        self._core_sets = self._set_threads(threads_per_run, pin_cpus)
+        self.memory_budget = memory_budget
+        self.cost_model = cost_model
+        self.scheduler = None
+        self.cache = None if cache_dir is None else RunCache(cache_dir, self.executable)
+        self._cache_keys = {}
+        self.executor = executor
+        self._futures = {}
+
         pylboLogger.info(f"initialising runner, using executable {self.executable}")
 
-    @staticmethod
-    def _init_worker():
+    def _set_threads(self, threads_per_run, pin_cpus):
+        """
+        Sets the number of threads of every job and divides the CPUs if the jobs
+        are pinned.
+
+        Returns
+        -------
+        core_sets : queue.Queue
+            The CPU sets for the concurrently running jobs, None if not pinned.
+        """
+        self.threads_per_run = threads_per_run
+        if threads_per_run is None and not pin_cpus:
+            return None
+        cpus = get_available_cpus()
+        if threads_per_run is None:
+            threads_per_run = max(1, len(cpus) // self.nb_cpus)
+        if threads_per_run < 1:
+            raise ValueError(
+                f"threads_per_run should be positive, got {threads_per_run}"
+            )
+        if self.nb_cpus * threads_per_run > len(cpus):
+            raise ValueError(
+                f"{self.nb_cpus} runs x {threads_per_run} threads per run does not "
+                f"fit on the {len(cpus)} available CPUs, reduce nb_cpus or "
+                "threads_per_run"
+            )
+        self.threads_per_run = threads_per_run
+        for job in self.jobs:
+            job.env.update(get_thread_env(threads_per_run))
+        pylboLogger.info(f"using {threads_per_run} thread(s) per run")
+        if not pin_cpus:
+            return None
+        if not hasattr(psutil.Process, "cpu_affinity"):
+            raise ValueError("pinning CPUs is not supported on this platform")
+        core_sets = queue.Queue()
+        for cpu_set in get_core_sets(self.nb_cpus, threads_per_run, cpus=cpus):
+            core_sets.put(cpu_set)
+        return core_sets
+
+    def _submit(self, executor, job):
+        """Submits a job to the executor, pinned to a free CPU set if requested."""
+        if self._core_sets is not None:
+            job.cpus = self._core_sets.get_nowait()
+        # a job is only cancelled through its cancel file once submitted
+        os.makedirs(job.job_dir, exist_ok=True)
+        job.cancel_file.unlink(missing_ok=True)
+        submit_job = getattr(executor, "submit_job", None)
+        if submit_job is not None:
+            future = submit_job(job)
+        else:
+            future = executor.submit(run_job, job)
+        self._futures[future] = job
+
+    def _collect(self, future):
         """
-        Worker initialisation for the multiprocessing module.
+        Takes over the result of a finished job, which is a copy of the job if it
+        ran in another process.
+
+        Returns
+        -------
+        job : LegolasJob
+            The job.
         """
-        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        job = self._futures.pop(future)
+        if future.cancelled():
+            job.status = "cancelled"
+        elif future.exception() is not None:
+            job.status = "failed"
+            pylboLogger.error(
+                f"{job.parfile.name}: executor raised {future.exception()!r}"
+            )
+        elif future.result() is not job:
+            job.update(future.result())
+        if self._core_sets is not None:
+            self._core_sets.put(job.cpus)
+        if job.status == "completed" and not job.datfile.is_file():
+            job.status = "failed"
+            pylboLogger.error(
+                f"{job.parfile.name}: exited normally but no datfile was written "
+                f"to {job.datfile}"
+            )
+        if self.cache is not None and job.status == "completed":
+            try:
+                self.cache.store(self._cache_keys[job], job.datfile)
+            except OSError as e:
+                pylboLogger.error(f"{job.parfile.name}: could not cache datfile: {e}")
+        return job
+
+    def _fetch_cached(self):
+        """Takes the datfiles of the jobs that are in the cache from the cache."""
+        for job in self.jobs:
+            key = self.cache.get_key(job.namelist)
+            self._cache_keys[job] = key
+            if self.cache.fetch(key, job.datfile):
+                job.status = "completed"
+                job.cached = True
+        nb_cached = sum(job.cached for job in self.jobs)
+        pylboLogger.info(
+            f"{nb_cached}/{len(self.jobs)} run(s) taken from the cache "
+            f"in {self.cache.cache_dir}"
+        )
 
-    def _activate_worker(self, parfile):
+    def execute(self, callback=None):
         """
-        Worker activation for the multiprocessing module.
-        Calls the legolas executable as a subprocess with the parfile as argument.
+        Runs all jobs and writes the manifest. Interrupting this kills all running
+        Legolas processes.
 
         Parameters
         ----------
-        parfile : str, ~os.PathLike
-            The path to the parfile
+        callback : callable
+            Called with every :class:`LegolasJob` as soon as it is finished, in the
+            thread executing the runner. Jobs taken from the cache are passed
+            before any job starts.
 
         Returns
         -------
-        call : :func:`subprocess.call`
-            A call to a subprocess to run legolas.
+        manifest : list[dict]
+            The manifest, see :meth:`LegolasJob.to_dict`, in the order of the
+            parfiles.
         """
-        cmd = [f"./{self.executable.stem}", "-i", str(parfile)]
-        return subprocess.call(cmd)
+        if self.cache is not None:
+            self._fetch_cached()
+        self.scheduler = JobScheduler(
+            [job for job in self.jobs if not job.cached],
+            self.nb_cpus,
+            memory_budget=self.memory_budget,
+            cost_model=self.cost_model,
+        )
+        if callback is not None:
+            for job in self.jobs:
+                if job.cached:
+                    callback(job)
+        nb_jobs = self.scheduler.nb_pending
+        pylboLogger.info(
+            f"running {nb_jobs} job(s) using {self.nb_cpus} CPU(s), "
+            f"job directories in {self.work_dir}"
+        )
+        pbar = tqdm.tqdm(total=nb_jobs, unit="", disable=nb_jobs <= 1)
+        pbar.set_description(f"running legolas [{self.nb_cpus} CPUS]")
+        executor = SubprocessPool() if self.executor is None else self.executor
+        try:
+            while self.scheduler.nb_pending or self._futures:
+                for job in self.scheduler.next_jobs():
+                    self._submit(executor, job)
+                done, _ = wait(tuple(self._futures), return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = self._collect(future)
+                    self.scheduler.release(job)
+                    self._log_job(job)
+                    pbar.update()
+                    if callback is not None:
+                        callback(job)
+        except KeyboardInterrupt:
+            pbar.set_description("INTERRUPTED")
+            pbar.close()
+            pylboLogger.error("interrupting processes...")
+            self.cancel()
+            wait(tuple(self._futures))
+            for future in tuple(self._futures):
+                self._collect(future)
+            self.write_manifest()
+            pylboLogger.critical("all Legolas processes terminated.")
+            exit(1)
+        finally:
+            if self.executor is None:
+                executor.shutdown(wait=True)
+        pbar.close()
+        manifest = self.write_manifest()
+        self.write_telemetry()
+
+        nb_completed = sum(job.status == "completed" for job in self.jobs)
+        if nb_completed == len(self.jobs):
+            pylboLogger.info("all runs completed")
+        else:
+            pylboLogger.warning(
+                f"{len(self.jobs) - nb_completed}/{len(self.jobs)} runs did not "
+                f"complete, see {self.manifest_file}"
+            )
+        if self.remove_parfiles:
+            self._remove_parfiles()
+        return manifest
 
-    @staticmethod
-    def _terminate_workers():
-        """
-        Terminates the multiprocessing workers after a forced interruption.
-        Simply giving an interrupt terminates only the Python processes, but still
-        keeps the Legolas calls running since those are subprocesses. This method first
-        terminates all child processes (legolas), then the parents (workers).
+    def cancel(self):
         """
-        pylboLogger.error("interrupting processes...")
-        for process in multiprocessing.active_children():
-            pid = process.pid
-            pylboLogger.error(f"terminating PID: {pid} -- {process.name}")
-            parent = psutil.Process(pid)
-            children = parent.children(recursive=True)
-            for child in children:
-                pylboLogger.error(
-                    f"terminating child process {child.pid} -- {child.name}"
-                )
-                child.kill()
-            gone, alive = psutil.wait_procs(children, timeout=2)
-            for killed_proc in gone:
-                pylboLogger.error(f"{str(killed_proc)}")
-            parent.kill()
-            parent.wait(timeout=2)
-        pylboLogger.critical("all Legolas processes terminated.")
-        exit(1)
-
-    def execute(self):
+        Cancels all jobs that are not finished. Running Legolas processes are
+        killed, jobs that did not start yet will not start. Can be called from
+        another thread while :meth:`execute` is running, which then returns once
+        the running jobs are terminated.
         """
-        Executes the legolas executables and initialises the multiprocessing
-        pool if requested.
+        for future in tuple(self._futures):
+            future.cancel()
+        # jobs that did not start go first, otherwise these could still be started
+        # in the slots freed by killing the running ones
+        for job in sorted(self.jobs, key=lambda job: job.status == "running"):
+            job.cancel()
+
+    def _log_job(self, job):
+        """Logs the result of a finished job."""
+        if job.status == "completed":
+            pylboLogger.debug(f"{job.parfile.name} completed in {job.wall_time:.2f} s")
+        else:
+            pylboLogger.error(
+                f"{job.parfile.name}: {job.status} (exit code {job.returncode}) "
+                f"after {job.attempts} attempt(s), see {job.stderr}"
+            )
+
+    def write_manifest(self):
         """
+        Writes the manifest of all jobs to :attr:`manifest_file`.
 
-        def update_pbar(*args):
-            pbar.update()
+        Returns
+        -------
+        manifest : list[dict]
+            The manifest.
+        """
+        manifest = [job.to_dict() for job in self.jobs]
+        os.makedirs(self.work_dir, exist_ok=True)
+        with open(self.manifest_file, "w") as f:
+            json.dump(manifest, f, indent=2)
+        pylboLogger.info(f"manifest written to {self.manifest_file}")
+        return manifest
+
+    def write_telemetry(self):
+        """
+        Writes the resources used by the jobs that ran to the telemetry reports
+        next to their datfiles, see :func:`~pylbo.automation.telemetry.write_reports`.
 
-        # original working directory
-        owd = Path.cwd()
-        # change to parent directory of executable
-        os.chdir(self.executable.parent)
-        # no parallelisation if there is only one parfile
-        if len(self.parfiles) == 1:
-            try:
-                pylboLogger.info("running legolas...")
-                self._activate_worker(*self.parfiles)
-            except KeyboardInterrupt:
-                self._terminate_workers()
-                exit(1)
-        else:
-            # initialise progressbar and multiprocessing pool
-            pbar = tqdm.tqdm(total=len(self.parfiles), unit="")
-            pbar.set_description(f"running legolas [{self.nb_cpus} CPUS]")
-            pool = multiprocessing.Pool(
-                processes=self.nb_cpus, initializer=self._init_worker
+        Returns
+        -------
+        reports : list[~pathlib.Path]
+            The paths to the reports.
+        """
+        records = {}
+        for job in self.jobs:
+            if job.attempts > 0:
+                records.setdefault(job.datfile.parent, []).append(job.to_dict())
+        reports = []
+        for directory, records in records.items():
+            reports.extend(write_reports(records, directory))
+        return reports
+
+    def _remove_parfiles(self):
+        """Removes the parfiles of the completed jobs."""
+        bundles = {}
+        for job, bundle in zip(self.jobs, self._bundles):
+            if bundle is not None:
+                bundles.setdefault(bundle, []).append(job.status == "completed")
+            elif job.status == "completed":
+                os.remove(job.parfile)
+        for bundle, completed in bundles.items():
+            if all(completed):
+                bundle.remove()
+        pylboLogger.info("parfiles removed.")
+        # if directory is empty, also remove it
+        try:
+            Path.rmdir(self.parfile_dir)
+            pylboLogger.info(
+                f"parfile containing folder '{self.parfile_dir}' "
+                f"was empty and is also removed."
             )
-            try:
-                for parfile in self.parfiles:
-                    pool.apply_async(
-                        self._activate_worker, args=(parfile,), callback=update_pbar
-                    )
-                pool.close()
-                pool.join()
-                pbar.close()
-            except KeyboardInterrupt:
-                pbar.set_description("INTERRUPTED")
-                pbar.update(len(self.parfiles))
-                pbar.close()
-                self._terminate_workers()
-                pool.terminate()
-                pool.join()
-                return
-        pylboLogger.info("all runs completed")
-
-        # change back to the original directory
-        os.chdir(owd)
-        # if requested, remove parfiles
-        if self.remove_parfiles:
-            for file in self.parfiles:
-                os.remove(file)
-            pylboLogger.info("parfiles removed.")
-            # if directory is empty, also remove it
-            try:
-                Path.rmdir(self.parfile_dir)
-                pylboLogger.info(
-                    f"parfile containing folder '{self.parfile_dir}' "
-                    f"was empty and is also removed."
-                )
-            except OSError:
-                pass
+        except OSError:
+            pass
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+from pylbo.utilities.logger import pylboLogger
+from pylbo.utilities.toolbox import transform_to_list
+
+#: the number of equations for every physics type, Legolas defaults to mhd
+_NB_EQUATIONS = {"hd": 5, "hd-1d": 3, "mhd": 8}
+#: solvers solving the dense generalised eigenvalue problem
+DENSE_SOLVERS = ("QR-invert", "QR-cholesky", "QZ-direct")
+#: memory used by Legolas regardless of the problem size, in bytes
+_BASE_MEMORY = 32 * 1024**2
+#: default time coefficients per solver, scaled by the complexity of the solver
+_DEFAULT_TIME_COEFFICIENTS = {
+    **{solver: 2.5e-9 for solver in DENSE_SOLVERS},
+    "arnoldi": 1e-8,
+    "inverse-iteration": 1e-8,
+    "none": 1e-9,
+}
+#: default memory coefficients per solver, in bytes per unit of complexity
+_DEFAULT_MEMORY_COEFFICIENTS = {
+    **{solver: 64 for solver in DENSE_SOLVERS},
+    "arnoldi": 48,
+    "inverse-iteration": 48,
+    "none": 32,
+}
+
+
+def get_run_features(namelist: dict) -> dict:
+    """
+    Extracts the quantities determining the cost of a run from its namelist,
+    falling back to the Legolas defaults.
+
+    Parameters
+    ----------
+    namelist : dict, ~f90nml.namelist.Namelist
+        The namelist of the parfile.
+
+    Returns
+    -------
+    dict
+        The gridpoints, physics type, matrix dimension, solver and number of
+        requested eigenvalues of the run.
+    """
+    gridlist = namelist.get("gridlist", {})
+    physicslist = namelist.get("physicslist", {})
+    solvelist = namelist.get("solvelist", {})
+    gridpoints = int(gridlist.get("gridpoints", 50))
+    physics_type = physicslist.get("physics_type", "mhd")
+    nb_eqs = _NB_EQUATIONS.get(physics_type, _NB_EQUATIONS["mhd"])
+    return {
+        "gridpoints": gridpoints,
+        "physics_type": physics_type,
+        "dim_matrix": gridpoints * 2 * nb_eqs,
+        "dim_quadblock": 4 * nb_eqs,
+        "solver": solvelist.get("solver", "QR-invert"),
+        "number_of_eigenvalues": int(solvelist.get("number_of_eigenvalues", 10)),
+    }
+
+
+class CostModel:
+    """
+    Estimates the wall time and peak memory of Legolas runs. Both scale with the
+    complexity of the solver: dense solvers scale with the cube (time) and the
+    square (memory) of the matrix dimension N, the sparse solvers with
+    N times the squared bandwidth of the matrices. Every solver has a coefficient
+    converting this complexity into seconds or bytes, which can be calibrated on
+    measured runs.
+
+    Parameters
+    ----------
+    time_coefficients : dict
+        The time coefficients per solver, replacing the defaults.
+    memory_coefficients : dict
+        The memory coefficients per solver, replacing the defaults.
+
+    Examples
+    --------
+    Calibrate the model on the manifest of a previous sweep and use it to
+    schedule the next one.
+
+    >>> model = CostModel.from_manifests("output/legolas_jobs/manifest.json")
+    >>> pylbo.run_legolas(files, nb_cpus=8, cost_model=model, memory_budget="32G")
+    """
+
+    def __init__(
+        self, time_coefficients: dict = None, memory_coefficients: dict = None
+    ) -> None:
+        self.time_coefficients = {
+            **_DEFAULT_TIME_COEFFICIENTS,
+            **(time_coefficients or {}),
+        }
+        self.memory_coefficients = {
+            **_DEFAULT_MEMORY_COEFFICIENTS,
+            **(memory_coefficients or {}),
+        }
+
+    @staticmethod
+    def _get_complexity(features: dict) -> tuple[float, float]:
+        """Returns the time and memory complexity of a run."""
+        n = features["dim_matrix"]
+        if features["solver"] in DENSE_SOLVERS:
+            return n**3, n**2
+        if features["solver"] == "none":
+            return n * features["dim_quadblock"], n * features["dim_quadblock"]
+        # banded factorisation and a Krylov basis of about twice the number of
+        # requested eigenvalues
+        bandwidth = features["dim_quadblock"]
+        ncv = 2 * features["number_of_eigenvalues"]
+        return n * (bandwidth**2 + ncv * bandwidth), n * (3 * bandwidth + ncv)
+
+    def estimate(self, features: dict) -> tuple[float, float]:
+        """
+        Estimates the cost of a run.
+
+        Parameters
+        ----------
+        features : dict
+            The features of the run, see :func:`get_run_features`.
+
+        Returns
+        -------
+        time : float
+            The estimated wall time in seconds.
+        memory : float
+            The estimated peak memory in bytes.
+        """
+        time_complexity, memory_complexity = self._get_complexity(features)
+        solver = features["solver"]
+        default = "QR-invert"
+        time = self.time_coefficients.get(solver, self.time_coefficients[default])
+        memory = self.memory_coefficients.get(solver, self.memory_coefficients[default])
+        return time * time_complexity, _BASE_MEMORY + memory * memory_complexity
+
+    def calibrate(self, records: list[dict]) -> CostModel:
+        """
+        Calibrates the coefficients on measured runs. Every solver with
+        measurements gets the (geometric) mean coefficient of those runs, the
+        coefficients of the other solvers are scaled by the mean correction of the
+        calibrated ones, such that a slower machine also slows down their estimates.
+
+        Parameters
+        ----------
+        records : list[dict]
+            The measured runs, e.g. manifest entries. Every record should contain
+            the run features (see :func:`get_run_features`) and `"wall_time"`.
+            Records with `"peak_rss"` (in bytes) also calibrate the memory.
+            Unfinished runs and runs without measurements are ignored.
+
+        Returns
+        -------
+        CostModel
+            The model itself.
+        """
+        for key, coefficients, index in (
+            ("wall_time", self.time_coefficients, 0),
+            ("peak_rss", self.memory_coefficients, 1),
+        ):
+            ratios = {}
+            for record in records:
+                value = record.get(key)
+                if value is None or record.get("status", "completed") != "completed":
+                    continue
+                if index == 1:
+                    value -= _BASE_MEMORY
+                complexity = self._get_complexity(record)[index]
+                if value > 0 and complexity > 0:
+                    ratios.setdefault(record["solver"], []).append(value / complexity)
+            if not ratios:
+                continue
+            corrections = []
+            for solver, values in ratios.items():
+                coefficient = float(np.exp(np.mean(np.log(values))))
+                if solver in coefficients:
+                    corrections.append(coefficient / coefficients[solver])
+                coefficients[solver] = coefficient
+            correction = float(np.exp(np.mean(np.log(corrections or [1]))))
+            for solver in coefficients:
+                if solver not in ratios:
+                    coefficients[solver] *= correction
+            pylboLogger.debug(f"cost model: {key} calibrated on {list(ratios)}")
+        return self
+
+    @classmethod
+    def from_manifests(cls, manifests) -> CostModel:
+        """
+        Creates a model calibrated on the manifests of previous runs.
+
+        Parameters
+        ----------
+        manifests : str, ~os.PathLike, list
+            The path(s) to the manifest files written by the runner.
+
+        Returns
+        -------
+        CostModel
+            The calibrated model.
+        """
+        records = []
+        for manifest in transform_to_list(manifests):
+            with open(manifest) as f:
+                records.extend(json.load(f))
+        return cls().calibrate(records)
+
+
+def parse_memory(memory) -> float:
+    """
+    Parses a memory size given as a number of bytes or as a string with a unit,
+    e.g. ``"16G"`` or ``"512MB"``.
+
+    Parameters
+    ----------
+    memory : int, float, str
+        The memory size.
+
+    Returns
+    -------
+    float
+        The memory size in bytes.
+    """
+    if not isinstance(memory, str):
+        return float(memory)
+    value = memory.strip().upper().rstrip("IB")
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+class JobScheduler:
+    """
+    Decides which jobs to start. Pending jobs are ordered longest-first on their
+    estimated wall time, which reduces the total duration of a sweep with runs of
+    different sizes. A job is only started while the estimated memory of all
+    running jobs stays within the memory budget. If the longest pending job does
+    not fit, smaller jobs that do fit are started instead. A job that does not fit
+    the budget by itself is started once nothing else is running.
+
+    Parameters
+    ----------
+    jobs : list[~pylbo.automation.jobs.LegolasJob]
+        The jobs to schedule.
+    nb_slots : int
+        The maximum number of jobs running at the same time.
+    memory_budget : int, float, str
+        The memory available to all running jobs, see :func:`parse_memory`. If
+        None, memory is not taken into account.
+    cost_model : CostModel
+        The model estimating the cost of every job, defaults to an uncalibrated
+        :class:`CostModel`.
+
+    Attributes
+    ----------
+    nb_pending : int
+        The number of jobs that did not start yet.
+    running : list[~pylbo.automation.jobs.LegolasJob]
+        The jobs that are running.
+    """
+
+    def __init__(self, jobs, nb_slots, memory_budget=None, cost_model=None):
+        self.nb_slots = nb_slots
+        self.memory_budget = (
+            None if memory_budget is None else parse_memory(memory_budget)
+        )
+        self.cost_model = CostModel() if cost_model is None else cost_model
+        for job in jobs:
+            job.estimated_time, job.estimated_memory = self.cost_model.estimate(
+                job.features
+            )
+            if self.memory_budget and job.estimated_memory > self.memory_budget:
+                pylboLogger.warning(
+                    f"{job.parfile.name}: estimated memory "
+                    f"{job.estimated_memory / 1024**3:.2f} GB exceeds the budget, "
+                    "it will run on its own"
+                )
+        # stable sort, jobs with equal estimates keep their order
+        self._queue = sorted(jobs, key=lambda job: -job.estimated_time)
+        self._head = 0
+        self.nb_pending = len(self._queue)
+        self.running = []
+        self._reserved_memory = 0
+        self._memory_tree = None
+        if self.memory_budget is not None and self._queue:
+            self._build_memory_tree()
+
+    def _build_memory_tree(self) -> None:
+        """
+        Builds a segment tree holding the minimum estimated memory of the pending
+        jobs in every range of the queue, started jobs count as infinite.
+        """
+        size = 1 << (len(self._queue) - 1).bit_length()
+        tree = [np.inf] * (2 * size)
+        tree[size : size + len(self._queue)] = [
+            job.estimated_memory for job in self._queue
+        ]
+        for node in range(size - 1, 0, -1):
+            tree[node] = min(tree[2 * node], tree[2 * node + 1])
+        self._memory_tree = tree
+        self._tree_size = size
+
+    @property
+    def pending(self) -> list:
+        """The jobs that did not start yet, longest first."""
+        return [job for job in self._queue[self._head :] if job is not None]
+
+    @property
+    def reserved_memory(self) -> float:
+        """The estimated memory of all running jobs."""
+        return self._reserved_memory
+
+    def _fits(self, job) -> bool:
+        """Whether a job can start now."""
+        if self.memory_budget is None or not self.running:
+            return True
+        return self._reserved_memory + job.estimated_memory <= self.memory_budget
+
+    def _find_fitting(self) -> int:
+        """
+        Returns the position in the queue of the longest pending job that fits in
+        the remaining memory budget, None if there is none.
+        """
+        tree = self._memory_tree
+        if tree[1] > self.memory_budget - self._reserved_memory:
+            return None
+        node = 1
+        while node < self._tree_size:
+            node *= 2
+            if tree[node] > self.memory_budget - self._reserved_memory:
+                node += 1
+        return node - self._tree_size
+
+    def _start(self, index: int):
+        """Removes a job from the queue and marks it as running."""
+        job = self._queue[index]
+        self._queue[index] = None
+        self.nb_pending -= 1
+        while self._head < len(self._queue) and self._queue[self._head] is None:
+            self._head += 1
+        if self._memory_tree is not None:
+            node = index + self._tree_size
+            self._memory_tree[node] = np.inf
+            while node > 1:
+                node //= 2
+                self._memory_tree[node] = min(
+                    self._memory_tree[2 * node], self._memory_tree[2 * node + 1]
+                )
+        self.running.append(job)
+        self._reserved_memory += job.estimated_memory
+        return job
+
+    def next_jobs(self) -> list:
+        """
+        Returns the jobs that can start now and marks them as running. Jobs are
+        taken from the front of the queue, smaller jobs are only looked up if the
+        longest pending job does not fit the memory budget.
+
+        Returns
+        -------
+        list[~pylbo.automation.jobs.LegolasJob]
+            The jobs to start, longest first.
+        """
+        started = []
+        while self.nb_pending and len(self.running) < self.nb_slots:
+            index = self._head
+            if not self._fits(self._queue[index]):
+                index = self._find_fitting()
+                if index is None:
+                    break
+            started.append(self._start(index))
+        return started
+
+    def release(self, job) -> None:
+        """
+        Marks a job as done, freeing its slot and memory.
+
+        Parameters
+        ----------
+        job : ~pylbo.automation.jobs.LegolasJob
+            The finished job.
+        """
+        self.running.remove(job)
+        self._reserved_memory -= job.estimated_memory
@@ -0,0 +1,367 @@
+"""
+Sweep specifications for the parfile generator. A sweep describes the values of one
+or more parfile items for every run, without storing every run explicitly. Sweeps
+are given to the generator under the `"sweep"` key of the parfile dictionary:
+
+>>> from pylbo.automation.sweeps import Product, Zip
+>>> config = {
+>>>     "equilibrium_type": "adiabatic_homo",
+>>>     "parameters": {"k3": 1.0},
+>>>     "sweep": Product(
+>>>         Zip(k2=np.linspace(0, 1, 50), cte_rho0=np.linspace(1, 2, 50)),
+>>>         gridpoints=[50, 100, 200],
+>>>     ),
+>>> }
+
+Names that are namelist items (e.g. `gridpoints`) set that item, all other names
+are equilibrium parameters.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import os
+
+import numpy as np
+
+try:
+    from scipy.stats import qmc
+except ModuleNotFoundError:  # optional dependency, only needed for Sobol sampling
+    qmc = None
+
+
+def _to_python(value):
+    """Converts numpy scalars to the corresponding Python type."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class Sweep:
+    """
+    Base class of all sweeps. A sweep has a fixed number of runs and gives the
+    values of its :attr:`names` for every run index.
+
+    Attributes
+    ----------
+    names : tuple[str]
+        The names of the swept items, in the order of the values.
+    """
+
+    names = ()
+
+    def __len__(self) -> int:
+        raise NotImplementedError()
+
+    def _get(self, index: int) -> tuple:
+        raise NotImplementedError()
+
+    def __getitem__(self, index: int) -> tuple:
+        """Returns the values for a single run."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"run index {index} out of range for {len(self)} runs")
+        return self._get(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._get(index)
+
+    def get_run(self, index: int) -> dict:
+        """
+        Returns the values for a single run.
+
+        Parameters
+        ----------
+        index : int
+            The run index.
+
+        Returns
+        -------
+        dict
+            The swept values, keyed by name.
+        """
+        return dict(zip(self.names, self[index]))
+
+    def to_dict(self) -> dict:
+        """Returns a json-serialisable specification of the sweep."""
+        raise NotImplementedError()
+
+    @staticmethod
+    def from_dict(spec: dict) -> Sweep:
+        """
+        Recreates a sweep from its specification.
+
+        Parameters
+        ----------
+        spec : dict
+            The specification, see :meth:`to_dict`.
+
+        Returns
+        -------
+        Sweep
+            The sweep.
+        """
+        kind = spec["type"]
+        if kind == "values":
+            return _Values(spec["name"], spec["values"])
+        if kind == "samples":
+            return Samples(spec["names"], spec["samples"])
+        components = [Sweep.from_dict(component) for component in spec["components"]]
+        return {"product": Product, "zip": Zip}[kind](*components)
+
+
+class _Values(Sweep):
+    """The values of a single item."""
+
+    def __init__(self, name: str, values) -> None:
+        self.names = (name,)
+        self.values = [_to_python(value) for value in np.atleast_1d(values)]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _get(self, index: int) -> tuple:
+        return (self.values[index],)
+
+    def __iter__(self):
+        return ((value,) for value in self.values)
+
+    def to_dict(self) -> dict:
+        return {"type": "values", "name": self.names[0], "values": self.values}
+
+
+class _Combination(Sweep):
+    """A sweep combining sweeps and value lists given as keyword arguments."""
+
+    kind = None
+
+    def __init__(self, *sweeps: Sweep, **values) -> None:
+        self.components = [
+            *sweeps,
+            *(_Values(name, vals) for name, vals in values.items()),
+        ]
+        if not self.components:
+            raise ValueError(f"{type(self).__name__} needs at least one sweep")
+        self.names = tuple(name for sweep in self.components for name in sweep.names)
+        if len(set(self.names)) != len(self.names):
+            raise ValueError(f"duplicate names in sweep: {self.names}")
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.kind,
+            "components": [component.to_dict() for component in self.components],
+        }
+
+
+class Product(_Combination):
+    """
+    The cartesian product of sweeps, the last one varies fastest (as for
+    :func:`itertools.product`).
+
+    Parameters
+    ----------
+    sweeps : Sweep
+        The sweeps to combine.
+    values : list, numpy.ndarray
+        The values of single items, given as `name=values`.
+
+    Examples
+    --------
+    A grid of 50 x 40 x 30 runs.
+
+    >>> Product(k2=np.linspace(0, 1, 50), k3=np.linspace(0, 2, 40), gridpoints=...)
+    """
+
+    kind = "product"
+
+    def __len__(self) -> int:
+        return math.prod(len(component) for component in self.components)
+
+    def _get(self, index: int) -> tuple:
+        values = []
+        for component in reversed(self.components):
+            index, component_index = divmod(index, len(component))
+            values[:0] = component._get(component_index)
+        return tuple(values)
+
+    def __iter__(self):
+        for combination in itertools.product(*self.components):
+            yield tuple(value for values in combination for value in values)
+
+
+class Zip(_Combination):
+    """
+    Combines sweeps of equal length element-wise.
+
+    Parameters
+    ----------
+    sweeps : Sweep
+        The sweeps to combine.
+    values : list, numpy.ndarray
+        The values of single items, given as `name=values`.
+
+    Raises
+    ------
+    ValueError
+        If the sweeps have different lengths.
+    """
+
+    kind = "zip"
+
+    def __init__(self, *sweeps: Sweep, **values) -> None:
+        super().__init__(*sweeps, **values)
+        lengths = {len(component) for component in self.components}
+        if len(lengths) != 1:
+            raise ValueError(f"zipped sweeps have different lengths: {lengths}")
+
+    def __len__(self) -> int:
+        return len(self.components[0])
+
+    def _get(self, index: int) -> tuple:
+        return tuple(
+            value for component in self.components for value in component._get(index)
+        )
+
+    def __iter__(self):
+        for combination in zip(*self.components):
+            yield tuple(value for values in combination for value in values)
+
+
+class Samples(Sweep):
+    """
+    Explicitly sampled points in parameter space.
+
+    Parameters
+    ----------
+    names : list[str]
+        The names of the sampled items.
+    samples : numpy.ndarray
+        The samples, one row per run and one column per name.
+    """
+
+    def __init__(self, names: list[str], samples) -> None:
+        self.names = tuple(names)
+        self.samples = np.asarray(samples, dtype=float).reshape(-1, len(self.names))
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def _get(self, index: int) -> tuple:
+        return tuple(self.samples[index].tolist())
+
+    def to_dict(self) -> dict:
+        return {
+            "type": "samples",
+            "names": list(self.names),
+            "samples": self.samples.tolist(),
+        }
+
+
+def _scale_samples(unit_samples: np.ndarray, bounds: dict) -> np.ndarray:
+    """Scales samples in the unit hypercube to the given bounds."""
+    low, high = np.array(list(bounds.values()), dtype=float).T
+    return low + unit_samples * (high - low)
+
+
+class LatinHypercube(Samples):
+    """
+    Latin hypercube sampling: every parameter range is divided into
+    `nb_samples` intervals and every interval is sampled exactly once.
+
+    Parameters
+    ----------
+    nb_samples : int
+        The number of runs.
+    seed : int
+        The seed of the random number generator, for reproducible samples.
+    bounds : tuple[float, float]
+        The lower and upper bound of every item, given as `name=(low, high)`.
+    """
+
+    def __init__(self, nb_samples: int, seed: int = None, **bounds) -> None:
+        rng = np.random.default_rng(seed)
+        unit_samples = np.column_stack(
+            [
+                (rng.permutation(nb_samples) + rng.random(nb_samples)) / nb_samples
+                for _ in bounds
+            ]
+        )
+        super().__init__(list(bounds), _scale_samples(unit_samples, bounds))
+
+
+class Sobol(Samples):
+    """
+    Scrambled Sobol sampling, a low-discrepancy sequence covering the parameter
+    space more evenly than random sampling. Requires :mod:`scipy`.
+
+    Parameters
+    ----------
+    nb_samples : int
+        The number of runs, preferably a power of 2.
+    seed : int
+        The seed used for scrambling, for reproducible samples.
+    bounds : tuple[float, float]
+        The lower and upper bound of every item, given as `name=(low, high)`.
+
+    Raises
+    ------
+    ModuleNotFoundError
+        If :mod:`scipy` is not installed.
+    """
+
+    def __init__(self, nb_samples: int, seed: int = None, **bounds) -> None:
+        if qmc is None:
+            raise ModuleNotFoundError(
+                "Sobol sampling requires scipy, install it with 'pip install scipy'."
+            )
+        unit_samples = qmc.Sobol(len(bounds), seed=seed).random(nb_samples)
+        super().__init__(list(bounds), _scale_samples(unit_samples, bounds))
+
+
+def write_sweep_manifest(filepath: os.PathLike, sweep: Sweep, **info) -> None:
+    """
+    Writes a compact sweep manifest, containing the specification of the sweep
+    instead of the values of every run.
+
+    Parameters
+    ----------
+    filepath : str, ~os.PathLike
+        The path to the manifest.
+    sweep : Sweep
+        The sweep.
+    info
+        Additional json-serialisable information to store.
+    """
+    manifest = {"names": list(sweep.names), "nb_runs": len(sweep), **info}
+    manifest["sweep"] = sweep.to_dict()
+    with open(filepath, "w") as f:
+        json.dump(manifest, f)
+
+
+def load_sweep_manifest(filepath: os.PathLike) -> tuple[Sweep, dict]:
+    """
+    Loads a sweep manifest.
+
+    Parameters
+    ----------
+    filepath : str, ~os.PathLike
+        The path to the manifest.
+
+    Returns
+    -------
+    sweep : Sweep
+        The sweep, indexing it with a run index returns the values of that run.
+    info : dict
+        The remaining information in the manifest.
+
+    Examples
+    --------
+    >>> sweep, info = load_sweep_manifest("parfiles/sweep.json")
+    >>> sweep.get_run(42)
+    {'k2': 0.857, 'gridpoints': 100}
+    """
+    with open(filepath) as f:
+        manifest = json.load(f)
+    return Sweep.from_dict(manifest.pop("sweep")), manifest
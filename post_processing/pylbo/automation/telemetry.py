@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import psutil
+from pylbo.utilities.logger import pylboLogger
+from pylbo.utilities.toolbox import transform_to_list
+
+#: the resources measured for every run
+TELEMETRY_FIELDS = (
+    "wall_time",
+    "cpu_time",
+    "peak_rss",
+    "read_bytes",
+    "write_bytes",
+    "max_threads",
+)
+#: the columns of the telemetry reports, runs are keyed by their parfile
+REPORT_FIELDS = (
+    "parfile",
+    "datfile",
+    "status",
+    "gridpoints",
+    "dim_matrix",
+    "solver",
+    "physics_type",
+    "number_of_eigenvalues",
+    "threads_per_run",
+    *TELEMETRY_FIELDS,
+)
+#: the name of the telemetry reports written next to the datfiles
+REPORT_NAME = "telemetry"
+
+
+class ProcessMonitor:
+    """
+    Samples the resource usage of a process and all of its children whenever
+    :meth:`sample` is called by the caller polling the process. Memory and thread
+    counts are summed over the process tree, the peak over all samples is kept.
+
+    Parameters
+    ----------
+    pid : int
+        The process ID of the process to monitor.
+    """
+
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        self.usage = {
+            "cpu_time": 0.0,
+            "peak_rss": 0,
+            "read_bytes": 0,
+            "write_bytes": 0,
+            "max_threads": 0,
+        }
+
+    def stop(self) -> dict:
+        """
+        Stops monitoring.
+
+        Returns
+        -------
+        dict
+            The CPU time (user and system, in seconds), peak resident memory and
+            bytes read and written (including those served by the page cache,
+            where the platform reports them) of the process tree, and the peak
+            number of threads.
+        """
+        return dict(self.usage)
+
+    def sample(self) -> None:
+        """Adds a sample of the process tree to the usage."""
+        try:
+            parent = psutil.Process(self.pid)
+            processes = [parent, *parent.children(recursive=True)]
+        except psutil.NoSuchProcess:
+            return
+        cpu_time = rss = read_bytes = write_bytes = threads = 0
+        for process in processes:
+            try:
+                with process.oneshot():
+                    times = process.cpu_times()
+                    cpu_time += times.user + times.system
+                    if process is parent:
+                        # children that already exited
+                        cpu_time += times.children_user + times.children_system
+                    rss += process.memory_info().rss
+                    threads += process.num_threads()
+                    if hasattr(process, "io_counters"):
+                        io = process.io_counters()
+                        read_bytes += getattr(io, "read_chars", io.read_bytes)
+                        write_bytes += getattr(io, "write_chars", io.write_bytes)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        usage = self.usage
+        usage["cpu_time"] = max(usage["cpu_time"], cpu_time)
+        usage["peak_rss"] = max(usage["peak_rss"], rss)
+        usage["read_bytes"] = max(usage["read_bytes"], read_bytes)
+        usage["write_bytes"] = max(usage["write_bytes"], write_bytes)
+        usage["max_threads"] = max(usage["max_threads"], threads)
+
+
+def _read_report(filepath: Path) -> list[dict]:
+    """Reads a json or csv telemetry report."""
+    if filepath.suffix == ".json":
+        with open(filepath) as f:
+            return json.load(f)
+    with open(filepath, newline="") as f:
+        records = list(csv.DictReader(f))
+    for record in records:
+        for key, value in record.items():
+            try:
+                record[key] = None if value == "" else float(value)
+            except ValueError:
+                pass
+    return records
+
+
+def write_reports(records: list[dict], directory: os.PathLike) -> list[Path]:
+    """
+    Writes the telemetry of runs to ``telemetry.json`` and ``telemetry.csv`` in a
+    directory. Runs already in an existing report are replaced by those in
+    `records`, other runs are kept, such that the reports accumulate all runs
+    with datfiles in that directory.
+
+    Parameters
+    ----------
+    records : list[dict]
+        The runs, e.g. manifest entries, only the :data:`REPORT_FIELDS` are
+        written.
+    directory : str, ~os.PathLike
+        The directory of the reports.
+
+    Returns
+    -------
+    list[~pathlib.Path]
+        The paths to the json and csv report.
+    """
+    directory = Path(directory)
+    json_report = directory / f"{REPORT_NAME}.json"
+    csv_report = directory / f"{REPORT_NAME}.csv"
+    rows = {}
+    if json_report.is_file():
+        rows = {row["parfile"]: row for row in _read_report(json_report)}
+    for record in records:
+        rows[record["parfile"]] = {key: record.get(key) for key in REPORT_FIELDS}
+    os.makedirs(directory, exist_ok=True)
+    with open(json_report, "w") as f:
+        json.dump(list(rows.values()), f, indent=2)
+    with open(csv_report, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows.values())
+    pylboLogger.info(f"telemetry written to {json_report}")
+    return [json_report, csv_report]
+
+
+def load_reports(reports) -> list[dict]:
+    """
+    Loads telemetry reports.
+
+    Parameters
+    ----------
+    reports : str, ~os.PathLike, list
+        The path(s) to json or csv reports, or to directories containing a
+        ``telemetry.json`` report.
+
+    Returns
+    -------
+    list[dict]
+        The runs in all reports.
+    """
+    records = []
+    for report in map(Path, transform_to_list(reports)):
+        if report.is_dir():
+            report = report / f"{REPORT_NAME}.json"
+        records.extend(_read_report(report))
+    return records
+
+
+def fit_scaling(
+    records: list[dict], quantity: str = "wall_time", variable: str = "gridpoints"
+) -> dict:
+    """
+    Fits a power law ``quantity = coefficient * variable ** exponent`` to measured
+    runs, separately for every solver, such that the cost of larger runs can be
+    extrapolated.
+
+    Parameters
+    ----------
+    records : list[dict]
+        The runs, see :func:`load_reports`. Runs that did not complete or miss
+        either of the fields are ignored.
+    quantity : str
+        The measured quantity, one of :data:`TELEMETRY_FIELDS`.
+    variable : str
+        The variable the quantity scales with, e.g. `"gridpoints"` or
+        `"dim_matrix"`.
+
+    Returns
+    -------
+    dict
+        The `(coefficient, exponent)` tuple for every solver with measurements
+        for at least two different values of `variable`.
+
+    Examples
+    --------
+    >>> from pylbo.automation.telemetry import fit_scaling, load_reports
+    >>> records = load_reports("output/telemetry.json")
+    >>> coefficient, exponent = fit_scaling(records, "peak_rss")["QR-invert"]
+    >>> memory_1000 = coefficient * 1000**exponent
+    """
+    points = {}
+    for record in records:
+        x, y = record.get(variable), record.get(quantity)
+        if record.get("status") != "completed" or not x or not y:
+            continue
+        points.setdefault(record.get("solver"), []).append((float(x), float(y)))
+    fits = {}
+    for solver, values in points.items():
+        x, y = np.log(np.array(values)).T
+        if len(np.unique(x)) < 2:
+            pylboLogger.warning(
+                f"{solver}: not enough different values of {variable} to fit "
+                f"the scaling of {quantity}"
+            )
+            continue
+        exponent, log_coefficient = np.polyfit(x, y, 1)
+        fits[solver] = (float(np.exp(log_coefficient)), float(exponent))
+    return fits
@@ -0,0 +1,372 @@
+"""
+Command line interface to inspect Legolas datfiles without loading them. Only the
+headers are read, which makes it possible to scan thousands of datfiles in seconds.
+
+Usage ::
+
+    pylbo ls [-r] [-j JOBS] [-f {table,json,csv}] [-o OUTPUT] path [path ...]
+    pylbo info [-f {table,json,csv}] [-o OUTPUT] datfile [datfile ...]
+    pylbo summary [-r] [-j JOBS] [-f {table,json,csv}] [-o OUTPUT] path [path ...]
+
+Paths can be datfiles or directories, in which case all datfiles in that directory
+(and its subdirectories if `-r` is given) are used.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import signal
+import sys
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from pathlib import Path
+from typing import TextIO
+
+import numpy as np
+from pylbo.utilities.datfiles.file_loader import read_header
+
+#: the columns shown by ``pylbo ls`` in table format
+LS_COLUMNS = (
+    "datfile",
+    "version",
+    "geometry",
+    "gridpoints",
+    "equilibrium",
+    "eigenvalues",
+    "efs_written",
+    "contents",
+)
+#: the columns shown by ``pylbo summary``
+SUMMARY_COLUMNS = (
+    "equilibrium",
+    "geometry",
+    "files",
+    "gridpoints",
+    "eigenvalues",
+    "with_efs",
+    "varying",
+)
+#: datfile contents, mapped to the header flag telling if they are present
+_CONTENTS = {
+    "efs": "has_efs",
+    "derived_efs": "has_derived_efs",
+    "matrices": "has_matrices",
+    "eigenvectors": "has_eigenvectors",
+    "residuals": "has_residuals",
+}
+#: files are only distributed over worker processes from this number onwards
+_MIN_FILES_PARALLEL = 64
+
+
+def _find_datfiles(paths: list[str], recursive: bool = False) -> list[Path]:
+    """
+    Collects the datfiles from a list of files and directories.
+
+    Parameters
+    ----------
+    paths : list[str]
+        The paths to datfiles or directories containing datfiles.
+    recursive : bool
+        If `True`, directories are searched recursively.
+
+    Returns
+    -------
+    list[Path]
+        The datfiles, files in directories are sorted on name. Paths that are not a
+        directory are returned as is.
+    """
+    datfiles = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            pattern = "**/*.dat" if recursive else "*.dat"
+            datfiles.extend(sorted(f for f in path.glob(pattern) if f.is_file()))
+        else:
+            datfiles.append(path)
+    return datfiles
+
+
+def read_record(datfile: str) -> dict:
+    """
+    Reads the header of a datfile into a flat record for the command line
+    interface. Files that can not be read do not raise, the error is returned in the
+    record instead.
+
+    Parameters
+    ----------
+    datfile : str, ~os.PathLike
+        The path to the datfile.
+
+    Returns
+    -------
+    dict
+        The record. Contains the key `"error"`, which is None if the header was
+        read successfully.
+    """
+    record = {"datfile": str(datfile)}
+    try:
+        header = read_header(datfile)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        return record
+    record.update(
+        {
+            "version": str(header.legolas_version),
+            "geometry": header["geometry"],
+            "x_start": header["x_start"],
+            "x_end": header["x_end"],
+            "gridpoints": header["gridpoints"],
+            "ef_gridpoints": header["ef_gridpoints"],
+            "equilibrium": header["eq_type"],
+            "physics_type": header.get("physics_type"),
+            "eigenvalues": header["nb_eigenvalues"],
+            "efs_written": (
+                len(header.get("ef_written_idxs", [])) if header["has_efs"] else 0
+            ),
+            "contents": [key for key, flag in _CONTENTS.items() if header[flag]],
+            "physics": [
+                key
+                for key, value in header.get("physics", {}).items()
+                if isinstance(value, bool) and value
+            ],
+            "parameters": dict(header["parameters"]),
+            "units": dict(header["units"]),
+            "error": None,
+        }
+    )
+    return record
+
+
+def _init_worker() -> None:
+    """Worker initialisation for the multiprocessing module."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def read_records(datfiles: list[str], jobs: int = None) -> list[dict]:
+    """
+    Reads the headers of multiple datfiles, in parallel if there are many.
+
+    Parameters
+    ----------
+    datfiles : list[str]
+        The paths to the datfiles.
+    jobs : int
+        The number of worker processes, defaults to the number of CPUs.
+
+    Returns
+    -------
+    list[dict]
+        The records, see :func:`read_record`, in the same order as `datfiles`.
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(datfiles))
+    if jobs <= 1 or len(datfiles) < _MIN_FILES_PARALLEL:
+        return [read_record(datfile) for datfile in datfiles]
+    chunksize = max(1, len(datfiles) // (4 * jobs))
+    with Pool(processes=jobs, initializer=_init_worker) as pool:
+        return pool.map(read_record, datfiles, chunksize=chunksize)
+
+
+def summarise(records: list[dict]) -> list[dict]:
+    """
+    Summarises records per equilibrium and geometry.
+
+    Parameters
+    ----------
+    records : list[dict]
+        The records, those with an error are skipped.
+
+    Returns
+    -------
+    list[dict]
+        One row per combination of equilibrium and geometry, with the number of
+        files, the range of gridpoints, the total number of eigenvalues, the number
+        of files with eigenfunctions and the range of every parameter that varies
+        between files.
+    """
+    groups = {}
+    for record in records:
+        if record["error"] is None:
+            key = (record["equilibrium"], record["geometry"])
+            groups.setdefault(key, []).append(record)
+    rows = []
+    for (equilibrium, geometry), group in sorted(groups.items()):
+        gridpoints = [record["gridpoints"] for record in group]
+        values = {}
+        for record in group:
+            for name, value in record["parameters"].items():
+                values.setdefault(name, set()).add(value)
+        rows.append(
+            {
+                "equilibrium": equilibrium,
+                "geometry": geometry,
+                "files": len(group),
+                "gridpoints": [min(gridpoints), max(gridpoints)],
+                "eigenvalues": sum(record["eigenvalues"] for record in group),
+                "with_efs": sum("efs" in record["contents"] for record in group),
+                "varying": {
+                    name: [min(vals), max(vals)]
+                    for name, vals in sorted(values.items())
+                    if len(vals) > 1
+                },
+            }
+        )
+    return rows
+
+
+def _format_value(value) -> str:
+    """Formats a record value for a table or csv cell."""
+    if isinstance(value, dict):
+        return " ".join(f"{k}={_format_value(v)}" for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        if len(value) == 2 and all(isinstance(v, (int, float)) for v in value):
+            # a range
+            if value[0] == value[1]:
+                return _format_value(value[0])
+            return f"{_format_value(value[0])}..{_format_value(value[1])}"
+        return ",".join(map(str, value))
+    if isinstance(value, float):
+        return f"{value:g}"
+    return "" if value is None else str(value)
+
+
+def _write_table(rows: list[dict], columns: tuple, stream: TextIO) -> None:
+    """Writes rows as an aligned plain text table."""
+    cells = [[_format_value(row.get(col)) for col in columns] for row in rows]
+    widths = [len(col) for col in columns]
+    for line in cells:
+        widths = [max(width, len(cell)) for width, cell in zip(widths, line)]
+    for line in (columns, *cells):
+        stream.write("  ".join(c.ljust(w) for c, w in zip(line, widths)).rstrip())
+        stream.write("\n")
+
+
+def _write_info(records: list[dict], stream: TextIO) -> None:
+    """Writes every field of the records, one block per datfile."""
+    for record in records:
+        width = max(len(key) for key in record)
+        for key, value in record.items():
+            stream.write(f"{key.ljust(width)} : {_format_value(value)}\n")
+        stream.write("-" * 75 + "\n")
+
+
+def _flatten(row: dict) -> dict:
+    """Flattens nested dictionaries into `key.subkey` columns."""
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update({f"{key}.{k}": v for k, v in value.items()})
+        else:
+            flat[key] = value
+    return flat
+
+
+def _write_csv(rows: list[dict], stream: TextIO) -> None:
+    """Writes rows as csv, the columns are the union of all row keys."""
+    rows = [_flatten(row) for row in rows]
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    # keep the columns of a nested dictionary together
+    groups = list(dict.fromkeys(col.split(".")[0] for col in columns))
+    columns.sort(key=lambda col: groups.index(col.split(".")[0]))
+    writer = csv.writer(stream)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(
+            [_format_value(row[col]) if col in row else "" for col in columns]
+        )
+
+
+def _json_default(value):
+    """Converts numpy types for json serialisation."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _write(rows: list[dict], fmt: str, stream: TextIO, columns: tuple = None) -> None:
+    """Writes rows in the given format, a table without columns lists all fields."""
+    if fmt == "json":
+        json.dump(rows, stream, indent=2, default=_json_default)
+        stream.write("\n")
+    elif fmt == "csv":
+        _write_csv(rows, stream)
+    elif columns is None:
+        _write_info(rows, stream)
+    else:
+        _write_table(rows, columns, stream)
+
+
+def _build_parser() -> ArgumentParser:
+    """Builds the argument parser with one subparser per command."""
+    parser = ArgumentParser(
+        prog="pylbo", description="Inspect Legolas datfiles by reading their headers."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command, description in COMMANDS.items():
+        subparser = subparsers.add_parser(command, help=description)
+        subparser.add_argument("paths", nargs="+", help="datfiles or directories")
+        subparser.add_argument(
+            "-r",
+            "--recursive",
+            action="store_true",
+            help="search directories recursively",
+        )
+        subparser.add_argument(
+            "-j", "--jobs", type=int, default=None, help="number of worker processes"
+        )
+        subparser.add_argument(
+            "-f", "--format", choices=("table", "json", "csv"), default="table"
+        )
+        subparser.add_argument("-o", "--output", help="write to a file instead")
+    return parser
+
+
+#: the subcommands of the command line interface
+COMMANDS = {
+    "ls": "list datfiles, one line per file",
+    "info": "show the header of datfiles",
+    "summary": "summarise datfiles per equilibrium and geometry",
+}
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Entry point of the ``pylbo`` command line interface.
+
+    Parameters
+    ----------
+    argv : list[str]
+        The command line arguments, defaults to ``sys.argv[1:]``.
+
+    Returns
+    -------
+    int
+        The exit code, 1 if any of the datfiles could not be read.
+    """
+    args = _build_parser().parse_args(argv)
+    datfiles = _find_datfiles(args.paths, recursive=args.recursive)
+    records = read_records(datfiles, jobs=args.jobs)
+    errors = [record for record in records if record["error"] is not None]
+    for record in errors:
+        print(f"{record['datfile']}: {record['error']}", file=sys.stderr)
+
+    if args.command == "summary":
+        rows, columns = summarise(records), SUMMARY_COLUMNS
+    else:
+        rows = [
+            {key: value for key, value in record.items() if key != "error"}
+            for record in records
+            if record["error"] is None
+        ]
+        columns = LS_COLUMNS if args.command == "ls" else None
+
+    if args.output is None:
+        _write(rows, args.format, sys.stdout, columns)
+    else:
+        with open(args.output, "w", newline="") as stream:
+            _write(rows, args.format, stream, columns)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
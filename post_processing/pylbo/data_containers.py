@@ -16,7 +16,6 @@ from pylbo.exceptions import (
 from pylbo.utilities.datfiles.file_reader import LegolasFileReader
 from pylbo.utilities.logger import pylboLogger
 from pylbo.utilities.toolbox import get_values, transform_to_numpy
-from pylbo.visualisation.continua import calculate_continua
 
 
 def ensure_dataset(data: any) -> None:
@@ -191,7 +190,6 @@ class LegolasDataSet(LegolasDataContainer):
         self.eq_names = self.header["equilibrium_names"]
 
         self._ensure_compatibility()
-        self._continua = calculate_continua(self)
 
     def __iter__(self):
         yield self
@@ -228,6 +226,11 @@ class LegolasDataSet(LegolasDataContainer):
     @property
     def continua(self) -> dict:
         """Returns the continua in a dict with the continua names as keys."""
+        if getattr(self, "_continua", None) is None:
+            # imported here since the visualisation package depends on matplotlib
+            from pylbo.visualisation.continua import calculate_continua
+
+            self._continua = calculate_continua(self)
         return self._continua
 
     @property
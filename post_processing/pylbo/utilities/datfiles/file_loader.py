@@ -1,11 +1,10 @@
 import os
-import tkinter as tk
 from pathlib import Path
-from tkinter import filedialog
 
 import numpy as np
 from pylbo.data_containers import LegolasDataSeries, LegolasDataSet
 from pylbo.exceptions import InvalidLegolasFile
+from pylbo.utilities.datfiles.file_reader import LegolasFileReader
 from pylbo.utilities.logger import pylboLogger
 from pylbo.utilities.toolbox import transform_to_list
 
@@ -81,6 +80,33 @@ def load(datfile):
     return ds
 
 
+def read_header(datfile):
+    """
+    Reads only the header of a Legolas datfile. This is much faster than
+    :func:`load` since none of the data arrays are read, and is meant for
+    inspecting large numbers of datfiles.
+
+    Parameters
+    ----------
+    datfile : str, ~os.PathLike
+        Path to the datfile.
+
+    Raises
+    ------
+    ValueError
+        If `datfile` is not a single file.
+
+    Returns
+    -------
+    header : ~pylbo.utilities.datfiles.header.LegolasHeader
+        The header of the datfile.
+    """
+    if not isinstance(datfile, (str, os.PathLike)):
+        raise ValueError("read_header() takes a single datfile.")
+    _validate_file(datfile)
+    return LegolasFileReader(Path(datfile).resolve()).get_header()
+
+
 def load_series(datfiles):
     """
     Loads multiple Legolas datfiles.
@@ -214,6 +240,10 @@ def select_files():
     files : list
         A list containing the paths to the files selected.
     """
+    # imported here, tkinter is not available on every (headless) system
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
     root.lift()
@@ -1,9 +1,8 @@
 import functools
 import time
 
-import matplotlib.lines as mpl_lines
 import numpy as np
-from pylbo._version import _mpl_version
+from pylbo import _version
 from pylbo.utilities.logger import pylboLogger
 
 
@@ -35,7 +34,7 @@ def get_axis_geometry(ax):
     tuple
         The geometry of the given matplotlib axis.
     """
-    if _mpl_version >= "3.4":
+    if _version._mpl_version >= "3.4":
         axis_geometry = ax.get_subplotspec().get_geometry()[0:3]
     else:
         # this is 1-based indexing by default, use 0-based here for consistency
@@ -94,7 +93,9 @@ def add_pickradius_to_item(item, pickradius):
         Sets the pickradius, which determines if something is "on" the picked point.
     """
     # set_picker is deprecated for line2D from matplotlib 3.3 onwards
-    if isinstance(item, mpl_lines.Line2D) and _mpl_version >= "3.3":
+    import matplotlib.lines as mpl_lines
+
+    if isinstance(item, mpl_lines.Line2D) and _version._mpl_version >= "3.3":
         item.set_picker(True)
         item.pickradius = pickradius
     else:
@@ -258,7 +258,7 @@ def plot_continua(data, figsize=None, interactive=True, **kwargs):
     return p
 
 
-def plot_matrices(data, figsize=None, **kwargs):
+def plot_matrices(data, figsize=None, raster=None, **kwargs):
     """
     Plots the continua profiles.
 
@@ -268,6 +268,10 @@ def plot_matrices(data, figsize=None, **kwargs):
         The dataset that should be used.
     figsize : tuple
         Optional figure size like the usual matplotlib (x, x) size.
+    raster : bool
+        If `True`, draws the matrices as images with the maximum modulus per pixel
+        instead of a marker per nonzero element, which is much faster for large
+        matrices. If None (default), images are used for large matrices only.
 
     Returns
     -------
@@ -275,5 +279,5 @@ def plot_matrices(data, figsize=None, **kwargs):
         The instance containing the matrix plots.
     """
     ensure_dataset(data)
-    p = MatrixFigure(data, figsize, **kwargs)
+    p = MatrixFigure(data, figsize, raster=raster, **kwargs)
     return p
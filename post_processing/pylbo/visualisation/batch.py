@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import os
+import signal
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Union
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from pylbo.data_containers import LegolasDataSeries, LegolasDataSet, ensure_dataset
+from pylbo.utilities.logger import pylboLogger
+from pylbo.utilities.toolbox import transform_to_list, transform_to_numpy
+from pylbo.visualisation.api import (
+    plot_continua,
+    plot_equilibrium,
+    plot_equilibrium_balance,
+    plot_spectrum,
+)
+from tqdm import tqdm
+
+#: the plot functions available in a recipe
+RECIPE_PLOTS = {
+    "spectrum": plot_spectrum,
+    "continua": plot_continua,
+    "equilibrium": plot_equilibrium,
+    "equilibrium_balance": plot_equilibrium_balance,
+}
+#: keys accepted by every recipe entry
+_COMMON_KEYS = {"plot", "name", "figsize", "xlim", "ylim", "kwargs"}
+#: additional keys accepted by spectrum entries
+_SPECTRUM_KEYS = {
+    "continua",
+    "eigenfunctions",
+    "ev_idxs",
+    "ev_guesses",
+    "ef_name",
+    "real_part",
+}
+_EIGENFUNCTION_KINDS = ("eigenfunctions", "derived_eigenfunctions")
+
+
+def _validate_recipe(recipe: Union[dict, list[dict]]) -> list[dict]:
+    """
+    Validates a render recipe and fills in the default names.
+
+    Parameters
+    ----------
+    recipe : dict, list[dict]
+        The recipe, a single entry or a list of entries.
+
+    Raises
+    ------
+    ValueError
+        If an entry has an unknown plot type or keys, or if names are not unique.
+
+    Returns
+    -------
+    list[dict]
+        The validated recipe entries.
+    """
+    entries = []
+    for entry in transform_to_list(recipe):
+        entry = dict(entry)
+        plot = entry.get("plot")
+        if plot not in RECIPE_PLOTS:
+            raise ValueError(
+                f"unknown plot '{plot}' in recipe, expected one of {list(RECIPE_PLOTS)}"
+            )
+        allowed = _COMMON_KEYS | (_SPECTRUM_KEYS if plot == "spectrum" else set())
+        unknown = set(entry) - allowed
+        if unknown:
+            raise ValueError(f"unknown recipe keys for '{plot}': {sorted(unknown)}")
+        kind = entry.get("eigenfunctions")
+        if kind is True:
+            kind = "eigenfunctions"
+        if kind not in (None, False, *_EIGENFUNCTION_KINDS):
+            raise ValueError(
+                f"invalid eigenfunctions '{kind}', expected one of "
+                f"{list(_EIGENFUNCTION_KINDS)}"
+            )
+        if entry.get("ev_idxs") is not None and entry.get("ev_guesses") is not None:
+            raise ValueError("recipe: either provide ev_idxs or ev_guesses, not both")
+        entry["eigenfunctions"] = kind or None
+        entry.setdefault("name", plot)
+        entries.append(entry)
+    names = [entry["name"] for entry in entries]
+    if len(set(names)) != len(names):
+        raise ValueError(f"recipe names should be unique, got {names}")
+    return entries
+
+
+def _select_eigenvalues(p, ds: LegolasDataSet, entry: dict) -> None:
+    """
+    Adds the (derived) eigenfunctions of the selected eigenvalues to a spectrum.
+    Does nothing if the dataset has no such functions.
+
+    Parameters
+    ----------
+    p : ~pylbo.visualisation.spectra.SingleSpectrumPlot
+        The spectrum plot.
+    ds : ~pylbo.data_containers.LegolasDataSet
+        The dataset.
+    entry : dict
+        The recipe entry.
+    """
+    kind = entry["eigenfunctions"]
+    if not getattr(ds, "has_derived_efs" if kind.startswith("derived") else "has_efs"):
+        pylboLogger.warning(f"{ds.datfile.name} has no {kind.replace('_', ' ')}")
+        return
+    if kind == "derived_eigenfunctions":
+        p.add_derived_eigenfunctions()
+        handler = p.def_handler
+    else:
+        p.add_eigenfunctions()
+        handler = p.ef_handler
+    if entry.get("ev_guesses") is not None:
+        idxs, _ = ds.get_nearest_eigenvalues(entry["ev_guesses"])
+    elif entry.get("ev_idxs") is not None:
+        idxs = transform_to_numpy(entry["ev_idxs"])
+    else:
+        idxs = []
+    for idx in idxs:
+        w = ds.eigenvalues[idx]
+        handler.select_point(ds, int(idx), w.real * p.x_scaling, w.imag * p.y_scaling)
+    if entry.get("ef_name") is not None:
+        names = list(handler._function_names)
+        if entry["ef_name"] not in names:
+            raise ValueError(f"unknown function '{entry['ef_name']}', got {names}")
+        handler._selected_name_idx = names.index(entry["ef_name"])
+    handler._use_real_part = entry.get("real_part", True)
+    handler.update_plot()
+
+
+def _render_dataset(
+    data: Union[LegolasDataSet, str],
+    recipe: list[dict],
+    outdir: Path,
+    fmt: str,
+    dpi: int,
+) -> list[dict]:
+    """
+    Renders all entries of a recipe for a single dataset.
+
+    Parameters
+    ----------
+    data : ~pylbo.data_containers.LegolasDataSet, str
+        The dataset, or the path to its datfile.
+    recipe : list[dict]
+        The validated recipe.
+    outdir : Path
+        The output directory.
+    fmt : str
+        The file format of the figures.
+    dpi : int
+        The resolution of the figures.
+
+    Returns
+    -------
+    list[dict]
+        The manifest entries of the produced files.
+    """
+    ds = data if isinstance(data, LegolasDataSet) else LegolasDataSet(data)
+    manifest = []
+    for entry in recipe:
+        p = RECIPE_PLOTS[entry["plot"]](
+            ds, figsize=entry.get("figsize"), **entry.get("kwargs", {})
+        )
+        if p is None:
+            pylboLogger.warning(
+                f"{ds.datfile.name}: '{entry['name']}' could not be rendered and is "
+                "left out of the manifest"
+            )
+            continue
+        # rendered on its own Agg canvas, the backend of pyplot is left untouched
+        FigureCanvasAgg(p.fig)
+        try:
+            if entry["plot"] == "spectrum":
+                if entry.get("continua", False):
+                    p.add_continua(interactive=False)
+                p.draw()
+                if entry["eigenfunctions"] is not None:
+                    _select_eigenvalues(p, ds, entry)
+            if entry.get("xlim") is not None:
+                p.ax.set_xlim(entry["xlim"])
+            if entry.get("ylim") is not None:
+                p.ax.set_ylim(entry["ylim"])
+            filename = outdir / f"{ds.datfile.stem}_{entry['name']}.{fmt}"
+            p.fig.savefig(filename, dpi=dpi)
+        finally:
+            p.release()
+        manifest.append(
+            {
+                "datfile": str(ds.datfile),
+                "plot": entry["plot"],
+                "name": entry["name"],
+                "file": str(filename),
+            }
+        )
+    return manifest
+
+
+def _init_render_worker() -> None:
+    """Initializer for the render worker processes, these render headless."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    plt.switch_backend("agg")
+
+
+def _render_in_worker(args: tuple) -> list[dict]:
+    """Renders a single dataset in a worker process."""
+    return _render_dataset(*args)
+
+
+def render_batch(
+    series: Union[LegolasDataSeries, list[LegolasDataSet]],
+    recipe: Union[dict, list[dict]],
+    outdir: str,
+    workers: int = 1,
+    fmt: str = "png",
+    dpi: int = 100,
+) -> list[dict]:
+    """
+    Renders the same set of figures for every dataset in a series and saves them
+    to disk. The figures are described by a declarative recipe, a list of entries
+    of the form ::
+
+        {"plot": "spectrum", "continua": True, "xlim": (-1, 1)}
+        {"plot": "spectrum", "name": "efs", "eigenfunctions": True, "ev_idxs": [5]}
+        {"plot": "continua"}
+
+    Every entry should contain the key `"plot"`, one of ``"spectrum"``,
+    ``"continua"``, ``"equilibrium"`` or ``"equilibrium_balance"``. Optional keys
+    are `"name"` (used in the filename, defaults to the plot type), `"figsize"`,
+    `"xlim"` and `"ylim"` (limits of the main axes) and `"kwargs"` (passed to the
+    plot function). Spectrum entries can additionally contain `"continua"`
+    (bool), `"eigenfunctions"` (``True``, ``"eigenfunctions"`` or
+    ``"derived_eigenfunctions"``), the selected eigenvalues as `"ev_idxs"` or
+    `"ev_guesses"`, `"ef_name"` (the function to show) and `"real_part"` (bool).
+
+    Datasets are distributed over a pool of `workers` processes. Every figure is
+    rendered on a non-interactive Agg canvas and closed as soon as it is saved,
+    other open figures and the backend of pyplot are left untouched.
+
+    Parameters
+    ----------
+    series : ~pylbo.data_containers.LegolasDataSeries, list
+        The datasets to render, can also be a single dataset.
+    recipe : dict, list[dict]
+        The recipe describing the figures.
+    outdir : str, ~os.PathLike
+        The output directory, created if it does not exist. Files are named
+        ``<datfile stem>_<name>.<fmt>``.
+    workers : int
+        The number of worker processes. If 1 (default), everything is rendered in
+        the current process.
+    fmt : str
+        The file format of the figures.
+    dpi : int
+        The resolution of the figures.
+
+    Raises
+    ------
+    ValueError
+        If the recipe is invalid, if `workers` is not a positive integer or if the
+        datfiles do not have unique names.
+
+    Returns
+    -------
+    list[dict]
+        The manifest, one item per produced file containing the keys `"datfile"`,
+        `"plot"`, `"name"` and `"file"`. Ordered on dataset, then on recipe entry.
+        Entries that can not be rendered for a dataset, e.g. equilibrium profiles
+        of a dataset without background, are left out with a warning.
+    """
+    recipe = _validate_recipe(recipe)
+    if not isinstance(workers, (int, np.integer)) or workers < 1:
+        raise ValueError(f"workers should be a positive integer, got {workers}")
+    datasets = [series] if isinstance(series, LegolasDataSet) else list(series)
+    for ds in datasets:
+        ensure_dataset(ds)
+    stems = [ds.datfile.stem for ds in datasets]
+    if len(set(stems)) != len(stems):
+        raise ValueError("render_batch: datfiles should have unique names")
+    outdir = Path(outdir).resolve()
+    os.makedirs(outdir, exist_ok=True)
+
+    workers = min(workers, len(datasets))
+    pylboLogger.info(
+        f"rendering {len(recipe)} figure(s) for {len(datasets)} dataset(s) "
+        f"using {workers} worker(s)"
+    )
+    manifest = []
+    pbar = tqdm(total=len(datasets), unit="dataset", desc="Rendering")
+    if workers <= 1:
+        # figures are never shown, even in interactive sessions
+        with plt.ioff():
+            for ds in datasets:
+                manifest.extend(_render_dataset(ds, recipe, outdir, fmt, dpi))
+                pbar.update()
+    else:
+        args = [(str(ds.datfile), recipe, outdir, fmt, dpi) for ds in datasets]
+        with Pool(processes=workers, initializer=_init_render_worker) as pool:
+            for items in pool.imap(_render_in_worker, args):
+                manifest.extend(items)
+                pbar.update()
+    pbar.close()
+    pylboLogger.info(f"{len(manifest)} figure(s) saved to {outdir}")
+    return manifest
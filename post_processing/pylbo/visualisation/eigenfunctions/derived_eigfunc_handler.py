@@ -11,8 +11,10 @@ class DerivedEigenfunctionHandler(EigenfunctionInterface):
     Main handler for derived eigenfunctions.
     """
 
-    def __init__(self, data, def_ax, spec_ax):
-        super().__init__(data, def_ax, spec_ax)
+    _function_kind = "derived_eigenfunctions"
+
+    def __init__(self, data, def_ax, spec_ax, prefetcher=None):
+        super().__init__(data, def_ax, spec_ax, prefetcher=prefetcher)
         self._function_names = self.data.derived_ef_names
         if self._function_names.shape == ():
             self._function_names = np.array([self._function_names])
@@ -35,7 +37,7 @@ class DerivedEigenfunctionHandler(EigenfunctionInterface):
         ef_name = self._function_names[self._selected_name_idx]
         for ds, idxs_dict in self._selected_idxs.items():
             idxs = np.array([int(idx) for idx in idxs_dict.keys()])
-            ef_container = ds.get_derived_eigenfunctions(ev_idxs=idxs)
+            ef_container = self.prefetcher.get(ds, idxs, self._function_kind)
             for ev_idx, efs in zip(idxs, ef_container):
                 ef = efs.get(ef_name)
                 if self._use_real_part:
@@ -11,8 +11,8 @@ class EigenfunctionHandler(EigenfunctionInterface):
     Main handler for eigenfunctions.
     """
 
-    def __init__(self, data, ef_ax, spec_ax):
-        super().__init__(data, ef_ax, spec_ax)
+    def __init__(self, data, ef_ax, spec_ax, prefetcher=None):
+        super().__init__(data, ef_ax, spec_ax, prefetcher=prefetcher)
         # extract unique names and preserve order
         fnames, idxs = np.unique(self.data.ef_names, return_index=True)
         self._function_names = fnames[np.argsort(idxs)]
@@ -32,7 +32,7 @@ class EigenfunctionHandler(EigenfunctionInterface):
         ef_name = self._function_names[self._selected_name_idx]
         for ds, idxs_dict in self._selected_idxs.items():
             idxs = np.array([int(idx) for idx in idxs_dict.keys()])
-            ef_container = ds.get_eigenfunctions(ev_idxs=idxs)
+            ef_container = self.prefetcher.get(ds, idxs, self._function_kind)
             for ev_idx, efs in zip(idxs, ef_container):
                 ef = efs.get(ef_name)
                 if self._use_real_part:
@@ -13,6 +13,9 @@ from pylbo.utilities.toolbox import (
     count_zeroes,
     invert_continuum_array,
 )
+from pylbo.visualisation.eigenfunctions.eigfunc_prefetcher import (
+    EigenfunctionPrefetcher,
+)
 
 
 def get_artist_data(artist: plt.Artist) -> tuple[np.ndarray, np.ndarray]:
@@ -42,12 +45,19 @@ def get_artist_data(artist: plt.Artist) -> tuple[np.ndarray, np.ndarray]:
 
 class EigenfunctionInterface:
     __metaclass__ = abc.ABCMeta
+    #: the kind of functions drawn by the handler, used by the prefetcher
+    _function_kind = "eigenfunctions"
 
-    def __init__(self, data, axis, spec_axis):
+    def __init__(self, data, axis, spec_axis, prefetcher=None):
         self.data = data
         self.axis = axis
         self.spec_axis = spec_axis
         self._check_data_is_present()
+        # loads the functions of selected eigenvalues in the background, may be
+        # shared between handlers of the same spectrum
+        if prefetcher is None:
+            prefetcher = EigenfunctionPrefetcher()
+        self.prefetcher = prefetcher
         # holds the points that are currently selected in the form of a "double" dict:
         # {"ds instance" : {"index" : line2D instance}}
         self._selected_idxs = {}
@@ -94,7 +104,7 @@ class EigenfunctionInterface:
         # this attr has been set when adding the legend, return for legend items
         if hasattr(artist, "is_legend_item"):
             return False
-        if not hasattr(artist, "dataset"):
+        if not (hasattr(artist, "dataset") or hasattr(artist, "point_resolver")):
             return False
         return True
 
@@ -160,9 +170,8 @@ class EigenfunctionInterface:
         for ds in self._selected_idxs:
             print(f"Saving selected eigenvalues for dataset {count}...")
             to_store = [ds.ef_grid]
-            for point in self._selected_idxs[ds]:
-                point_to_store = ds.get_eigenfunctions(ev_idxs=int(point))[0]
-                to_store.append(point_to_store)
+            idxs = [int(point) for point in self._selected_idxs[ds]]
+            to_store.extend(self.prefetcher.get(ds, idxs, "eigenfunctions"))
             filename = ds.datfile.name
             filename = filename.replace(".dat", "")
             np.save(filename, to_store)
@@ -205,7 +214,7 @@ class EigenfunctionInterface:
         for ds, points in self._selected_idxs.items():
             idxs = np.array([int(idx) for idx in points.keys()])
 
-            ef_container = ds.get_eigenfunctions(ev_idxs=idxs)
+            ef_container = self.prefetcher.get(ds, idxs, "eigenfunctions")
             eigfuncs = np.zeros((len(idxs), len(ds.ef_grid)), dtype="complex")
             current_index = 0
             for ev_idx, efs in zip(idxs, ef_container):
@@ -324,15 +333,42 @@ class EigenfunctionInterface:
         event : ~matplotlib.backend_bases.PickEvent
             The pick event.
         """
-        idx, xdata, ydata = self._get_clicked_point_data(event)
-        associated_ds = event.artist.dataset
-        # skip if point index is already in list
-        if str(idx) in self._selected_idxs.get(associated_ds, {}).keys():
+        picked_point = self._get_picked_point(event)
+        if picked_point is None:
             return
+        if self.select_point(*picked_point):
+            self.update_plot()
+
+    def select_point(self, ds, idx, xdata, ydata):
+        """
+        Selects an eigenvalue and marks it on the spectrum, this is what happens
+        when left-clicking an eigenvalue. The plot itself is not updated.
+
+        Parameters
+        ----------
+        ds : ~pylbo.data_containers.LegolasDataSet
+            The dataset associated with the eigenvalue.
+        idx : int
+            The index of the eigenvalue in the eigenvalue array.
+        xdata : float
+            The x data coordinate of the eigenvalue on the spectrum.
+        ydata : float
+            The y data coordinate of the eigenvalue on the spectrum.
+
+        Returns
+        -------
+        bool
+            `True` if the eigenvalue was selected, `False` if it was already selected
+            or has no eigenfunctions.
+        """
+        # skip if point index is already in list
+        if str(idx) in self._selected_idxs.get(ds, {}).keys():
+            return False
         # skip if point has no eigenfunction due to e.g. subset
-        if not self._selected_point_has_eigenfunctions(associated_ds, idx):
-            return
-        (marked_point,) = event.artist.axes.plot(
+        if not self._selected_point_has_eigenfunctions(ds, idx):
+            return False
+        self.prefetcher.prefetch(ds, idx, kind=self._function_kind)
+        (marked_point,) = self.spec_axis.plot(
             xdata,
             ydata,
             "x",
@@ -343,10 +379,10 @@ class EigenfunctionInterface:
         )
         add_pickradius_to_item(item=marked_point, pickradius=1)
         # get items corresponding to this ds
-        items = self._selected_idxs.get(associated_ds, {})
+        items = self._selected_idxs.get(ds, {})
         items.update({f"{idx}": marked_point})
-        self._selected_idxs.update({associated_ds: items})
-        self.update_plot()
+        self._selected_idxs.update({ds: items})
+        return True
 
     def on_right_click(self, event):
         """
@@ -357,9 +393,11 @@ class EigenfunctionInterface:
         event : ~matplotlib.backend_bases.PickEvent
             The pick event.
         """
-        idx, _, _ = self._get_clicked_point_data(event)
+        picked_point = self._get_picked_point(event)
+        if picked_point is None:
+            return
+        associated_ds, idx, _, _ = picked_point
         # remove selected index from list
-        associated_ds = event.artist.dataset
         selected_artist = self._selected_idxs.get(associated_ds, {}).pop(str(idx), None)
         if selected_artist is not None:
             selected_artist.remove()
@@ -368,6 +406,29 @@ class EigenfunctionInterface:
                 self._selected_idxs.pop(associated_ds)
             self.update_plot()
 
+    def _get_picked_point(self, event):
+        """
+        Retrieves the dataset and eigenvalue associated with a pick event. Artists
+        with a ``point_resolver`` attribute resolve the mouse click themselves,
+        for other artists the picked point is taken from the artist data.
+
+        Parameters
+        ----------
+        event : ~matplotlib.backend_bases.PickEvent
+            The pick event.
+
+        Returns
+        -------
+        tuple
+            The dataset, the index of the selected point in the eigenvalue array
+            and its x and y data coordinates. None if no point was selected.
+        """
+        resolver = getattr(event.artist, "point_resolver", None)
+        if resolver is not None:
+            return resolver.resolve_pick(event.mouseevent)
+        idx, xdata, ydata = self._get_clicked_point_data(event)
+        return event.artist.dataset, idx, xdata, ydata
+
     def _get_clicked_point_data(self, event):
         """
         Retrieves the index (in the eigenvalue array), x data coordinate and y data
@@ -555,7 +616,7 @@ class EigenfunctionInterface:
         r_inv = dict()
         labels = dict()
 
-        eigfuncs = ds.get_eigenfunctions(ev_idxs=[ev_idx])
+        eigfuncs = self.prefetcher.get(ds, [ev_idx], "eigenfunctions")
         sigma = eigfuncs[0].get("eigenvalue")
 
         continua_keys = ds.continua.keys()
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+from pylbo.data_containers import LegolasDataSet
+from pylbo.utilities.logger import pylboLogger
+
+#: the kinds of eigenfunctions that can be fetched, mapped to the dataset attribute
+#: telling if they are present
+EIGENFUNCTION_KINDS = {
+    "eigenfunctions": "has_efs",
+    "derived_eigenfunctions": "has_derived_efs",
+}
+
+
+class EigenfunctionPrefetcher:
+    """
+    Loads eigenfunctions in the background for the interactive eigenfunction plots.
+    As soon as an eigenvalue is selected its eigenfunctions and derived
+    eigenfunctions are read from the datfile on a background thread, optionally
+    together with those of the `nearest` eigenvalues around it, such that the data
+    is (usually) already in memory when the plot is updated. Reads are done by a
+    single worker thread so requests are served in the order they were made, the
+    most recent results are kept in a bounded cache.
+
+    Parameters
+    ----------
+    nearest : int
+        The number of nearest eigenvalues (with eigenfunctions) for which the
+        eigenfunctions are prefetched as well.
+    max_cached : int
+        The maximum number of cached results, one result holds a single kind of
+        eigenfunctions for a single eigenvalue.
+
+    Attributes
+    ----------
+    nearest : int
+        The number of nearest eigenvalues to prefetch.
+    max_cached : int
+        The maximum number of cached results.
+    """
+
+    def __init__(self, nearest: int = 0, max_cached: int = 128) -> None:
+        if nearest < 0:
+            raise ValueError(f"nearest must be non-negative, got {nearest}")
+        self.nearest = nearest
+        self.max_cached = max_cached
+        self._executor = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def nb_cached(self) -> int:
+        """The number of cached (or pending) results."""
+        return len(self._cache)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Returns the executor, the worker thread is only started when needed."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="pylbo-ef-prefetch"
+            )
+        return self._executor
+
+    def _get_kinds(self, ds: LegolasDataSet, first: str = None) -> list[str]:
+        """Returns the kinds of eigenfunctions present in the dataset."""
+        kinds = [
+            kind for kind, attr in EIGENFUNCTION_KINDS.items() if getattr(ds, attr)
+        ]
+        if first in kinds:
+            kinds.remove(first)
+            kinds.insert(0, first)
+        return kinds
+
+    def _get_nearest_idxs(self, ds: LegolasDataSet, idx: int) -> np.ndarray:
+        """
+        Returns the indices of the eigenvalues with eigenfunctions nearest to the
+        eigenvalue with index `idx`, sorted on distance and excluding `idx` itself.
+        """
+        if self.nearest == 0:
+            return np.array([], dtype=int)
+        written_idxs = np.asarray(ds.header["ef_written_idxs"], dtype=int)
+        written_idxs = written_idxs[written_idxs != idx]
+        distances = np.abs(ds.eigenvalues[written_idxs] - ds.eigenvalues[idx])
+        order = np.argsort(distances, kind="stable")[: self.nearest]
+        return written_idxs[order]
+
+    def _submit(self, ds: LegolasDataSet, idx: int, kind: str) -> Future:
+        """Submits a read to the worker thread unless it is already cached."""
+        key = (ds, int(idx), kind)
+        with self._lock:
+            future = self._cache.get(key)
+            if future is not None:
+                self._cache.move_to_end(key)
+                return future
+            getter = getattr(ds, f"get_{kind}")
+            future = self._get_executor().submit(lambda: getter(ev_idxs=[int(idx)])[0])
+            self._store(key, future)
+        return future
+
+    def _store(self, key: tuple, future: Future) -> None:
+        """Caches a result, evicting the least recently used ones if needed."""
+        self._cache[key] = future
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached:
+            _, evicted = self._cache.popitem(last=False)
+            evicted.cancel()
+
+    def prefetch(self, ds: LegolasDataSet, idx: int, kind: str = None) -> None:
+        """
+        Starts loading the eigenfunctions of all kinds for a given eigenvalue and
+        its :attr:`nearest` neighbours. This returns immediately.
+
+        Parameters
+        ----------
+        ds : ~pylbo.data_containers.LegolasDataSet
+            The dataset containing the eigenvalue.
+        idx : int
+            The index of the eigenvalue.
+        kind : str
+            The kind of eigenfunctions that is needed first, either
+            ``"eigenfunctions"`` or ``"derived_eigenfunctions"``.
+        """
+        kinds = self._get_kinds(ds, first=kind)
+        for ev_idx in (idx, *self._get_nearest_idxs(ds, idx)):
+            for ef_kind in kinds:
+                self._submit(ds, ev_idx, ef_kind)
+        pylboLogger.debug(f"prefetching {kinds} for eigenvalue {idx} of {ds.datfile}")
+
+    def get(self, ds: LegolasDataSet, idxs: np.ndarray, kind: str) -> np.ndarray:
+        """
+        Returns the eigenfunctions for the given eigenvalues, waiting for reads that
+        are still in progress. Eigenvalues that were not prefetched are read now.
+
+        Parameters
+        ----------
+        ds : ~pylbo.data_containers.LegolasDataSet
+            The dataset containing the eigenvalues.
+        idxs : np.ndarray
+            The indices of the eigenvalues.
+        kind : str
+            The kind of eigenfunctions, either ``"eigenfunctions"`` or
+            ``"derived_eigenfunctions"``.
+
+        Returns
+        -------
+        np.ndarray
+            Array containing the eigenfunctions, items are dictionaries. These are
+            shared with the cache and should not be modified.
+        """
+        if kind not in EIGENFUNCTION_KINDS:
+            raise ValueError(
+                f"unknown eigenfunction kind '{kind}', "
+                f"expected one of {list(EIGENFUNCTION_KINDS)}"
+            )
+        idxs = np.ravel(idxs).astype(int)
+        futures = [self._submit(ds, idx, kind) for idx in idxs]
+        eigenfunctions = np.array([{}] * len(futures), dtype=dict)
+        for i, (idx, future) in enumerate(zip(idxs, futures)):
+            # reads still waiting in the queue (or evicted from the cache) are done
+            # here instead of waiting for the prefetches submitted before them
+            if future.cancel() or future.cancelled():
+                future = self._read_now(ds, idx, kind)
+            eigenfunctions[i] = future.result()
+        return eigenfunctions
+
+    def _read_now(self, ds: LegolasDataSet, idx: int, kind: str) -> Future:
+        """Reads the eigenfunctions in the calling thread and caches the result."""
+        future = Future()
+        future.set_result(getattr(ds, f"get_{kind}")(ev_idxs=[int(idx)])[0])
+        with self._lock:
+            self._store((ds, int(idx), kind), future)
+        return future
+
+    def clear(self) -> None:
+        """Cancels pending reads and clears the cache."""
+        with self._lock:
+            for future in self._cache.values():
+                future.cancel()
+            self._cache.clear()
+
+    def shutdown(self) -> None:
+        """Clears the cache and stops the worker thread."""
+        self.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
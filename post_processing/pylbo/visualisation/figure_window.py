@@ -17,6 +17,16 @@ class FigureWindow:
     Class to handle the top-level creation of figure windows. Assigns unique figure
     ids and takes care of figure, axes, and gridspec management.
 
+    Windows are kept on the figure stack as long as their figure is open, this keeps
+    the interactive callbacks alive for figures that are still shown. Figures that
+    are closed through matplotlib are dropped from the stack. Batch code can cap the
+    number of windows on the stack by setting :attr:`max_figures`, the oldest ones
+    are then released when more windows are created. Use :meth:`release` or the
+    window as a context manager to close a figure explicitly once it is saved ::
+
+        with pylbo.plot_spectrum(ds) as p:
+            p.save("spectrum.png")
+
     Parameters
     ----------
     fig : ~matplotlib.figure.Figure
@@ -33,6 +43,9 @@ class FigureWindow:
     """
 
     figure_stack = dict()
+    #: the maximum number of windows on the figure stack, None (default) for no
+    #: limit, such that open figures are never closed implicitly
+    max_figures = None
 
     def __init__(self, fig: mpl_fig) -> None:
         self.fig = fig
@@ -41,11 +54,55 @@ class FigureWindow:
         self._figure_drawn = False
         self.add_to_stack()
 
+    def __enter__(self) -> FigureWindow:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
     @property
     def figure_ids(self) -> list[str]:
         """Returns the list of figure ids."""
+        self._prune_stack()
         return list(self.figure_stack.keys())
 
+    @property
+    def is_open(self) -> bool:
+        """
+        Returns `False` if the figure was closed through pyplot, figures that are
+        not managed by pyplot are always considered open.
+        """
+        number = getattr(self.fig, "number", None)
+        return number is None or plt.fignum_exists(number)
+
+    @classmethod
+    def _prune_stack(cls) -> None:
+        """
+        Removes windows with closed figures from the figure stack, and releases the
+        oldest windows if there are more than :attr:`max_figures`.
+        """
+        for figure_id, window in list(cls.figure_stack.items()):
+            if not window.is_open:
+                cls.figure_stack.pop(figure_id)
+        if cls.max_figures is None:
+            return
+        while len(cls.figure_stack) > max(cls.max_figures, 1):
+            oldest = next(iter(cls.figure_stack.values()))
+            pylboLogger.warning(
+                f"more than {cls.max_figures} figures open, "
+                f"releasing figure '{oldest.figure_id}'"
+            )
+            oldest.release()
+
+    def release(self) -> None:
+        """
+        Closes the figure and removes the window from the figure stack.
+        The window can no longer be used afterwards.
+        """
+        if self.figure_stack.get(self.figure_id) is self:
+            self.figure_stack.pop(self.figure_id)
+        plt.close(self.fig)
+
     def create_default_figure(
         self, figlabel: str, figsize: tuple[int, int]
     ) -> tuple[mpl_fig, mpl_axes]:
@@ -87,14 +144,22 @@ class FigureWindow:
             The unique figure id of the form "figure_type-x" where x is an integer.
         """
         # count occurences of this type of id in the list
-        occurences = sum(figlabel in fig_id for fig_id in self.figure_ids)
-        return f"{figlabel}-{1 + occurences}"
+        figure_ids = self.figure_ids
+        occurences = sum(figlabel in fig_id for fig_id in figure_ids)
+        figure_id = f"{figlabel}-{1 + occurences}"
+        # released figures leave gaps, skip ids that are still in use
+        while figure_id in figure_ids or plt.fignum_exists(figure_id):
+            occurences += 1
+            figure_id = f"{figlabel}-{1 + occurences}"
+        return figure_id
 
     def add_to_stack(self) -> None:
         """
-        Adds the figure to the stack.
+        Adds the figure to the stack, windows that are closed or exceed the
+        maximum number of figures are removed from it.
         """
         self.figure_stack[self.figure_id] = self
+        self._prune_stack()
 
     def add_subplot_axes(
         self,
@@ -207,6 +272,11 @@ class InteractiveFigureWindow(FigureWindow):
         self.disconnect_callbacks()
         super().redraw()
 
+    def release(self) -> None:
+        self.disconnect_callbacks()
+        self._mpl_callbacks.clear()
+        super().release()
+
     def connect_callbacks(self) -> None:
         """Connects all callbacks to the canvas"""
         for callback in self._mpl_callbacks:
@@ -1,18 +1,158 @@
+from __future__ import annotations
+
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.collections import LineCollection
 from matplotlib.colors import LogNorm
 from mpl_toolkits.axes_grid1 import make_axes_locatable
+from pylbo.utilities.logger import pylboLogger
 from pylbo.visualisation.figure_window import FigureWindow
 
 
+class SparseMatrixRaster:
+    """
+    Draws the nonzero elements of a sparse matrix as an image instead of a marker
+    per element. The elements in view are binned on a grid with at most one bin per
+    pixel of the axes, where every bin shows the maximum modulus of the elements
+    inside it. Once zoomed in far enough for a single matrix element to cover
+    multiple pixels, every bin corresponds to exactly one matrix element. The image
+    is recomputed whenever the axis limits change or the canvas is resized.
+
+    Parameters
+    ----------
+    ax : ~matplotlib.axes.Axes
+        The axes on which the matrix is drawn, with its limits already set.
+    rows : np.ndarray
+        The row indices of the nonzero elements.
+    cols : np.ndarray
+        The column indices of the nonzero elements.
+    vals : np.ndarray
+        The values of the nonzero elements.
+    cmap : str
+        The colormap of the image.
+
+    Attributes
+    ----------
+    image : ~matplotlib.image.AxesImage
+        The image showing the matrix.
+    """
+
+    def __init__(
+        self,
+        ax: Axes,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        vals: np.ndarray,
+        cmap: str = "plasma",
+    ) -> None:
+        self.ax = ax
+        self._rows = np.asarray(rows, dtype=int)
+        self._cols = np.asarray(cols, dtype=int)
+        self._vals = np.absolute(vals)
+        self._view_key = None
+        self.bin_size = (1, 1)
+
+        nonzero = self._vals[self._vals > 0]
+        vmin, vmax = (np.min(nonzero), np.max(nonzero)) if nonzero.size else (1, 10)
+        # limits are fixed by the figure, the image should not autoscale them
+        ax.set_autoscale_on(False)
+        self.image = ax.imshow(
+            np.ma.masked_all((1, 1)),
+            cmap=cmap,
+            norm=LogNorm(vmin=vmin, vmax=vmax),
+            origin="lower",
+            interpolation="nearest",
+            aspect=ax.get_aspect(),
+        )
+        ax.callbacks.connect("xlim_changed", self.update)
+        ax.callbacks.connect("ylim_changed", self.update)
+        ax.figure.canvas.mpl_connect("resize_event", self.update)
+        self.update()
+
+    def update(self, *args) -> None:
+        """
+        Recomputes the image for the current view. Does nothing if the view did not
+        change since the previous call.
+        """
+        key = (self.ax.get_xlim(), self.ax.get_ylim(), tuple(self.ax.bbox.bounds))
+        if key == self._view_key:
+            return
+        self._view_key = key
+        data, extent = self._get_image()
+        self.image.set_data(data)
+        self.image.set_extent(extent)
+
+    def _get_image(self) -> tuple[np.ma.MaskedArray, tuple]:
+        """
+        Bins the elements in view.
+
+        Returns
+        -------
+        data : np.ma.MaskedArray
+            The maximum modulus in every bin, masked where there are no elements.
+        extent : tuple
+            The extent of the image in data coordinates.
+        """
+        # elements are centered on integer coordinates, the bins are aligned with
+        # the element boundaries and contain an integer number of elements
+        xmin, xmax = sorted(self.ax.get_xlim())
+        ymin, ymax = sorted(self.ax.get_ylim())
+        col0, col1 = int(np.floor(xmin + 0.5)), int(np.ceil(xmax - 0.5))
+        row0, row1 = int(np.floor(ymin + 0.5)), int(np.ceil(ymax - 0.5))
+        ncols, nrows = max(col1 - col0 + 1, 1), max(row1 - row0 + 1, 1)
+        _, _, width, height = self.ax.bbox.bounds
+        sx = max(1, int(np.ceil(ncols / max(width, 1))))
+        sy = max(1, int(np.ceil(nrows / max(height, 1))))
+        nx, ny = -(-ncols // sx), -(-nrows // sy)
+        self.bin_size = (sx, sy)
+
+        rows, cols = self._rows, self._cols
+        (idxs,) = np.where(
+            (cols >= col0) & (cols <= col1) & (rows >= row0) & (rows <= row1)
+        )
+        bins = ((rows[idxs] - row0) // sy) * nx + (cols[idxs] - col0) // sx
+        vals = self._vals[idxs]
+        data = np.zeros(nx * ny)
+        np.maximum.at(data, bins, vals)
+        data = np.ma.masked_equal(data.reshape(ny, nx), 0)
+        extent = (
+            col0 - 0.5,
+            col0 - 0.5 + nx * sx,
+            row0 - 0.5,
+            row0 - 0.5 + ny * sy,
+        )
+        return data, extent
+
+
 class MatrixFigure(FigureWindow):
-    """Figure showing both matrices from a dataset."""
+    """
+    Figure showing both matrices from a dataset.
+
+    Parameters
+    ----------
+    dataset : ~pylbo.data_containers.LegolasDataSet
+        The dataset containing the matrices.
+    figsize : tuple[int, int]
+        The size of the figure.
+    raster : bool
+        If `True`, the matrices are drawn as images using :class:`SparseMatrixRaster`
+        instead of a marker per nonzero element. If None (default), the images are
+        used for matrices larger than :attr:`raster_threshold`.
+    """
 
-    def __init__(self, dataset, figsize, **kwargs):
+    #: the matrix dimension from which on matrices are drawn as images by default
+    raster_threshold = 1000
+
+    def __init__(self, dataset, figsize, raster=None, **kwargs):
         fig, ax = super().create_default_figure(figlabel="matrices", figsize=figsize)
         super().__init__(fig)
         self.dataset = dataset
         self.kwargs = kwargs
+        if raster is None:
+            raster = dataset.header["dims"]["dim_matrix"] > self.raster_threshold
+        self.raster = raster
+        self.rasters = []
 
         self.ax = ax
         self.ax2 = super().add_subplot_axes(self.ax, loc="right")
@@ -20,41 +160,12 @@ class MatrixFigure(FigureWindow):
 
     def draw(self):
         """Draws the matrices."""
-        # matrix A
-        rows, cols, vals = self.dataset.get_matrix_A()
-        # take modulus of values
-        vals = np.absolute(vals)
-        im = self.ax.scatter(cols, rows, c=vals, s=6, cmap="plasma", norm=LogNorm())
-        self.ax.set_title("Matrix A (modulus)")
-        divider = make_axes_locatable(self.ax)
-        cax = divider.append_axes("right", size="5%", pad=0.05)
-        plt.colorbar(im, cax=cax)
-
-        # matrix B
-        rows, cols, vals = self.dataset.get_matrix_B()
-        im = self.ax2.scatter(cols, rows, c=vals, s=6, cmap="plasma", norm=LogNorm())
-        self.ax2.set_title("Matrix B")
-        divider = make_axes_locatable(self.ax2)
-        cax = divider.append_axes("right", size="5%", pad=0.05)
-        plt.colorbar(im, cax=cax)
-        self.fig.canvas.draw()
-
-        dim_subblock = self.dataset.header["dims"]["dim_subblock"]
-        dim_quadblock = self.dataset.header["dims"]["dim_quadblock"]
         dim_matrix = self.dataset.header["dims"]["dim_matrix"]
-
         for ax in (self.ax, self.ax2):
-            maingrid_ticks = np.arange(
-                0.5, dim_matrix + dim_subblock + 0.5, dim_subblock
+            self._add_block_grid(ax)
+            visualticks = np.arange(
+                0, dim_matrix + 0.1, self.dataset.header["dims"]["dim_quadblock"]
             )
-            for i in maingrid_ticks:
-                ax.vlines(x=i, color="grey", alpha=0.6, ymin=0.5, ymax=dim_matrix + 0.5)
-                ax.hlines(y=i, color="grey", alpha=0.6, xmin=0.5, xmax=dim_matrix + 0.5)
-            minorgrid_ticks = np.arange(0.5, dim_matrix + 0.5, 2)
-            for i in minorgrid_ticks:
-                ax.vlines(x=i, color="grey", alpha=0.1, ymin=0.5, ymax=dim_matrix + 0.5)
-                ax.hlines(y=i, color="grey", alpha=0.1, xmin=0.5, xmax=dim_matrix + 0.5)
-            visualticks = np.arange(0, dim_matrix + 0.1, dim_quadblock)
             ax.set_xticks(visualticks)
             ax.set_yticks(visualticks)
             ax.set_xlim(0, dim_matrix + 1)
@@ -62,3 +173,77 @@ class MatrixFigure(FigureWindow):
             ax.tick_params(which="both", labelsize=13)
             ax.set_aspect("equal")
             ax.invert_yaxis()
+
+        # matrix A, take modulus of values
+        self._add_matrix(self.ax, *self.dataset.get_matrix_A(), modulus=True)
+        self.ax.set_title("Matrix A (modulus)")
+        # matrix B
+        self._add_matrix(self.ax2, *self.dataset.get_matrix_B())
+        self.ax2.set_title("Matrix B")
+        self.fig.canvas.draw()
+
+    def _add_matrix(self, ax, rows, cols, vals, modulus=False):
+        """
+        Draws the nonzero elements of a matrix, together with a colorbar.
+
+        Parameters
+        ----------
+        ax : ~matplotlib.axes.Axes
+            The axes to draw on.
+        rows : np.ndarray
+            The row indices of the nonzero elements.
+        cols : np.ndarray
+            The column indices of the nonzero elements.
+        vals : np.ndarray
+            The values of the nonzero elements.
+        modulus : bool
+            Whether to take the modulus of the values, only used when drawing the
+            elements as markers. Images always show the modulus.
+        """
+        if self.raster:
+            raster = SparseMatrixRaster(ax, rows, cols, vals)
+            self.rasters.append(raster)
+            im = raster.image
+            pylboLogger.debug(f"matrix with {len(vals)} nonzero elements rasterised")
+        else:
+            if modulus:
+                vals = np.absolute(vals)
+            im = ax.scatter(cols, rows, c=vals, s=6, cmap="plasma", norm=LogNorm())
+        divider = make_axes_locatable(ax)
+        cax = divider.append_axes("right", size="5%", pad=0.05)
+        plt.colorbar(im, cax=cax)
+
+    def _add_block_grid(self, ax):
+        """
+        Draws the grid separating the subblocks of the matrix, together with a
+        lighter grid every two rows and columns, as a single line collection.
+
+        Parameters
+        ----------
+        ax : ~matplotlib.axes.Axes
+            The axes to draw on.
+        """
+        dim_subblock = self.dataset.header["dims"]["dim_subblock"]
+        dim_matrix = self.dataset.header["dims"]["dim_matrix"]
+        segments = []
+        alphas = []
+        for ticks, alpha in (
+            (np.arange(0.5, dim_matrix + dim_subblock + 0.5, dim_subblock), 0.6),
+            (np.arange(0.5, dim_matrix + 0.5, 2), 0.1),
+        ):
+            start = np.full_like(ticks, 0.5)
+            end = np.full_like(ticks, dim_matrix + 0.5)
+            # vertical and horizontal lines, every segment has shape (2, 2)
+            for x0, y0, x1, y1 in (
+                (ticks, start, ticks, end),
+                (start, ticks, end, ticks),
+            ):
+                segments.append(
+                    np.stack([np.column_stack([x0, y0]), np.column_stack([x1, y1])], 1)
+                )
+                alphas.extend([alpha] * len(ticks))
+        segments = np.concatenate(segments)
+        colors = np.zeros((len(alphas), 4))
+        colors[:, :3] = 0.5
+        colors[:, 3] = alphas
+        ax.add_collection(LineCollection(segments, colors=colors), autolim=False)
@@ -3,13 +3,10 @@ from __future__ import annotations
 from typing import Union
 
 import numpy as np
-from matplotlib import animation
 from matplotlib.cm import ScalarMappable
-from pylbo.utilities.toolbox import transform_to_list
 from pylbo.visualisation.modes.mode_data import ModeVisualisationData
 from pylbo.visualisation.modes.mode_figure import ModeFigure
 from pylbo.visualisation.utils import add_axis_label
-from tqdm import tqdm
 
 
 class CartesianSlicePlot2D(ModeFigure):
@@ -53,7 +50,6 @@ class CartesianSlicePlot2D(ModeFigure):
         self.slicing_axis = self._validate_slicing_axis(
             slicing_axis, allowed_axes=[self._u2axis, self._u3axis]
         )
-        self.update_colorbar = True
         self._u1 = data.ds.ef_grid
         self._u2 = self._validate_u2(u2, slicing_axis, axis=self._u2axis)
         self._u3 = self._validate_u3(u3, slicing_axis, axis=self._u3axis)
@@ -188,11 +184,17 @@ class CartesianSlicePlot2D(ModeFigure):
         )
 
     def _draw_contours(self) -> None:
+        self._view = self._draw_contour_set()
+        self.cbar = self.fig.colorbar(
+            ScalarMappable(norm=self._view.norm, cmap=self._view.cmap), cax=self.cbar_ax
+        )
+
+    def _draw_contour_set(self):
         vertical = self.u2_data if self.slicing_axis == self._u3axis else self.u3_data
         additional_kwargs = {}
         if self._contour_levels is not None:
             additional_kwargs["levels"] = self._contour_levels
-        self._view = self._contour_recipe(
+        return self._contour_recipe(
             self.u1_data,
             vertical,
             self.solutions,
@@ -201,9 +203,6 @@ class CartesianSlicePlot2D(ModeFigure):
             **additional_kwargs,
             **self._kwargs,
         )
-        self.cbar = self.fig.colorbar(
-            ScalarMappable(norm=self._view.norm, cmap=self._view.cmap), cax=self.cbar_ax
-        )
 
     def get_view_ylabel(self) -> str:
         return (
@@ -212,38 +211,6 @@ class CartesianSlicePlot2D(ModeFigure):
             else self.data.ds.u3_str
         )
 
-    def create_animation(
-        self, times: np.ndarray, filename: str, fps: float = 10, dpi: int = 200
-    ) -> None:
-        writer = animation.FFMpegWriter(fps=fps)
-        pbar = tqdm(total=len(times), unit="frames", desc=f"Creating '{filename}'")
-        self.data._print_bg_info = False
-        self._ensure_first_frame_is_drawn()
-        initial_solution = self._solutions
-        with writer.saving(self.fig, filename, dpi=dpi):
-            for t in times:
-                solution = 0
-                for efdata in self.ef_data:
-                    solution += self.calculate_mode_solution(
-                        efdata, self.u2_data, self.u3_data, t
-                    )
-                if self.data.add_background:
-                    solution += self.data.get_background(shape=self._solutions.shape)
-                self._update_view(updated_solution=solution)
-                if self.update_colorbar:
-                    self._update_view_clims(solution)
-                else:
-                    self._update_view_clims(initial_solution)
-                self._set_t_txt(t)
-                writer.grab_frame()
-
-                pbar.update()
-        self._solutions = initial_solution
-
-    def _ensure_first_frame_is_drawn(self) -> None:
-        if None in transform_to_list(self._view):
-            self.draw()
-
     def _set_t_txt(self, t):
         if self.u2u3_txt is None:
             return
@@ -282,5 +249,8 @@ class CartesianSlicePlot2D(ModeFigure):
     def _update_contour_plot(self, updated_solution: np.ndarray) -> None:
         self._clear_contours()
         self._solutions = updated_solution
-        self.draw_solution()
-        self.add_axes_labels()
+        self._view = self._draw_contour_set()
+        # reuse the existing colorbar instead of stacking a new one on its axes
+        self.cbar.update_normal(
+            ScalarMappable(norm=self._view.norm, cmap=self._view.cmap)
+        )
@@ -96,21 +96,40 @@ class CartesianSlicePlot3D(CartesianSlicePlot2D):
     ) -> np.ndarray:
         solutions = np.zeros(shape=(*self.solution_shape, len(u3)))
         for i, z in enumerate(u3):
-            for efdata in self.ef_data:
-                solutions[..., i] += super().calculate_mode_solution(efdata, u2, z, t)
+            solutions[..., i] = super().calculate_mode_solution(efdata, u2, z, t)
         return solutions
 
     def draw_eigenfunction(self) -> None:
         pass
 
     def draw_solution(self) -> None:
+        self._view = self._draw_contour_set()
+        self.cbar = self.fig.colorbar(
+            ScalarMappable(norm=self._view[0].norm, cmap=self._view[0].cmap),
+            cax=self.cbar_ax,
+            orientation="horizontal",
+        )
+        self._set_view_limits()
+
+    def _draw_contour_set(self) -> list:
+        """
+        Draws the filled contours of the solution, one for every :math:`z` slice.
+
+        Returns
+        -------
+        list
+            The contour sets, one for every slice.
+        """
+        return self._draw_slice_contours(self.u1_data, self.u2_data)
+
+    def _draw_slice_contours(self, xdata: np.ndarray, ydata: np.ndarray) -> list:
         level_kwargs = {}
         if self._contour_levels is not None:
             level_kwargs["levels"] = self._contour_levels
-        for i, z in enumerate(self._u3):
-            self._view[i] = self._contour_recipe(
-                self.u1_data,
-                self.u2_data,
+        return [
+            self._contour_recipe(
+                xdata,
+                ydata,
                 self.solutions[..., i],
                 zdir="z",
                 offset=z,
@@ -120,11 +139,10 @@ class CartesianSlicePlot3D(CartesianSlicePlot2D):
                 **level_kwargs,
                 **self._kwargs,
             )
-        self.cbar = self.fig.colorbar(
-            ScalarMappable(norm=self._view[0].norm, cmap=self._view[0].cmap),
-            cax=self.cbar_ax,
-            orientation="horizontal",
-        )
+            for i, z in enumerate(self._u3)
+        ]
+
+    def _set_view_limits(self) -> None:
         self.ax.set_xlim(np.min(self._u1), np.max(self._u1))
         self.ax.set_ylim(np.min(self._u2), np.max(self._u2))
         self.ax.set_zlim(np.min(self._u3), np.max(self._u3))
@@ -153,11 +171,28 @@ class CartesianSlicePlot3D(CartesianSlicePlot2D):
                     pass
 
     def _update_view(self, updated_solution: np.ndarray) -> None:
-        super()._update_contour_plot(updated_solution)
+        """
+        Updates the view with a new solution. Filled contours can not be updated
+        in place, so only the contour sets are redrawn while the axes, labels and
+        colorbar are reused.
+
+        Parameters
+        ----------
+        updated_solution : np.ndarray
+            The new solution.
+        """
+        if self.update_colorbar:
+            self.vmin, self.vmax = np.min(updated_solution), np.max(updated_solution)
+        self._clear_contours()
+        self._solutions = updated_solution
+        self._view = self._draw_contour_set()
+        self.cbar.update_normal(
+            ScalarMappable(norm=self._view[0].norm, cmap=self._view[0].cmap)
+        )
 
     def _update_view_clims(self, solution: np.ndarray) -> None:
-        if self.update_colorbar:
-            self.vmin, self.vmax = np.min(solution), np.max(solution)
+        # limits are applied when the contours are redrawn in _update_view
+        pass
 
     def _set_t_txt(self, t):
         self.t_txt.set_text(f"t = {t:.2f}")
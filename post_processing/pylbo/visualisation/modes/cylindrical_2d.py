@@ -91,9 +91,9 @@ class CylindricalSlicePlot2D(CartesianSlicePlot2D):
             ScalarMappable(norm=self._view.norm, cmap=self._view.cmap), cax=self.cbar_ax
         )
 
-    def _draw_contours(self) -> None:
+    def _draw_contour_set(self):
         if self.slicing_axis == self._u2axis:
-            return super()._draw_contours()
+            return super()._draw_contour_set()
         additional_kwargs = {}
         if self._contour_levels is not None:
             additional_kwargs["levels"] = self._contour_levels
@@ -103,7 +103,7 @@ class CylindricalSlicePlot2D(CartesianSlicePlot2D):
         else:
             xdata = self.u1_data * np.cos(self.u2_data)
             ydata = self.u1_data * np.sin(self.u2_data)
-        self._view = self._contour_recipe(
+        return self._contour_recipe(
             xdata,
             ydata,
             self.solutions,
@@ -112,9 +112,6 @@ class CylindricalSlicePlot2D(CartesianSlicePlot2D):
             **additional_kwargs,
             **self._kwargs,
         )
-        self.cbar = self.fig.colorbar(
-            ScalarMappable(norm=self._view.norm, cmap=self._view.cmap), cax=self.cbar_ax
-        )
 
     def draw_eigenfunction(self) -> None:
         super().draw_eigenfunction()
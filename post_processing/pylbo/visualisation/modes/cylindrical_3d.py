@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import numpy as np
-from matplotlib.cm import ScalarMappable
 from pylbo.visualisation.modes.cartesian_3d import CartesianSlicePlot3D
 from pylbo.visualisation.modes.mode_data import ModeVisualisationData
 
@@ -67,28 +66,12 @@ class CylindricalSlicePlot3D(CartesianSlicePlot3D):
         self.u3_data = self._u3
         self.time_data = self._time
 
-    def draw_solution(self) -> None:
-        level_kwargs = {}
-        if self._contour_levels is not None:
-            level_kwargs["levels"] = self._contour_levels
-        for i, z in enumerate(self._u3):
-            self._view[i] = self._contour_recipe(
-                self.u1_data * np.cos(self.u2_data),
-                self.u1_data * np.sin(self.u2_data),
-                self.solutions[..., i],
-                zdir="z",
-                offset=z,
-                alpha=max(0.4, 1 - i * 0.1),
-                vmin=self.vmin,
-                vmax=self.vmax,
-                **level_kwargs,
-                **self._kwargs,
-            )
-        self.cbar = self.fig.colorbar(
-            ScalarMappable(norm=self._view[0].norm, cmap=self._view[0].cmap),
-            cax=self.cbar_ax,
-            orientation="horizontal",
+    def _draw_contour_set(self) -> list:
+        return self._draw_slice_contours(
+            self.u1_data * np.cos(self.u2_data), self.u1_data * np.sin(self.u2_data)
         )
+
+    def _set_view_limits(self) -> None:
         xmax = np.max(self._u1)
         self.ax.set_xlim(-xmax, xmax)
         self.ax.set_ylim(-xmax, xmax)
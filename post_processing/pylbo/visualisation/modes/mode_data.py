@@ -7,6 +7,7 @@ import numpy as np
 from pylbo.data_containers import LegolasDataSet
 from pylbo.exceptions import BackgroundNotPresent
 from pylbo.utilities.logger import pylboLogger
+from pylbo.utilities.toolbox import transform_to_numpy
 from pylbo.visualisation.utils import ef_name_to_latex, validate_ef_name
 
 
@@ -185,6 +186,130 @@ class ModeVisualisationData:
         )
         return getattr(solution, self.part_name)
 
+    def get_u1_factors(self, name: str = None) -> np.ndarray:
+        """
+        Returns the :math:`u_1`-dependent factor of the eigenmode solution for
+        every mode, i.e. the eigenfunctions multiplied with the complex factor.
+
+        Parameters
+        ----------
+        name : str
+            The name of the eigenfunction to use. If None, the eigenfunction name
+            of this object is used.
+
+        Returns
+        -------
+        np.ndarray
+            The complex factors :math:`c f_j(u_1)`, with :math:`c` the complex factor,
+            with shape ``(len(omega), len(u1))``. If :attr:`use_real_part` is False
+            the factors are multiplied with :math:`-i`, such that taking the real
+            part of the full solution yields the imaginary part.
+        """
+        name = self._ef_name if name is None else validate_ef_name(self.ds, name)
+        efs = np.array([all_efs.get(name) for all_efs in self._all_efs])
+        part_factor = 1 if self.use_real_part else -1j
+        return part_factor * self.complex_factor * efs
+
+    def get_u1_factor(self, t: float, name: str = None) -> np.ndarray:
+        """
+        Returns the :math:`u_1`-dependent factor of the eigenmode solution at a given
+        time, summed over all modes. Since all modes share the same wave numbers
+        this is the only factor that differs between modes, such that a
+        superposition of modes remains separable.
+
+        Parameters
+        ----------
+        t : float
+            The time at which to evaluate the factor.
+        name : str
+            The name of the eigenfunction to use. If None, the eigenfunction name
+            of this object is used.
+
+        Returns
+        -------
+        np.ndarray
+            The complex factor :math:`\\sum_j c f_j(u_1)\\exp(-i\\omega_j t)`,
+            see :meth:`get_u1_factors`.
+        """
+        omegas = np.array(
+            [all_efs.get("eigenvalue") for all_efs in self._all_efs], dtype=complex
+        )
+        return np.exp(-1j * omegas * t).dot(self.get_u1_factors(name=name))
+
+    def get_u2u3_factor(
+        self, u2: Union[float, np.ndarray], u3: Union[float, np.ndarray]
+    ) -> np.ndarray:
+        """
+        Returns the :math:`u_2-u_3` dependent factor of the eigenmode solution,
+        i.e. the outer product of :math:`\\exp(ik_2u_2)` and :math:`\\exp(ik_3u_3)`.
+
+        Parameters
+        ----------
+        u2 : Union[float, np.ndarray]
+            The 1D :math:`u_2` coordinate(s).
+        u3 : Union[float, np.ndarray]
+            The 1D :math:`u_3` coordinate(s).
+
+        Returns
+        -------
+        np.ndarray
+            The complex factor with shape ``(len(u2), len(u3))``.
+        """
+        return np.multiply.outer(
+            np.exp(1j * self.k2 * transform_to_numpy(u2)),
+            np.exp(1j * self.k3 * transform_to_numpy(u3)),
+        )
+
+    def get_separable_mode_solution(
+        self,
+        u2: Union[float, np.ndarray],
+        u3: Union[float, np.ndarray],
+        t: float,
+        name: str = None,
+        out: np.ndarray = None,
+    ) -> np.ndarray:
+        """
+        Calculates the eigenmode solution on the rectilinear grid spanned by the
+        eigenfunction grid and the 1D coordinate arrays `u2` and `u3`. Contrary to
+        :meth:`get_mode_solution` no full 3D coordinate meshes or complex temporaries
+        are created: the solution is factorised as
+        :math:`f(u_1)\\cdot g(u_2, u_3)`, after which the real part
+        :math:`\\Re(f)\\Re(g) - \\Im(f)\\Im(g)` is written directly into the output
+        array using a single matrix product.
+
+        Parameters
+        ----------
+        u2 : Union[float, np.ndarray]
+            The 1D :math:`u_2` coordinate(s).
+        u3 : Union[float, np.ndarray]
+            The 1D :math:`u_3` coordinate(s).
+        t : float
+            The time at which to evaluate the solution.
+        name : str
+            The name of the eigenfunction to use. If None, the eigenfunction name
+            of this object is used.
+        out : np.ndarray
+            Optional C-contiguous output array with shape ``(len(u1), len(u2),
+            len(u3))``. Its dtype determines the precision of the calculation.
+
+        Returns
+        -------
+        np.ndarray
+            The real or imaginary part of the (summed) eigenmode solution, with shape
+            ``(len(u1), len(u2), len(u3))``.
+        """
+        u1_factor = self.get_u1_factor(t, name=name)
+        u2u3_factor = self.get_u2u3_factor(u2, u3)
+        shape = (len(u1_factor), *u2u3_factor.shape)
+        if out is None:
+            out = np.empty(shape=shape, dtype=float)
+        if out.shape != shape or not out.flags.c_contiguous:
+            raise ValueError(f"output array must be C-contiguous with shape {shape}")
+        lhs = np.stack((u1_factor.real, -u1_factor.imag), axis=1).astype(out.dtype)
+        rhs = np.stack((u2u3_factor.real.ravel(), u2u3_factor.imag.ravel()))
+        np.matmul(lhs, rhs.astype(out.dtype), out=out.reshape(shape[0], -1))
+        return out
+
     def get_background(self, shape: tuple[int, ...], name=None) -> np.ndarray:
         """
         Returns the background of the eigenmode solution.
@@ -205,12 +330,31 @@ class ModeVisualisationData:
         """
         if name is None:
             name = self._get_background_name()
-        bg = self.ds.equilibria[name]
-        bg_sampled = self._sample_background_on_ef_grid(bg)
+        bg_sampled = self.get_sampled_background(name=name)
         if self._print_bg_info:
             pylboLogger.info(f"background {name} broadcasted to shape {shape}")
         return np.broadcast_to(bg_sampled, shape=reversed(shape)).transpose()
 
+    def get_sampled_background(self, name: str = None) -> np.ndarray:
+        """
+        Returns the background of the eigenmode solution, sampled on the
+        eigenfunction grid.
+
+        Parameters
+        ----------
+        name : str
+            The name of the background to use. If None, the background name
+            will be inferred from the eigenfunction name.
+
+        Returns
+        -------
+        np.ndarray
+            The 1D background array with eigenfunction grid spacing.
+        """
+        if name is None:
+            name = self._get_background_name()
+        return self._sample_background_on_ef_grid(self.ds.equilibria[name])
+
     def _sample_background_on_ef_grid(self, bg: np.ndarray) -> np.ndarray:
         """
         Samples the background array on the eigenfunction grid.
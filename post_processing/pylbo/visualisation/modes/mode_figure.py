@@ -1,15 +1,82 @@
 from __future__ import annotations
 
-from typing import Union
+import pickle
+import signal
+import subprocess
+import tempfile
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Callable, Iterator, Union
 
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib import animation
 from matplotlib.axes import Axes
 from matplotlib.figure import Figure
 from pylbo.utilities.logger import pylboLogger
+from pylbo.utilities.toolbox import transform_to_list, transform_to_numpy
 from pylbo.visualisation.figure_window import FigureWindow
 from pylbo.visualisation.modes.mode_data import ModeVisualisationData
+from pylbo.visualisation.modes.time_stepper import ModeTimeStepper
 from pylbo.visualisation.utils import add_axis_label, ensure_attr_set
+from tqdm import tqdm
+
+# figure used by the animation worker processes, set by the pool initializer
+_worker_figure = None
+
+
+def _init_animation_worker(figure: bytes) -> None:
+    """
+    Initializer for the animation worker processes. Every worker renders on its own
+    headless copy of the figure, rebuilt from the pickled parent figure.
+
+    Parameters
+    ----------
+    figure : bytes
+        The pickled figure.
+    """
+    global _worker_figure
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    plt.switch_backend("agg")
+    _worker_figure = pickle.loads(figure)
+
+
+def _write_animation_in_worker(
+    times: np.ndarray, filename: str, fps: float, dpi: int
+) -> int:
+    """
+    Renders a chunk of the animation in a worker process.
+
+    Returns
+    -------
+    int
+        The number of frames written.
+    """
+    _worker_figure._write_animation(times, filename, fps=fps, dpi=dpi)
+    return len(times)
+
+
+def _concatenate_movies(files: list[Path], filename: str) -> None:
+    """
+    Concatenates the given movie files into a single file with one ffmpeg call.
+    The streams are copied, so all files should be encoded with the same settings.
+
+    Parameters
+    ----------
+    files : list[Path]
+        The movie files, in order.
+    filename : str
+        The name of the concatenated movie.
+    """
+    listfile = files[0].parent / "concat.txt"
+    listfile.write_text("".join(f"file '{file.resolve()}'\n" for file in files))
+    cmd = [
+        animation.FFMpegWriter.bin_path(),
+        *("-y", "-loglevel", "error", "-f", "concat", "-safe", "0"),
+        *("-i", str(listfile), "-c", "copy", str(filename)),
+    ]
+    pylboLogger.debug(f"concatenating {len(files)} movies: {' '.join(cmd)}")
+    subprocess.run(cmd, check=True, capture_output=True)
 
 
 class ModeFigure(FigureWindow):
@@ -53,12 +120,16 @@ class ModeFigure(FigureWindow):
         The text for the :math:`u_2-u_3` label.
     t_txt: matplotlib.text.Text
         The text for the time label.
+    update_colorbar : bool
+        Whether the colorbar limits follow the solution during animations. If False,
+        the limits of the initial solution are used for every frame.
     """
 
     def __init__(
         self, figsize: tuple[int, int], data: ModeVisualisationData, show_ef_panel: bool
     ) -> None:
         self.cbar = None
+        self.update_colorbar = True
         self._cbar_hspace = 0.01
         self._show_ef_panel = show_ef_panel
         self._annotate = True
@@ -80,6 +151,8 @@ class ModeFigure(FigureWindow):
         self.data = data
         # stuff ploted on the view panel
         self._view = None
+        # engine used to time-step the solution in animations
+        self._time_stepper = None
         # textbox objects
         [setattr(self, f"{val}_txt", None) for val in ("omega", "k2k3", "u2u3", "t")]
         # data objects
@@ -190,6 +263,26 @@ class ModeFigure(FigureWindow):
             ef=efdata["ef"], omega=efdata["omega"], u2=u2, u3=u3, t=t
         )
 
+    def get_time_stepper(self) -> ModeTimeStepper:
+        """
+        Returns the time stepper for the eigenmode solution shown in this figure.
+        The stepper is created on first access and cached afterwards.
+
+        Returns
+        -------
+        ModeTimeStepper
+            The time stepper, evaluating the solution on the :math:`u_1-u_2-u_3`
+            grid of this figure.
+        """
+        if self._time_stepper is None:
+            self._time_stepper = ModeTimeStepper(
+                self.data,
+                u2=self._u2,
+                u3=self._u3,
+                add_background=self.data.add_background,
+            )
+        return self._time_stepper
+
     @property
     def ax(self) -> Axes:
         """
@@ -371,7 +464,12 @@ class ModeFigure(FigureWindow):
         return fig, {"eigfunc": ax1, "view": ax2}
 
     def create_animation(
-        self, times: np.ndarray, filename: str, fps: float = 10, dpi: int = 200
+        self,
+        times: np.ndarray,
+        filename: str,
+        fps: float = 10,
+        dpi: int = 200,
+        workers: int = 1,
     ) -> None:
         """
         Creates an animation of the eigenmode solution over a given time interval.
@@ -386,5 +484,181 @@ class ModeFigure(FigureWindow):
             The frames per second of the animation.
         dpi : int
             The resolution of the animation.
+        workers : int
+            The number of worker processes used to render the frames. If larger
+            than 1, the times are split in consecutive chunks which are rendered
+            in parallel on headless copies of this figure, after which the
+            partial movies are concatenated. Colorbar limits are determined from the
+            same initial solution in every worker, so these are consistent
+            across chunks.
+
+        Raises
+        ------
+        ValueError
+            If `workers` is not a positive integer.
         """
-        raise ValueError(f"{self.__class__.__name__} does not support animation.")
+        if not isinstance(workers, (int, np.integer)) or workers < 1:
+            raise ValueError(f"workers must be a positive integer, got {workers}")
+        times = transform_to_numpy(times)
+        self.data._print_bg_info = False
+        self._ensure_first_frame_is_drawn()
+        workers = min(workers, len(times))
+        pbar = tqdm(total=len(times), unit="frames", desc=f"Creating '{filename}'")
+        if workers > 1:
+            self._write_animation_in_parallel(
+                times, filename, fps=fps, dpi=dpi, workers=workers, pbar=pbar
+            )
+        else:
+            self._write_animation(
+                times, filename, fps=fps, dpi=dpi, callback=pbar.update
+            )
+        pbar.close()
+
+    def _write_animation(
+        self,
+        times: np.ndarray,
+        filename: str,
+        fps: float,
+        dpi: int,
+        callback: Callable = None,
+    ) -> None:
+        """
+        Writes the animation frames for the given times to a movie file.
+
+        Parameters
+        ----------
+        times : np.ndarray
+            The times at which to create the animation.
+        filename : str
+            The filename of the animation.
+        fps : float
+            The frames per second of the animation.
+        dpi : int
+            The resolution of the animation.
+        callback : Callable
+            Called without arguments after every frame.
+        """
+        writer = animation.FFMpegWriter(fps=fps)
+        initial_solution = self._solutions
+        with writer.saving(self.fig, filename, dpi=dpi):
+            for t, solution in self._iter_animation_frames(times):
+                self._update_view(updated_solution=solution)
+                if self.update_colorbar:
+                    self._update_view_clims(solution)
+                else:
+                    self._update_view_clims(initial_solution)
+                self._set_t_txt(t)
+                writer.grab_frame()
+                if callback is not None:
+                    callback()
+        self._solutions = initial_solution
+
+    def _write_animation_in_parallel(
+        self,
+        times: np.ndarray,
+        filename: str,
+        fps: float,
+        dpi: int,
+        workers: int,
+        pbar: tqdm,
+    ) -> None:
+        """
+        Splits the times over multiple worker processes, each writing a partial
+        movie, and concatenates the results.
+
+        Parameters
+        ----------
+        times : np.ndarray
+            The times at which to create the animation.
+        filename : str
+            The filename of the animation.
+        fps : float
+            The frames per second of the animation.
+        dpi : int
+            The resolution of the animation.
+        workers : int
+            The number of worker processes, at most the number of times.
+        pbar : tqdm
+            The progress bar, updated after every finished chunk.
+        """
+        # create the stepper here so the workers don't have to
+        self.get_time_stepper()
+        figure = pickle.dumps(self)
+        chunks = np.array_split(times, workers)
+        suffix = Path(filename).suffix
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = [Path(tmpdir) / f"chunk_{i:04d}{suffix}" for i in range(workers)]
+            with Pool(
+                processes=workers,
+                initializer=_init_animation_worker,
+                initargs=(figure,),
+            ) as pool:
+                results = [
+                    pool.apply_async(
+                        _write_animation_in_worker,
+                        args=(chunk, str(file), fps, dpi),
+                        callback=pbar.update,
+                    )
+                    for chunk, file in zip(chunks, files)
+                ]
+                [result.get() for result in results]
+            _concatenate_movies(files, filename)
+
+    def _ensure_first_frame_is_drawn(self) -> None:
+        if None in transform_to_list(self._view):
+            self.draw()
+
+    def _iter_animation_frames(
+        self, times: np.ndarray
+    ) -> Iterator[tuple[float, np.ndarray]]:
+        """
+        Iterates over the solutions shown in the animation frames, these are
+        evaluated in batches by the time stepper.
+
+        Parameters
+        ----------
+        times : np.ndarray
+            The times at which to create the animation.
+
+        Yields
+        ------
+        t : float
+            The current time.
+        solution : np.ndarray
+            The solution at time `t`, with the same shape as :attr:`solutions`.
+        """
+        for t, solution in self.get_time_stepper().iter_solutions(times):
+            yield t, solution.reshape(np.shape(self._solutions))
+
+    def _update_view(self, updated_solution: np.ndarray) -> None:
+        """
+        Updates the view with the solution of a new animation frame.
+
+        Parameters
+        ----------
+        updated_solution : np.ndarray
+            The new solution.
+        """
+        raise NotImplementedError()
+
+    def _update_view_clims(self, solution: np.ndarray) -> None:
+        """
+        Updates the colour limits of the view.
+
+        Parameters
+        ----------
+        solution : np.ndarray
+            The solution from which to take the limits.
+        """
+        raise NotImplementedError()
+
+    def _set_t_txt(self, t: float) -> None:
+        """
+        Updates the time label, if any.
+
+        Parameters
+        ----------
+        t : float
+            The current time.
+        """
+        pass
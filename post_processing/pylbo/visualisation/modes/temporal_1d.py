@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from typing import Iterator
+
 import numpy as np
 from matplotlib.cm import ScalarMappable
+from matplotlib.transforms import Affine2D
 from pylbo.visualisation.modes.mode_data import ModeVisualisationData
 from pylbo.visualisation.modes.mode_figure import ModeFigure
 
@@ -71,3 +74,59 @@ class TemporalEvolutionPlot1D(ModeFigure):
 
     def get_view_ylabel(self) -> str:
         return "time"
+
+    def _iter_animation_frames(
+        self, times: np.ndarray
+    ) -> Iterator[tuple[float, np.ndarray]]:
+        """
+        Iterates over the frames of the animation. Every frame shows the evolution
+        over a time window with the same length as the one of the figure, starting
+        at the current time.
+
+        Parameters
+        ----------
+        times : np.ndarray
+            The start times of the windows.
+
+        Yields
+        ------
+        t : float
+            The current time.
+        solution : np.ndarray
+            The solution over the window starting at `t`, with the same shape as
+            :attr:`solutions`.
+        """
+        stepper = self.get_time_stepper()
+        window = self._time - self._time[0]
+        for t in times:
+            solution = stepper.get_solutions(t + window)
+            yield t, solution.reshape(len(window), -1).transpose()
+
+    def _update_view(self, updated_solution: np.ndarray) -> None:
+        """
+        Updates the values of the mesh in place.
+
+        Parameters
+        ----------
+        updated_solution : np.ndarray
+            The new solution.
+        """
+        self._solutions = updated_solution
+        self._view.set_array(updated_solution.ravel())
+
+    def _update_view_clims(self, solution: np.ndarray) -> None:
+        self._view.set_clim(np.min(solution), np.max(solution))
+
+    def _set_t_txt(self, t: float) -> None:
+        """
+        The time axis acts as time label, so the mesh and axis limits are shifted
+        to the window starting at `t`.
+
+        Parameters
+        ----------
+        t : float
+            The current time.
+        """
+        shift = t - self._time[0]
+        self._view.set_transform(Affine2D().translate(0, shift) + self.ax.transData)
+        self.ax.set_ylim(self._time[0] + shift, self._time[-1] + shift)
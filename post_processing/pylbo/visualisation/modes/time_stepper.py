@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from typing import Iterator, Union
+
+import numpy as np
+from pylbo.utilities.logger import pylboLogger
+from pylbo.utilities.toolbox import transform_to_numpy
+from pylbo.visualisation.modes.mode_data import ModeVisualisationData
+from pylbo.visualisation.utils import validate_ef_name
+
+
+class ModeTimeStepper:
+    """
+    Time-stepping engine for eigenmode solutions on a rectilinear
+    :math:`(u_1, u_2, u_3)` grid. Since only the factor
+    :math:`\\exp(-i\\omega t)` of every mode depends on time, the spatial part of
+    each mode is calculated only once and every time step reduces to a weighted sum.
+    The spatial fields are cached in factorised form, i.e. the (complex)
+    eigenfunction of every mode and the :math:`u_2-u_3` phase plane shared by all
+    modes, together with the sampled background. A batch of time steps is then
+    evaluated with a single matrix product.
+
+    Parameters
+    ----------
+    data : ModeVisualisationData
+        The data for the visualisation.
+    u2 : float or np.ndarray
+        The 1D :math:`u_2` coordinate(s).
+    u3 : float or np.ndarray
+        The 1D :math:`u_3` coordinate(s).
+    name : str
+        The name of the eigenfunction. If None, the eigenfunction name of `data`
+        is used.
+    add_background : bool
+        Whether to add the equilibrium background to the solution.
+    bg_name : str
+        The name of the background to add. If None, the background name is inferred
+        from the eigenfunction name.
+
+    Attributes
+    ----------
+    data : ModeVisualisationData
+        The data for the visualisation.
+    shape : tuple[int, int, int]
+        The spatial shape of a single solution, ``(len(u1), len(u2), len(u3))``.
+    """
+
+    #: the maximum number of elements in a batch of solutions, 2**24 doubles = 128 MB
+    max_batch_elements = 2**24
+
+    def __init__(
+        self,
+        data: ModeVisualisationData,
+        u2: Union[float, np.ndarray],
+        u3: Union[float, np.ndarray],
+        name: str = None,
+        add_background: bool = False,
+        bg_name: str = None,
+    ) -> None:
+        self.data = data
+        if name is not None:
+            name = validate_ef_name(data.ds, name)
+        self._name = data._ef_name if name is None else name
+
+        self._omegas = np.array(
+            [all_efs.get("eigenvalue") for all_efs in data._all_efs], dtype=complex
+        )
+        # per-mode u1 factors, shape (nb_modes, len(u1))
+        self._u1_factors = data.get_u1_factors(name=self._name)
+        u2u3_factor = data.get_u2u3_factor(u2, u3)
+        self.shape = (self._u1_factors.shape[1], *u2u3_factor.shape)
+
+        rows = [u2u3_factor.real.ravel(), u2u3_factor.imag.ravel()]
+        self._background = None
+        if add_background:
+            self._background = data.get_sampled_background(name=bg_name)
+            rows.append(np.ones_like(rows[0]))
+        self._rhs = np.stack(rows)
+        pylboLogger.debug(
+            f"time stepper for '{self._name}' created, {len(self._omegas)} mode(s) on "
+            f"grid of shape {self.shape}"
+        )
+
+    @property
+    def size(self) -> int:
+        """The number of grid points of a single solution."""
+        return int(np.prod(self.shape))
+
+    def get_batch_size(self, nb_fields: int = 1) -> int:
+        """
+        Returns the number of time steps in a single batch, such that
+        `nb_fields` batches of solutions stay below :attr:`max_batch_elements`.
+
+        Parameters
+        ----------
+        nb_fields : int
+            The number of fields that are kept in memory simultaneously.
+
+        Returns
+        -------
+        int
+            The batch size, at least 1.
+        """
+        return max(1, self.max_batch_elements // (nb_fields * self.size))
+
+    def get_solutions(
+        self, times: Union[float, np.ndarray], dtype: str = "float64", out=None
+    ) -> np.ndarray:
+        """
+        Calculates the solution for a batch of times.
+
+        Parameters
+        ----------
+        times : float or np.ndarray
+            The time(s) at which to calculate the solution.
+        dtype : str
+            The dtype of the solutions, ignored if `out` is given.
+        out : np.ndarray
+            Optional C-contiguous output array with shape ``(len(times), *shape)``.
+
+        Returns
+        -------
+        np.ndarray
+            The solutions, with shape ``(len(times), len(u1), len(u2), len(u3))``.
+        """
+        times = transform_to_numpy(times)
+        shape = (len(times), *self.shape)
+        if out is None:
+            out = np.empty(shape=shape, dtype=dtype)
+        if out.shape != shape or not out.flags.c_contiguous:
+            raise ValueError(f"output array must be C-contiguous with shape {shape}")
+        # u1 factors for every time, shape (len(times), len(u1))
+        u1_factors = np.exp(-1j * np.multiply.outer(times, self._omegas)).dot(
+            self._u1_factors
+        )
+        columns = [u1_factors.real, -u1_factors.imag]
+        if self._background is not None:
+            columns.append(np.broadcast_to(self._background, u1_factors.shape))
+        lhs = np.stack(columns, axis=-1).reshape(-1, len(columns))
+        np.matmul(
+            lhs.astype(out.dtype, copy=False),
+            self._rhs.astype(out.dtype, copy=False),
+            out=out.reshape(lhs.shape[0], -1),
+        )
+        return out
+
+    def iter_solutions(
+        self,
+        times: Union[float, np.ndarray],
+        batch_size: int = None,
+        dtype: str = "float64",
+    ) -> Iterator[tuple[float, np.ndarray]]:
+        """
+        Iterates over the solutions at the given times, these are calculated in
+        batches.
+
+        Parameters
+        ----------
+        times : float or np.ndarray
+            The time(s) at which to calculate the solution.
+        batch_size : int
+            The number of time steps per batch. If None, this is determined by
+            :meth:`get_batch_size`.
+        dtype : str
+            The dtype of the solutions.
+
+        Yields
+        ------
+        t : float
+            The current time.
+        solution : np.ndarray
+            The solution at time `t`, with shape :attr:`shape`. This is a view into
+            the current batch, copy it if it should outlive the iteration step.
+        """
+        times = transform_to_numpy(times)
+        if batch_size is None:
+            batch_size = self.get_batch_size()
+        for start in range(0, len(times), batch_size):
+            batch = times[start : start + batch_size]
+            solutions = self.get_solutions(batch, dtype=dtype)
+            yield from zip(batch, solutions)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-import struct
+import multiprocessing
+import signal
+import zlib
 from pathlib import Path
 from typing import Union
 
@@ -8,9 +10,41 @@ import numpy as np
 from pylbo.utilities.logger import pylboLogger
 from pylbo.utilities.toolbox import transform_to_list, transform_to_numpy
 from pylbo.visualisation.modes.mode_data import ModeVisualisationData
+from pylbo.visualisation.modes.time_stepper import ModeTimeStepper
 from pylbo.visualisation.utils import validate_ef_name
 from tqdm import tqdm
 
+try:
+    import h5py
+except ModuleNotFoundError:  # optional dependency, only needed for HDF5 export
+    h5py = None
+
+# exporter used by the worker processes of the XML VTK export
+_worker_exporter = None
+
+
+def _init_vts_worker(exporter: VTKDataExporter) -> None:
+    """
+    Worker initialisation for the multiprocessing pool of the XML VTK export.
+
+    Parameters
+    ----------
+    exporter : VTKDataExporter
+        The exporter to use in this worker process.
+    """
+    global _worker_exporter
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_exporter = exporter
+    _worker_exporter.data._print_bg_info = False
+
+
+def _write_vts_batch_in_worker(*args) -> list[Path]:
+    """
+    Worker activation for the multiprocessing pool of the XML VTK export, see
+    :meth:`VTKDataExporter._write_vts_batch`.
+    """
+    return _worker_exporter._write_vts_batch(*args)
+
 
 class VTKDataExporter:
     """
@@ -48,7 +82,10 @@ class VTKDataExporter:
     _vtk_byte_order : str
         The VTK byte order, defaults to ">" (big endian).
     _vtk_fmt : str
-        The VTK data format, defaults to ">f".
+        The Numpy data format used to write VTK data, defaults to ">f4".
+    _vts_fmt : str
+        The Numpy data format used to write XML VTK and HDF5 data, defaults to "<f4"
+        (little endian).
     """
 
     def __init__(
@@ -64,6 +101,11 @@ class VTKDataExporter:
         self._vtk_byte_order = ">"  # big endian
         self._vtk_fmt = None
         self._pbar = None
+        self._time_steppers = {}
+        self._coordinate_bytes = {}
+        self._vts_fmt = None
+        self._vts_blocksize = 2**20
+        self._vts_coordinate_bytes = {}
 
         self.dims = None
         for i in "123":
@@ -88,8 +130,11 @@ class VTKDataExporter:
         self._u2 = u2
         self._u3 = u3
         self.dims = (len(u1), len(u2), len(u3))
-        self.u1_data, self.u2_data, self.u3_data = np.meshgrid(
-            self._u1, self._u2, self._u3, indexing="ij"
+        self._coordinate_bytes = {}
+        self._vts_coordinate_bytes = {}
+        # sparse meshes broadcasted to read-only views, these take no extra memory
+        self.u1_data, self.u2_data, self.u3_data = np.broadcast_arrays(
+            *np.meshgrid(self._u1, self._u2, self._u3, indexing="ij", sparse=True)
         )
 
     def get_coordinate_data(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -125,9 +170,13 @@ class VTKDataExporter:
         """
         return np.broadcast_to(array, shape=reversed(self.dims)).transpose()
 
-    def get_solution(self, name: str, time: float) -> np.ndarray:
+    def get_solution(
+        self, name: str, time: float, out: np.ndarray = None
+    ) -> np.ndarray:
         """
-        Returns the eigenmode solution for a given time.
+        Returns the eigenmode solution for a given time. The solution is evaluated
+        in separable form, see
+        :meth:`~pylbo.visualisation.modes.mode_data.ModeVisualisationData.get_separable_mode_solution`.
 
         Parameters
         ----------
@@ -135,6 +184,9 @@ class VTKDataExporter:
             The name of the eigenfunction.
         time : float
             The time at which to get the solution.
+        out : np.ndarray
+            Optional preallocated array with shape :attr:`dims` to store the
+            solution in.
 
         Returns
         -------
@@ -142,16 +194,32 @@ class VTKDataExporter:
             The eigenmode solution.
         """
         name = validate_ef_name(self.data.ds, name)
-        solution = 0
-        for all_efs in self.data._all_efs:
-            solution += self.data.get_mode_solution(
-                ef=self.broadcast_to_3d(all_efs.get(name)),
-                omega=all_efs.get("eigenvalue"),
-                u2=self.u2_data,
-                u3=self.u3_data,
-                t=time,
+        return self.data.get_separable_mode_solution(
+            u2=self._u2, u3=self._u3, t=time, name=name, out=out
+        )
+
+    def get_time_stepper(self, name: str) -> ModeTimeStepper:
+        """
+        Returns the time stepper for a given eigenfunction on the VTK grid. Time
+        steppers are cached, such that the spatial part of the solution is calculated
+        only once for every eigenfunction.
+
+        Parameters
+        ----------
+        name : str
+            The name of the eigenfunction.
+
+        Returns
+        -------
+        ModeTimeStepper
+            The time stepper for the given eigenfunction.
+        """
+        name = validate_ef_name(self.data.ds, name)
+        if name not in self._time_steppers:
+            self._time_steppers[name] = ModeTimeStepper(
+                self.data, u2=self._u2, u3=self._u3, name=name
             )
-        return solution
+        return self._time_steppers[name]
 
     def _log_info(self, msg: str) -> None:
         """
@@ -177,10 +245,12 @@ class VTKDataExporter:
         """
         if dtype == "float32":
             self._vtk_dtype = "float"
-            self._vtk_fmt = f"{self._vtk_byte_order}f"
+            self._vtk_fmt = f"{self._vtk_byte_order}f4"
+            self._vts_fmt = "<f4"
         elif dtype == "float64":
             self._vtk_dtype = "double"
-            self._vtk_fmt = f"{self._vtk_byte_order}d"
+            self._vtk_fmt = f"{self._vtk_byte_order}f8"
+            self._vts_fmt = "<f8"
         else:
             raise ValueError(f"dtype {dtype} not supported.")
 
@@ -204,6 +274,25 @@ class VTKDataExporter:
             ostream.write(f"DIMENSIONS {self.dims[0]} {self.dims[1]} {self.dims[2]} \n")
             ostream.write(f"POINTS {np.prod(self.dims)} {self._vtk_dtype} \n")
 
+    def _get_vtk_coordinate_bytes(self) -> bytes:
+        """
+        Returns the VTK grid coordinates as raw bytes in the current VTK data format.
+        Points are interleaved as (x, y, z) triplets, with the first index varying
+        fastest. The result is cached since the grid is identical for every
+        time step.
+
+        Returns
+        -------
+        bytes
+            The coordinate data block.
+        """
+        if self._vtk_fmt not in self._coordinate_bytes:
+            coords = np.stack(self.get_coordinate_data(), axis=-1)
+            self._coordinate_bytes[self._vtk_fmt] = (
+                coords.transpose(2, 1, 0, 3).astype(self._vtk_fmt).tobytes()
+            )
+        return self._coordinate_bytes[self._vtk_fmt]
+
     def _write_vtk_coordinate_data(self, vtkfile):
         """
         Writes the VTK grid coordinates.
@@ -214,14 +303,8 @@ class VTKDataExporter:
             The name of the VTK file to write to.
         """
         self._log_info("writing VTK coordinate data...")
-        u1_data, u2_data, u3_data = self.get_coordinate_data()
         with open(vtkfile, "ab") as ostream:
-            for k in range(self.dims[2]):
-                for j in range(self.dims[1]):
-                    for i in range(self.dims[0]):
-                        ostream.write(struct.pack(self._vtk_fmt, u1_data[i, j, k]))
-                        ostream.write(struct.pack(self._vtk_fmt, u2_data[i, j, k]))
-                        ostream.write(struct.pack(self._vtk_fmt, u3_data[i, j, k]))
+            ostream.write(self._get_vtk_coordinate_bytes())
 
     def _write_vtk_point_data_start(self, vtkfile):
         """
@@ -250,7 +333,7 @@ class VTKDataExporter:
         fielddata : ndarray
             The field data.
         """
-        if np.all(np.isclose(fielddata, 0, atol=1e-12)):
+        if np.max(np.abs(fielddata)) <= 1e-12:
             pylboLogger.warning(
                 f"field {fieldname} is zero everywhere and thus not written to VTK."
             )
@@ -262,23 +345,34 @@ class VTKDataExporter:
             ostream.write(f"SCALARS {fieldname} {self._vtk_dtype} \n")
             ostream.write("LOOKUP_TABLE default \n")
         with open(vtkfile, "ab") as ostream:
-            for k in range(self.dims[2]):
-                for j in range(self.dims[1]):
-                    for i in range(self.dims[0]):
-                        ostream.write(struct.pack(self._vtk_fmt, fielddata[i, j, k]))
+            # VTK expects the first index to vary fastest, i.e. Fortran ordering
+            ostream.write(fielddata.astype(self._vtk_fmt).tobytes(order="F"))
 
-    def _write_vtk_auxiliary_coordinates(self, vtkfile):
+    def get_auxiliary_coordinate_data(self) -> dict[str, np.ndarray]:
         """
-        Writes auxiliary coordinate data to the VTK file, for example the theta values
-        in cylindrical geometry. These are needed for appropriate transformations
+        Returns auxiliary coordinate data, for example the theta values in
+        cylindrical geometry. These are needed for appropriate transformations
         to draw vector fields in e.g. ParaView.
 
+        Returns
+        -------
+        dict[str, np.ndarray]
+            The auxiliary coordinate data, with the field names as keys.
+        """
+        return {}
+
+    def _write_vtk_auxiliary_coordinates(self, vtkfile):
+        """
+        Writes auxiliary coordinate data to the VTK file, see
+        :meth:`get_auxiliary_coordinate_data`.
+
         Parameters
         ----------
         vtkfile : str
             The name of the VTK file to write to.
         """
-        pass
+        for fieldname, fielddata in self.get_auxiliary_coordinate_data().items():
+            self._write_vtk_scalar_field(vtkfile, fieldname, fielddata)
 
     def export_to_vtk(
         self,
@@ -317,22 +411,532 @@ class VTKDataExporter:
         if len(time) > 1:
             self._pbar = tqdm(total=len(time), desc="writing VTK files", unit="file")
             self.data._print_bg_info = False
-        for it, t in enumerate(time, start=starting_index):
-            vtkfile = Path(f"{filename}_t{it:04d}.vtk")
-            self._write_vtk_header(vtkfile)
-            self._write_vtk_coordinate_data(vtkfile)
-            self._write_vtk_point_data_start(vtkfile)
-            self._log_info("writing VTK scalar field data...")
+        steppers = [self.get_time_stepper(name) for name in names]
+        backgrounds = [
+            self.data.get_background(shape=self.dims, name=bg_name)
+            for bg_name in bg_names
+        ]
+        batch_size = 1
+        if steppers:
+            batch_size = steppers[0].get_batch_size(nb_fields=len(steppers))
+        for start in range(0, len(time), batch_size):
+            batch = time[start : start + batch_size]
+            solutions = [
+                stepper.get_solutions(batch, dtype=dtype) for stepper in steppers
+            ]
+            for ib in range(len(batch)):
+                it = start + ib + starting_index
+                vtkfile = Path(f"{filename}_t{it:04d}.vtk")
+                self._write_vtk_header(vtkfile)
+                self._write_vtk_coordinate_data(vtkfile)
+                self._write_vtk_point_data_start(vtkfile)
+                self._log_info("writing VTK scalar field data...")
+                for name, solution in zip(names, solutions):
+                    self._write_vtk_scalar_field(vtkfile, name, solution[ib])
+                for bg_name, bg in zip(bg_names, backgrounds):
+                    self._write_vtk_scalar_field(vtkfile, bg_name, bg)
+                self._write_vtk_auxiliary_coordinates(vtkfile)
+                if self._pbar is not None:
+                    self._pbar.update()
+                self._log_info(f"done. File exported to {vtkfile.resolve()}")
+
+    def _encode_vts_data(self, array: np.ndarray, compression: str) -> bytes:
+        """
+        Encodes an array as a binary block for the appended data section of an XML
+        VTK file, i.e. a UInt64 header followed by the (compressed) data. The array
+        is written with the first index varying fastest.
+
+        Parameters
+        ----------
+        array : np.ndarray
+            The array to encode, already in the VTK data format.
+        compression : str
+            The compression to use, either None (raw data) or "zlib".
+
+        Returns
+        -------
+        bytes
+            The encoded data block.
+        """
+        data = array.tobytes(order="F")
+        if compression is None:
+            return np.array([len(data)], dtype="<u8").tobytes() + data
+        blocksize = self._vts_blocksize
+        blocks = [
+            zlib.compress(data[i : i + blocksize])
+            for i in range(0, len(data), blocksize)
+        ]
+        header = [len(blocks), blocksize, len(data) % blocksize]
+        header.extend(len(block) for block in blocks)
+        return np.array(header, dtype="<u8").tobytes() + b"".join(blocks)
+
+    def _write_vts_file(
+        self, vtsfile: Path, fields: dict[str, np.ndarray], compression: str
+    ) -> None:
+        """
+        Writes an XML StructuredGrid VTK file with all data stored in a single
+        appended binary section.
+
+        Parameters
+        ----------
+        vtsfile : ~os.PathLike
+            The name of the VTS file to write to.
+        fields : dict[str, np.ndarray]
+            The scalar fields to write, with the field names as keys.
+        compression : str
+            The compression to use, either None (raw data) or "zlib".
+        """
+        vts_type = "Float32" if self._vts_fmt == "<f4" else "Float64"
+        extent = " ".join(f"0 {dim - 1}" for dim in self.dims)
+        blocks = []
+        point_data = []
+        offset = 0
+        for fieldname, fielddata in fields.items():
+            if np.max(np.abs(fielddata)) <= 1e-12:
+                pylboLogger.warning(
+                    f"field {fieldname} is zero everywhere and thus not written to VTS."
+                )
+                continue
+            fieldname = fieldname.replace(" ", "_")
+            blocks.append(
+                self._encode_vts_data(
+                    fielddata.astype(self._vts_fmt, copy=False), compression
+                )
+            )
+            point_data.append(
+                f'        <DataArray type="{vts_type}" Name="{fieldname}" '
+                f'format="appended" offset="{offset}"/>\n'
+            )
+            offset += len(blocks[-1])
+        # the grid is identical for every time step, so cache its encoded data
+        key = (self._vts_fmt, compression)
+        if key not in self._vts_coordinate_bytes:
+            coords = np.stack(self.get_coordinate_data(), axis=0)
+            self._vts_coordinate_bytes[key] = self._encode_vts_data(
+                coords.astype(self._vts_fmt), compression
+            )
+        blocks.append(self._vts_coordinate_bytes[key])
+
+        compressor = ""
+        if compression is not None:
+            compressor = ' compressor="vtkZLibDataCompressor"'
+        header = "".join(
+            [
+                '<?xml version="1.0"?>\n',
+                '<VTKFile type="StructuredGrid" version="1.0" ',
+                f'byte_order="LittleEndian" header_type="UInt64"{compressor}>\n',
+                f'  <StructuredGrid WholeExtent="{extent}">\n',
+                f'    <Piece Extent="{extent}">\n',
+                "      <PointData>\n",
+                *point_data,
+                "      </PointData>\n",
+                "      <Points>\n",
+                f'        <DataArray type="{vts_type}" NumberOfComponents="3" ',
+                f'format="appended" offset="{offset}"/>\n',
+                "      </Points>\n",
+                "    </Piece>\n",
+                "  </StructuredGrid>\n",
+                '  <AppendedData encoding="raw">\n',
+                "   _",
+            ]
+        )
+        with open(vtsfile, "wb") as ostream:
+            ostream.write(header.encode())
+            for block in blocks:
+                ostream.write(block)
+            ostream.write(b"\n  </AppendedData>\n</VTKFile>\n")
+
+    def _write_vts_batch(
+        self,
+        vtsfiles: list[Path],
+        times: np.ndarray,
+        names: list[str],
+        bg_names: list[str],
+        compression: str,
+    ) -> list[Path]:
+        """
+        Writes a batch of time steps to XML VTK files.
+
+        Parameters
+        ----------
+        vtsfiles : list[~os.PathLike]
+            The names of the VTS files to write to, one for every time.
+        times : np.ndarray
+            The times at which to export the mode solution.
+        names : list[str]
+            The names of the eigenfunctions to export.
+        bg_names : list[str]
+            The names of the equilibrium backgrounds to export.
+        compression : str
+            The compression to use, either None (raw data) or "zlib".
+
+        Returns
+        -------
+        list[~os.PathLike]
+            The names of the VTS files that were written.
+        """
+        solutions = [
+            self.get_time_stepper(name).get_solutions(times, dtype=self._vts_fmt)
+            for name in names
+        ]
+        backgrounds = [
+            self.data.get_background(shape=self.dims, name=bg_name)
+            for bg_name in bg_names
+        ]
+        for it, vtsfile in enumerate(vtsfiles):
+            fields = {name: solution[it] for name, solution in zip(names, solutions)}
+            fields.update(zip(bg_names, backgrounds))
+            fields.update(self.get_auxiliary_coordinate_data())
+            self._write_vts_file(vtsfile, fields, compression)
+        return vtsfiles
+
+    def _write_pvd_file(
+        self, pvdfile: Path, vtsfiles: list[Path], times: np.ndarray
+    ) -> None:
+        """
+        Writes a ParaView collection file indexing all time steps.
+
+        Parameters
+        ----------
+        pvdfile : ~os.PathLike
+            The name of the PVD file to write to.
+        vtsfiles : list[~os.PathLike]
+            The names of the VTS files, one for every time.
+        times : np.ndarray
+            The times corresponding to the VTS files.
+        """
+        with open(pvdfile, "w") as ostream:
+            ostream.write('<?xml version="1.0"?>\n')
+            ostream.write(
+                '<VTKFile type="Collection" version="0.1" byte_order="LittleEndian">\n'
+            )
+            ostream.write("  <Collection>\n")
+            for t, vtsfile in zip(times, vtsfiles):
+                ostream.write(
+                    f'    <DataSet timestep="{float(t)!r}" group="" part="0" '
+                    f'file="{vtsfile.relative_to(pvdfile.parent)}"/>\n'
+                )
+            ostream.write("  </Collection>\n")
+            ostream.write("</VTKFile>\n")
+
+    def export_to_vts(
+        self,
+        filename: str,
+        time: Union[float, np.ndarray],
+        names: Union[str, list[str]] = None,
+        bg_names: Union[str, list[str]] = None,
+        dtype: str = "float32",
+        compression: str = "zlib",
+        nb_cpus: int = 1,
+        starting_index: int = 0,
+    ) -> Path:
+        """
+        Exports the mode solution to XML StructuredGrid VTK files (one ``.vts`` file
+        per time step) and writes a ParaView collection (``.pvd``) file indexing
+        all time steps. All data is stored as appended binary data, optionally
+        compressed. Time steps can be distributed over multiple processes.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the PVD file to write to, the VTS files are named after it.
+        time : Union[float, np.ndarray]
+            The time(s) at which to export the mode solution.
+        names : Union[str, list[str]], optional
+            The name(s) of the mode(s) to export.
+        bg_names : Union[str, list[str]], optional
+            The name(s) of the equilibrium background(s) to export.
+        dtype : str, optional
+            The VTK data type, defaults to "float32" (32 bit floating point).
+            Can be set to "float64" (64 bit floating point) but uses more memory.
+        compression : str, optional
+            The compression of the binary data, defaults to "zlib". If None, the
+            data is written uncompressed.
+        nb_cpus : int, optional
+            The number of processes used to write the time steps, defaults to 1.
+        starting_index : int, optional
+            The starting index for filenames, defaults to 0.
+
+        Returns
+        -------
+        ~os.PathLike
+            The path to the PVD file.
+        """
+        time = transform_to_numpy(time)
+        names = [] if names is None else transform_to_list(names)
+        bg_names = [] if bg_names is None else transform_to_list(bg_names)
+        self._validate_and_set_dtype(dtype)
+        if compression not in (None, "zlib"):
+            raise ValueError(f"compression {compression} not supported.")
+        nb_cpus = max(1, min(nb_cpus, multiprocessing.cpu_count()))
+        filename = Path(filename).with_suffix("")  # remove extension
+        pvdfile = filename.with_suffix(".pvd").resolve()
+        vtsfiles = [
+            pvdfile.parent / f"{filename.name}_t{it:04d}.vts"
+            for it in range(starting_index, starting_index + len(time))
+        ]
+        # validate names and cache the spatial solutions before starting workers
+        steppers = [self.get_time_stepper(name) for name in names]
+        batch_size = 1
+        if steppers:
+            batch_size = steppers[0].get_batch_size(nb_fields=len(steppers))
+        # make sure every process gets work if there are only a few time steps
+        batch_size = max(1, min(batch_size, len(time) // nb_cpus))
+        batches = [
+            (vtsfiles[i : i + batch_size], time[i : i + batch_size])
+            for i in range(0, len(time), batch_size)
+        ]
+
+        pylboLogger.info(f"exporting eigenmode(s) to VTS files [{nb_cpus} CPUS]...")
+        pbar = tqdm(total=len(time), desc="writing VTS files", unit="file")
+        print_bg_info = self.data._print_bg_info
+        self.data._print_bg_info = False
+        try:
+            if nb_cpus == 1:
+                for batch_files, batch_times in batches:
+                    self._write_vts_batch(
+                        batch_files, batch_times, names, bg_names, compression
+                    )
+                    pbar.update(len(batch_files))
+            else:
+                self._write_vts_batches_in_pool(
+                    batches, names, bg_names, compression, nb_cpus, pbar
+                )
+        finally:
+            pbar.close()
+            self.data._print_bg_info = print_bg_info
+        self._write_pvd_file(pvdfile, vtsfiles, time)
+        pylboLogger.info(f"done. Collection exported to {pvdfile}")
+        return pvdfile
+
+    def _write_vts_batches_in_pool(
+        self,
+        batches: list[tuple],
+        names: list[str],
+        bg_names: list[str],
+        compression: str,
+        nb_cpus: int,
+        pbar: tqdm,
+    ) -> None:
+        """
+        Writes batches of VTS files on a pool of worker processes. Errors raised in
+        a worker are re-raised here, such that no PVD file referring to missing VTS
+        files is written.
+
+        Parameters
+        ----------
+        batches : list[tuple]
+            The VTS files and times of every batch.
+        names : list[str]
+            The names of the eigenmode solutions to write.
+        bg_names : list[str]
+            The names of the background quantities to write.
+        compression : str
+            The compression of the data arrays, None or "zlib".
+        nb_cpus : int
+            The number of worker processes.
+        pbar : tqdm
+            The progress bar, updated for every finished batch.
+        """
+        pool = multiprocessing.Pool(
+            processes=nb_cpus, initializer=_init_vts_worker, initargs=(self,)
+        )
+        try:
+            results = [
+                pool.apply_async(
+                    _write_vts_batch_in_worker,
+                    args=(batch_files, batch_times, names, bg_names, compression),
+                    callback=lambda files: pbar.update(len(files)),
+                )
+                for batch_files, batch_times in batches
+            ]
+            pool.close()
+            for result in results:
+                result.get()
+            pool.join()
+        except BaseException:
+            pool.terminate()
+            pool.join()
+            raise
+
+    def _write_xdmf_file(
+        self,
+        xdmffile: Path,
+        h5file: Path,
+        times: np.ndarray,
+        names: list[str],
+        static_names: list[str],
+    ) -> None:
+        """
+        Writes an XDMF descriptor for a time series stored in a HDF5 file, such that
+        it can be read by e.g. ParaView or VisIt.
+
+        Parameters
+        ----------
+        xdmffile : ~os.PathLike
+            The name of the XDMF file to write to.
+        h5file : ~os.PathLike
+            The name of the HDF5 file containing the data.
+        times : np.ndarray
+            The times of the time series.
+        names : list[str]
+            The names of the time-dependent fields.
+        static_names : list[str]
+            The names of the time-independent fields.
+        """
+        precision = np.dtype(self._vts_fmt).itemsize
+        dims = " ".join(str(dim) for dim in reversed(self.dims))
+        number = f'NumberType="Float" Precision="{precision}" Format="HDF"'
+        h5name = h5file.relative_to(xdmffile.parent)
+        lines = [
+            '<?xml version="1.0" ?>',
+            '<Xdmf Version="3.0">',
+            "  <Domain>",
+            '    <Grid Name="mode" GridType="Collection" CollectionType="Temporal">',
+        ]
+        for it, t in enumerate(times):
+            lines += [
+                f'      <Grid Name="t{it:04d}" GridType="Uniform">',
+                f'        <Time Value="{float(t)!r}"/>',
+                f'        <Topology TopologyType="3DSMesh" Dimensions="{dims}"/>',
+                '        <Geometry GeometryType="XYZ">',
+                f'          <DataItem Dimensions="{dims} 3" {number}>'
+                f"{h5name}:/grid/points</DataItem>",
+                "        </Geometry>",
+            ]
             for name in names:
-                solution = self.get_solution(name, t)
-                self._write_vtk_scalar_field(vtkfile, name, solution)
-            for bg_name in bg_names:
-                bg = self.data.get_background(shape=self.dims, name=bg_name)
-                self._write_vtk_scalar_field(vtkfile, bg_name, bg)
-            self._write_vtk_auxiliary_coordinates(vtkfile)
-            if self._pbar is not None:
-                self._pbar.update()
-            self._log_info(f"done. File exported to {vtkfile.resolve()}")
+                lines += [
+                    f'        <Attribute Name="{name}" Center="Node">',
+                    f'          <DataItem ItemType="HyperSlab" Dimensions="{dims}">',
+                    '            <DataItem Dimensions="3 4" Format="XML">'
+                    f"{it} 0 0 0 1 1 1 1 1 {dims}</DataItem>",
+                    f'            <DataItem Dimensions="{len(times)} {dims}" '
+                    f"{number}>{h5name}:/fields/{name}</DataItem>",
+                    "          </DataItem>",
+                    "        </Attribute>",
+                ]
+            for name in static_names:
+                lines += [
+                    f'        <Attribute Name="{name}" Center="Node">',
+                    f'          <DataItem Dimensions="{dims}" {number}>'
+                    f"{h5name}:/static/{name}</DataItem>",
+                    "        </Attribute>",
+                ]
+            lines.append("      </Grid>")
+        lines += ["    </Grid>", "  </Domain>", "</Xdmf>", ""]
+        with open(xdmffile, "w") as ostream:
+            ostream.write("\n".join(lines))
+
+    def export_to_hdf5(
+        self,
+        filename: str,
+        time: Union[float, np.ndarray],
+        names: Union[str, list[str]] = None,
+        bg_names: Union[str, list[str]] = None,
+        dtype: str = "float32",
+        compression: str = "gzip",
+    ) -> Path:
+        """
+        Exports the time series of the mode solution to a single HDF5 file, together
+        with an XDMF descriptor (``.xdmf``) that can be opened in ParaView or VisIt.
+        The grid and the backgrounds are stored only once, every eigenfunction is
+        stored as a chunked ``(time, u3, u2, u1)`` dataset with one chunk per time
+        step. Time steps are calculated and written in batches, such that the full
+        time series never has to be kept in memory. Requires :mod:`h5py`.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the HDF5 file to write to, the XDMF file is named after it.
+        time : Union[float, np.ndarray]
+            The time(s) at which to export the mode solution.
+        names : Union[str, list[str]], optional
+            The name(s) of the mode(s) to export.
+        bg_names : Union[str, list[str]], optional
+            The name(s) of the equilibrium background(s) to export.
+        dtype : str, optional
+            The data type, defaults to "float32" (32 bit floating point).
+            Can be set to "float64" (64 bit floating point) but uses more memory.
+        compression : str, optional
+            The HDF5 compression filter for the eigenfunction datasets, defaults to
+            "gzip". If None, the data is written uncompressed.
+
+        Returns
+        -------
+        ~os.PathLike
+            The path to the XDMF file.
+
+        Raises
+        ------
+        ModuleNotFoundError
+            If :mod:`h5py` is not installed.
+        """
+        if h5py is None:
+            raise ModuleNotFoundError(
+                "HDF5 export requires h5py, install it with 'pip install h5py'."
+            )
+        time = transform_to_numpy(time)
+        names = [] if names is None else transform_to_list(names)
+        bg_names = [] if bg_names is None else transform_to_list(bg_names)
+        self._validate_and_set_dtype(dtype)
+        h5file = Path(filename).with_suffix(".h5").resolve()
+        xdmffile = h5file.with_suffix(".xdmf")
+        # VTK ordering, first index varies fastest
+        shape = tuple(reversed(self.dims))
+        steppers = [self.get_time_stepper(name) for name in names]
+        static = {
+            bg_name: self.data.get_background(shape=self.dims, name=bg_name)
+            for bg_name in bg_names
+        }
+        static.update(self.get_auxiliary_coordinate_data())
+
+        pylboLogger.info("exporting eigenmode(s) to HDF5 file...")
+        print_bg_info = self.data._print_bg_info
+        self.data._print_bg_info = False
+        pbar = tqdm(total=len(time), desc="writing HDF5 file", unit="step")
+        try:
+            with h5py.File(h5file, "w") as h5:
+                h5.create_dataset("time", data=time)
+                h5.create_dataset(
+                    "grid/points",
+                    data=np.stack(self.get_coordinate_data(), axis=-1).transpose(
+                        2, 1, 0, 3
+                    ),
+                    dtype=self._vts_fmt,
+                )
+                for name, fielddata in static.items():
+                    h5.create_dataset(
+                        f"static/{name}",
+                        data=fielddata.transpose(),
+                        dtype=self._vts_fmt,
+                    )
+                dsets = [
+                    h5.create_dataset(
+                        f"fields/{name}",
+                        shape=(len(time), *shape),
+                        dtype=self._vts_fmt,
+                        chunks=(1, *shape),
+                        compression=compression,
+                    )
+                    for name in names
+                ]
+                batch_size = 1
+                if steppers:
+                    batch_size = steppers[0].get_batch_size(nb_fields=len(steppers))
+                for start in range(0, len(time), batch_size):
+                    batch = time[start : start + batch_size]
+                    for stepper, dset in zip(steppers, dsets):
+                        solutions = stepper.get_solutions(batch, dtype=self._vts_fmt)
+                        dset[start : start + len(batch)] = solutions.transpose(
+                            0, 3, 2, 1
+                        )
+                    pbar.update(len(batch))
+        finally:
+            pbar.close()
+            self.data._print_bg_info = print_bg_info
+        self._write_xdmf_file(xdmffile, h5file, time, names, list(static))
+        pylboLogger.info(f"done. Time series exported to {h5file}")
+        return xdmffile
 
 
 class VTKCartesianData(VTKDataExporter):
@@ -364,5 +968,5 @@ class VTKCylindricalData(VTKDataExporter):
             self.u3_data,
         )
 
-    def _write_vtk_auxiliary_coordinates(self, vtkfile):
-        self._write_vtk_scalar_field(vtkfile, "thetas", self.u2_data)
+    def get_auxiliary_coordinate_data(self) -> dict[str, np.ndarray]:
+        return {"thetas": self.u2_data}
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import matplotlib.colors as mpl_colors
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.image import BboxImage
+from pylbo.utilities.logger import pylboLogger
+
+
+class SpectrumDensityHandler:
+    """
+    Handles the level-of-detail rendering of (very) large spectra. Instead of
+    drawing every eigenvalue as a separate marker, the eigenvalues in view are
+    aggregated into a 2D histogram with a resolution tied to the size of the axes in
+    pixels. The histogram is recomputed whenever the axis limits change, and once
+    the number of eigenvalues in view drops below a given threshold the actual
+    points are drawn instead. Picking is left to
+    :class:`~pylbo.visualisation.spectra.spectrum_picker.SpectrumPicker`.
+
+    Parameters
+    ----------
+    ax : ~matplotlib.axes.Axes
+        The axes on which the spectrum is drawn.
+    xdata : list[np.ndarray]
+        The horizontal coordinates of the eigenvalues, one array per dataset.
+    ydata : list[np.ndarray]
+        The vertical coordinates of the eigenvalues, one array per dataset.
+    max_points : int
+        The maximum number of eigenvalues in view for which the points themselves are
+        drawn.
+    pixels_per_bin : int
+        The size of a single histogram bin, in pixels.
+    cmap : str
+        The colormap used for the histogram.
+    **kwargs
+        Additional keyword arguments passed to :meth:`~matplotlib.axes.Axes.scatter`
+        when drawing the points.
+
+    Attributes
+    ----------
+    image : ~matplotlib.image.BboxImage
+        The image containing the histogram, covering the entire axes.
+    points : ~matplotlib.collections.PathCollection
+        The points in view, only visible if there are at most `max_points` of them.
+    """
+
+    def __init__(
+        self,
+        ax: Axes,
+        xdata: list[np.ndarray],
+        ydata: list[np.ndarray],
+        max_points: int = 5000,
+        pixels_per_bin: int = 3,
+        cmap: str = "viridis",
+        **kwargs,
+    ) -> None:
+        self.ax = ax
+        self.max_points = max_points
+        self.pixels_per_bin = pixels_per_bin
+
+        xdata = [np.broadcast_to(x, np.shape(y)).ravel() for x, y in zip(xdata, ydata)]
+        ydata = [np.ravel(y) for y in ydata]
+        x = np.concatenate(xdata).astype(float)
+        y = np.concatenate(ydata).astype(float)
+        (finite,) = np.where(np.isfinite(x) & np.isfinite(y))
+        self._x = x[finite]
+        self._y = y[finite]
+        pylboLogger.debug(f"density handler created for {len(self._x)} eigenvalues")
+
+        # state of the current view
+        self._view_key = None
+        self._visible = np.array([], dtype=int)
+
+        self.image = BboxImage(
+            ax.bbox,
+            cmap=cmap,
+            norm=mpl_colors.LogNorm(),
+            origin="lower",
+            interpolation="nearest",
+        )
+        ax.add_artist(self.image)
+        self.points = ax.scatter([], [], **kwargs)
+
+        if len(self._x) > 0:
+            corners = [
+                (np.min(self._x), np.min(self._y)),
+                (np.max(self._x), np.max(self._y)),
+            ]
+            ax.update_datalim(corners)
+            ax.autoscale_view()
+        ax.callbacks.connect("xlim_changed", self.update)
+        ax.callbacks.connect("ylim_changed", self.update)
+        self.update()
+
+    @property
+    def nb_visible(self) -> int:
+        """The number of eigenvalues in view."""
+        return len(self._visible)
+
+    @property
+    def uses_points(self) -> bool:
+        """Whether the points are drawn instead of the histogram."""
+        return self.nb_visible <= self.max_points
+
+    def update(self, *args) -> None:
+        """
+        Updates the rendering for the current view. This is connected to changes
+        in the axis limits and does nothing if the view did not change since the
+        previous call.
+        """
+        key = (self.ax.get_xlim(), self.ax.get_ylim(), tuple(self.ax.bbox.bounds))
+        if key == self._view_key:
+            return
+        self._view_key = key
+        self._visible = self._get_visible_idxs()
+        use_points = self.uses_points
+        self.points.set_visible(use_points)
+        self.image.set_visible(not use_points)
+        if use_points:
+            self.points.set_offsets(
+                np.column_stack([self._x[self._visible], self._y[self._visible]])
+            )
+        else:
+            counts = self._get_counts()
+            self.image.set_data(np.ma.masked_equal(counts, 0))
+            self.image.set_clim(1, max(2, np.max(counts)))
+
+    def _get_visible_idxs(self) -> np.ndarray:
+        """Returns the indices of the eigenvalues within the current axis limits."""
+        xmin, xmax = sorted(self.ax.get_xlim())
+        ymin, ymax = sorted(self.ax.get_ylim())
+        in_x = (self._x >= xmin) & (self._x <= xmax)
+        (idxs,) = np.where(in_x & (self._y >= ymin) & (self._y <= ymax))
+        return idxs
+
+    def _get_counts(self) -> np.ndarray:
+        """
+        Bins the eigenvalues in view on a pixel grid covering the axes.
+
+        Returns
+        -------
+        np.ndarray
+            The number of eigenvalues in every bin, with shape ``(ny, nx)``.
+        """
+        px = self.ax.transData.transform(
+            np.column_stack([self._x[self._visible], self._y[self._visible]])
+        )
+        x0, y0, width, height = self.ax.bbox.bounds
+        nx = max(1, int(width // self.pixels_per_bin))
+        ny = max(1, int(height // self.pixels_per_bin))
+        ix = ((px[:, 0] - x0) * (nx / max(width, 1))).astype(int)
+        iy = ((px[:, 1] - y0) * (ny / max(height, 1))).astype(int)
+        np.clip(ix, 0, nx - 1, out=ix)
+        np.clip(iy, 0, ny - 1, out=iy)
+        return np.bincount(iy * nx + ix, minlength=nx * ny).reshape(ny, nx)
@@ -5,7 +5,12 @@ from copy import copy
 import numpy as np
 from matplotlib.axes import Axes as mpl_axes
 from matplotlib.figure import Figure as mpl_fig
+from pylbo.visualisation.eigenfunctions.eigfunc_prefetcher import (
+    EigenfunctionPrefetcher,
+)
 from pylbo.visualisation.figure_window import InteractiveFigureWindow
+from pylbo.visualisation.spectra.spectrum_density import SpectrumDensityHandler
+from pylbo.visualisation.spectra.spectrum_picker import SpectrumPicker
 from pylbo.visualisation.utils import refresh_plot
 
 
@@ -33,6 +38,14 @@ class SpectrumFigure(InteractiveFigureWindow):
         The scaling of the x-axis.
     y_scaling : int, float, complex, np.ndarray
         The scaling of the y-axis.
+    density_handler : SpectrumDensityHandler
+        The handler for the density rendering, None if this mode is not enabled.
+    picker : SpectrumPicker
+        Resolves clicks on the spectrum to eigenvalues, created when the spectrum
+        is drawn.
+    ef_prefetcher : EigenfunctionPrefetcher
+        Loads the (derived) eigenfunctions of selected eigenvalues in the background,
+        shared by the eigenfunction handlers.
     """
 
     def __init__(
@@ -56,6 +69,10 @@ class SpectrumFigure(InteractiveFigureWindow):
         self._ef_ax = None
         self._def_handler = None
         self._def_ax = None
+        self._density_props = None
+        self.density_handler = None
+        self.picker = None
+        self.ef_prefetcher = EigenfunctionPrefetcher()
 
         self.plot_props = None
         self.marker = None
@@ -95,6 +112,79 @@ class SpectrumFigure(InteractiveFigureWindow):
         """
         self.y_scaling = y_scaling
 
+    @refresh_plot
+    def set_density_mode(
+        self, enabled=True, max_points=5000, pixels_per_bin=3, cmap="viridis"
+    ):
+        """
+        Enables or disables the density rendering of the spectrum. If enabled, the
+        eigenvalues in view are drawn as a 2D histogram, which is recomputed whenever
+        the view changes. The points themselves are drawn once there are at most
+        `max_points` eigenvalues in view. Eigenvalues can be selected in both cases.
+
+        Parameters
+        ----------
+        enabled : bool
+            Whether to enable the density rendering.
+        max_points : int
+            The maximum number of eigenvalues in view for which the points themselves
+            are drawn.
+        pixels_per_bin : int
+            The size of a single histogram bin, in pixels.
+        cmap : str
+            The colormap used for the histogram.
+        """
+        self._density_props = None
+        if enabled:
+            self._density_props = {
+                "max_points": max_points,
+                "pixels_per_bin": pixels_per_bin,
+                "cmap": cmap,
+            }
+
+    def set_eigenfunction_prefetching(self, nearest=0):
+        """
+        Sets the number of neighbouring eigenvalues for which the (derived)
+        eigenfunctions are loaded in the background when an eigenvalue is selected.
+        The eigenfunctions of the selected eigenvalue itself are always prefetched.
+
+        Parameters
+        ----------
+        nearest : int
+            The number of nearest eigenvalues to prefetch, 0 disables prefetching
+            of neighbouring eigenvalues.
+        """
+        if nearest < 0:
+            raise ValueError(f"nearest must be non-negative, got {nearest}")
+        self.ef_prefetcher.nearest = nearest
+
+    def _add_density_spectrum(self, xdata, ydata, datasets):
+        """
+        Draws the spectrum using the density rendering.
+
+        Parameters
+        ----------
+        xdata : list[numpy.ndarray]
+            The horizontal coordinates of the eigenvalues, one array per dataset.
+        ydata : list[numpy.ndarray]
+            The vertical coordinates of the eigenvalues, one array per dataset.
+        datasets : list[~pylbo.data_containers.LegolasDataSet]
+            The datasets associated with the coordinate arrays.
+        """
+        self.density_handler = SpectrumDensityHandler(
+            self.ax,
+            xdata,
+            ydata,
+            marker=self.marker,
+            color=self.color,
+            s=10 * self.markersize,
+            alpha=self.alpha,
+            **self._density_props,
+        )
+        self.picker = SpectrumPicker(self.ax)
+        for x, y, ds in zip(xdata, ydata, datasets):
+            self.picker.add_points(x, y, ds)
+
     def _set_plot_properties(self, properties):
         """
         Sets all relevant plot properties.
@@ -146,3 +236,13 @@ class SpectrumFigure(InteractiveFigureWindow):
     def ef_ax(self):
         """Property, returns the eigenfunction axes."""
         return self._ef_ax
+
+    @property
+    def def_handler(self):
+        """Property, returns the derived eigenfunction handler."""
+        return self._def_handler
+
+    @property
+    def def_ax(self):
+        """Property, returns the derived eigenfunction axes."""
+        return self._def_ax
@@ -1,10 +1,10 @@
-from pylbo.utilities.toolbox import add_pickradius_to_item
 from pylbo.visualisation.eigenfunctions.derived_eigfunc_handler import (
     DerivedEigenfunctionHandler,
 )
 from pylbo.visualisation.eigenfunctions.eigfunc_handler import EigenfunctionHandler
 from pylbo.visualisation.legend_handler import LegendHandler
 from pylbo.visualisation.spectra.spectrum_figure import SpectrumFigure
+from pylbo.visualisation.spectra.spectrum_picker import SpectrumPicker
 
 
 class MergedSpectrumPlot(SpectrumFigure):
@@ -53,6 +53,29 @@ class MergedSpectrumPlot(SpectrumFigure):
 
     def add_spectrum(self):
         """Adds the spectrum to the plot, makes the points pickable."""
+        if self._density_props is not None:
+            self._add_density_spectrum(
+                [ds.eigenvalues.real * self.x_scaling for ds in self.data],
+                [ds.eigenvalues.imag * self.y_scaling for ds in self.data],
+                self.data,
+            )
+        else:
+            self._add_scatter_spectrum()
+        self.ax.axhline(y=0, linestyle="dotted", color="grey", alpha=0.3)
+        self.ax.axvline(x=0, linestyle="dotted", color="grey", alpha=0.3)
+        self.ax.set_xlabel(r"Re($\omega$)")
+        self.ax.set_ylabel(r"Im($\omega$)")
+
+        if self._use_legend and self._density_props is None:
+            self.leg_handle.legend = self.ax.legend(loc="best")
+            self.leg_handle._make_visible_by_default = True
+            if self._interactive:
+                super().make_legend_interactive(self.leg_handle)
+        self.fig.tight_layout()
+
+    def _add_scatter_spectrum(self):
+        """Draws the spectrum with every dataset as a separate set of points."""
+        self.picker = SpectrumPicker(self.ax)
         color = None
         if self._single_color:
             color = self.color
@@ -73,26 +96,17 @@ class MergedSpectrumPlot(SpectrumFigure):
                 **self.plot_props,
             )
             setattr(spectrum_point, "dataset", ds)
-            add_pickradius_to_item(item=spectrum_point, pickradius=10)
+            self.picker.add_artist(spectrum_point, ds)
             self.leg_handle.add(spectrum_point)
-        self.ax.axhline(y=0, linestyle="dotted", color="grey", alpha=0.3)
-        self.ax.axvline(x=0, linestyle="dotted", color="grey", alpha=0.3)
-        self.ax.set_xlabel(r"Re($\omega$)")
-        self.ax.set_ylabel(r"Im($\omega$)")
-
-        if self._use_legend:
-            self.leg_handle.legend = self.ax.legend(loc="best")
-            self.leg_handle._make_visible_by_default = True
-            if self._interactive:
-                super().make_legend_interactive(self.leg_handle)
-        self.fig.tight_layout()
 
     def add_eigenfunctions(self):
         """Adds the eigenfunctions to the current figure."""
         if self._ef_ax is None:
             self._ef_ax = super().add_subplot_axes(self.ax, loc="right")
         if self._ef_handler is None:
-            self._ef_handler = EigenfunctionHandler(self.data, self._ef_ax, self.ax)
+            self._ef_handler = EigenfunctionHandler(
+                self.data, self._ef_ax, self.ax, prefetcher=self.ef_prefetcher
+            )
         super().add_eigenfunction_interface(efhandler=self._ef_handler)
 
     def add_derived_eigenfunctions(self):
@@ -101,7 +115,7 @@ class MergedSpectrumPlot(SpectrumFigure):
             self._def_ax = super().add_subplot_axes(self.ax, loc="right")
         if self._def_handler is None:
             self._def_handler = DerivedEigenfunctionHandler(
-                self.data, self._def_ax, self.ax
+                self.data, self._def_ax, self.ax, prefetcher=self.ef_prefetcher
             )
         super().add_eigenfunction_interface(efhandler=self._def_handler)
 
@@ -1,12 +1,13 @@
 import matplotlib.colors as mpl_colors
 import numpy as np
-from pylbo.utilities.toolbox import add_pickradius_to_item, transform_to_numpy
+from pylbo.utilities.toolbox import transform_to_numpy
 from pylbo.visualisation.continua import ContinuaHandler
 from pylbo.visualisation.eigenfunctions.derived_eigfunc_handler import (
     DerivedEigenfunctionHandler,
 )
 from pylbo.visualisation.eigenfunctions.eigfunc_handler import EigenfunctionHandler
 from pylbo.visualisation.spectra.spectrum_figure import SpectrumFigure
+from pylbo.visualisation.spectra.spectrum_picker import SpectrumPicker
 
 
 class MultiSpectrumPlot(SpectrumFigure):
@@ -148,6 +149,20 @@ class MultiSpectrumPlot(SpectrumFigure):
         """
         Draw method, creates the spectrum.
         """
+        if self._density_props is not None:
+            self._add_density_spectrum(
+                [x * scaling for x, scaling in zip(self.xdata, self.x_scaling)],
+                [y * scaling for y, scaling in zip(self.ydata, self.y_scaling)],
+                self.dataseries,
+            )
+        else:
+            self._add_scatter_spectrum()
+        self.ax.axhline(y=0, linestyle="dotted", color="grey", alpha=0.3)
+        self.ax.axvline(x=0, linestyle="dotted", color="grey", alpha=0.3)
+
+    def _add_scatter_spectrum(self):
+        """Draws the spectrum with every dataset as a separate set of points."""
+        self.picker = SpectrumPicker(self.ax)
         for i, ds in enumerate(self.dataseries):
             spectrum_points = self.ax.scatter(
                 self.xdata[i]
@@ -161,11 +176,9 @@ class MultiSpectrumPlot(SpectrumFigure):
                 linestyle="None",
                 **self.plot_props,
             )
-            add_pickradius_to_item(item=spectrum_points, pickradius=10)
             # set dataset associated with this line of points
             setattr(spectrum_points, "dataset", ds)
-        self.ax.axhline(y=0, linestyle="dotted", color="grey", alpha=0.3)
-        self.ax.axvline(x=0, linestyle="dotted", color="grey", alpha=0.3)
+            self.picker.add_artist(spectrum_points, ds)
 
     def add_continua(self, interactive=True):
         """
@@ -225,7 +238,7 @@ class MultiSpectrumPlot(SpectrumFigure):
             self._ef_ax = super().add_subplot_axes(self.ax, loc="right")
         if self._ef_handler is None:
             self._ef_handler = EigenfunctionHandler(
-                self.dataseries, self._ef_ax, self.ax
+                self.dataseries, self._ef_ax, self.ax, prefetcher=self.ef_prefetcher
             )
         super().add_eigenfunction_interface(efhandler=self._ef_handler)
 
@@ -235,6 +248,6 @@ class MultiSpectrumPlot(SpectrumFigure):
             self._def_ax = super().add_subplot_axes(self.ax, loc="right")
         if self._def_handler is None:
             self._def_handler = DerivedEigenfunctionHandler(
-                self.dataseries, self._def_ax, self.ax
+                self.dataseries, self._def_ax, self.ax, prefetcher=self.ef_prefetcher
             )
         super().add_eigenfunction_interface(efhandler=self._def_handler)
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backend_bases import MouseEvent
+from matplotlib.patches import Rectangle
+from pylbo.data_containers import LegolasDataSet
+from pylbo.visualisation.eigenfunctions.eigfunc_interface import get_artist_data
+
+
+class SpectrumPicker:
+    """
+    Resolves mouse clicks on a spectrum to the nearest eigenvalue. Instead of
+    letting matplotlib test every point of every artist on each click, the
+    eigenvalues in view are kept in a spatial index in display coordinates: the
+    points are sorted on a uniform grid with cells the size of the pick radius, such
+    that a click only has to look up the points in the surrounding cells. The index is
+    rebuilt lazily on the first click after the view changed (zooming, panning,
+    resizing or toggling artists).
+
+    Clicks are caught by a single transparent proxy artist covering the axes, the
+    registered artists themselves are no longer pickable.
+
+    Parameters
+    ----------
+    ax : ~matplotlib.axes.Axes
+        The axes on which the spectrum is drawn.
+    pickradius : float
+        The pick radius in pixels.
+
+    Attributes
+    ----------
+    proxy : ~matplotlib.patches.Rectangle
+        The proxy artist generating the pick events.
+    """
+
+    def __init__(self, ax: Axes, pickradius: float = 10) -> None:
+        self.ax = ax
+        self.pickradius = pickradius
+        self._sources = []
+        self._points = None
+        self._index_key = None
+        self._index = None
+        self._last_pick = (None, None)
+
+        self.proxy = Rectangle(
+            (0, 0), 1, 1, transform=ax.transAxes, fill=False, visible=False
+        )
+        # add_artist leaves the data limits untouched, unlike add_patch
+        ax.add_artist(self.proxy)
+        self.proxy.set_picker(self._pick)
+        setattr(self.proxy, "point_resolver", self)
+
+    @property
+    def nb_points(self) -> int:
+        """The total number of registered eigenvalues."""
+        return sum(len(source["x"]) for source in self._sources)
+
+    def add_points(
+        self,
+        xdata: np.ndarray,
+        ydata: np.ndarray,
+        dataset: LegolasDataSet,
+        ev_idxs: np.ndarray = None,
+        artist: plt.Artist = None,
+    ) -> None:
+        """
+        Registers eigenvalues that can be picked.
+
+        Parameters
+        ----------
+        xdata : np.ndarray
+            The horizontal data coordinates of the eigenvalues.
+        ydata : np.ndarray
+            The vertical data coordinates of the eigenvalues.
+        dataset : ~pylbo.data_containers.LegolasDataSet
+            The dataset associated with the eigenvalues.
+        ev_idxs : np.ndarray
+            The indices of the eigenvalues in the eigenvalue array of the dataset.
+            If None, these are assumed to be in order.
+        artist : ~matplotlib.artist.Artist
+            The artist drawing these eigenvalues, if given the eigenvalues can only
+            be picked if the artist is visible.
+        """
+        ydata = np.ravel(ydata).astype(float)
+        xdata = np.broadcast_to(xdata, ydata.shape).astype(float)
+        if ev_idxs is None:
+            ev_idxs = np.arange(len(ydata))
+        self._sources.append(
+            {
+                "x": xdata,
+                "y": ydata,
+                "dataset": dataset,
+                "ev_idxs": np.asarray(ev_idxs, dtype=int),
+                "artist": artist,
+            }
+        )
+        self._points = None
+        self._index_key = None
+
+    def add_artist(
+        self, artist: plt.Artist, dataset: LegolasDataSet, ev_idxs: np.ndarray = None
+    ) -> None:
+        """
+        Registers the eigenvalues drawn by an artist and makes the artist itself
+        unpickable.
+
+        Parameters
+        ----------
+        artist : ~matplotlib.artist.Artist
+            The artist drawing the eigenvalues.
+        dataset : ~pylbo.data_containers.LegolasDataSet
+            The dataset associated with the eigenvalues.
+        ev_idxs : np.ndarray
+            The indices of the eigenvalues in the eigenvalue array of the dataset.
+            If None, these are assumed to be in order.
+        """
+        xdata, ydata = get_artist_data(artist)
+        artist.set_picker(None)
+        self.add_points(xdata, ydata, dataset, ev_idxs=ev_idxs, artist=artist)
+
+    def _get_points(self) -> dict:
+        """Returns all registered eigenvalues as concatenated arrays."""
+        if self._points is None:
+            sources = self._sources
+            self._points = {
+                "x": np.concatenate([src["x"] for src in sources] or [[]]),
+                "y": np.concatenate([src["y"] for src in sources] or [[]]),
+                "source": np.repeat(
+                    np.arange(len(sources)), [len(src["x"]) for src in sources]
+                ),
+                "ev_idx": np.concatenate(
+                    [src["ev_idxs"] for src in sources] or [[]]
+                ).astype(int),
+            }
+        return self._points
+
+    def _get_view_key(self) -> tuple:
+        """Returns a key describing the current view."""
+        return (
+            self.ax.get_xlim(),
+            self.ax.get_ylim(),
+            tuple(self.ax.bbox.bounds),
+            tuple(
+                src["artist"] is None or src["artist"].get_visible()
+                for src in self._sources
+            ),
+        )
+
+    def _build_index(self) -> None:
+        """
+        Builds the spatial index for the eigenvalues in view. The eigenvalues are
+        transformed to display coordinates and sorted on their grid cell.
+        """
+        points = self._get_points()
+        visible_sources = np.array(self._index_key[-1], dtype=bool)
+        xmin, xmax = sorted(self.ax.get_xlim())
+        ymin, ymax = sorted(self.ax.get_ylim())
+        x, y = points["x"], points["y"]
+        with np.errstate(invalid="ignore"):
+            in_view = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+        if len(visible_sources) > 0:
+            in_view &= visible_sources[points["source"]]
+        (idxs,) = np.where(in_view)
+        px = self.ax.transData.transform(np.column_stack([x[idxs], y[idxs]]))
+        x0, y0, width, _ = self.ax.bbox.bounds
+        ncols = int(width // self.pickradius) + 3
+        cells = self._get_cells(px, x0, y0, ncols)
+        order = np.argsort(cells, kind="stable")
+        self._index = {
+            "idxs": idxs[order],
+            "px": px[order],
+            "cells": cells[order],
+            "origin": (x0, y0),
+            "ncols": ncols,
+        }
+
+    def _get_cells(
+        self, px: np.ndarray, x0: float, y0: float, ncols: int
+    ) -> np.ndarray:
+        """Returns the grid cell of every point in display coordinates."""
+        col = np.floor((px[:, 0] - x0) / self.pickradius).astype(int) + 1
+        row = np.floor((px[:, 1] - y0) / self.pickradius).astype(int) + 1
+        return row * ncols + col
+
+    def resolve_pick(
+        self, mouseevent: MouseEvent
+    ) -> tuple[LegolasDataSet, int, float, float]:
+        """
+        Resolves a mouse click to the nearest eigenvalue within the pick radius.
+
+        Parameters
+        ----------
+        mouseevent : ~matplotlib.backend_bases.MouseEvent
+            The mouse event.
+
+        Returns
+        -------
+        tuple[LegolasDataSet, int, float, float]
+            The dataset, the index of the eigenvalue in that dataset and the
+            (x, y) data coordinates of the eigenvalue. None if there is no eigenvalue
+            within the pick radius.
+        """
+        if self._last_pick[0] is mouseevent:
+            return self._last_pick[1]
+        key = self._get_view_key()
+        if key != self._index_key:
+            self._index_key = key
+            self._build_index()
+        index = self._index
+        click = np.array([[mouseevent.x, mouseevent.y]], dtype=float)
+        (cell,) = self._get_cells(click, *index["origin"], index["ncols"])
+        ncols = index["ncols"]
+        neighbours = np.array(
+            [cell + drow * ncols + dcol for drow in (-1, 0, 1) for dcol in (-1, 0, 1)]
+        )
+        starts = np.searchsorted(index["cells"], neighbours, side="left")
+        ends = np.searchsorted(index["cells"], neighbours, side="right")
+        candidates = np.concatenate(
+            [np.arange(start, end) for start, end in zip(starts, ends)]
+        )
+        result = None
+        if len(candidates) > 0:
+            distances = np.sum((index["px"][candidates] - click) ** 2, axis=1)
+            nearest = np.argmin(distances)
+            if distances[nearest] <= self.pickradius**2:
+                result = self._get_point(index["idxs"][candidates[nearest]])
+        self._last_pick = (mouseevent, result)
+        return result
+
+    def _get_point(self, idx: int) -> tuple[LegolasDataSet, int, float, float]:
+        """Returns the dataset, eigenvalue index and coordinates of a point."""
+        points = self._get_points()
+        source = self._sources[points["source"][idx]]
+        return (
+            source["dataset"],
+            int(points["ev_idx"][idx]),
+            points["x"][idx],
+            points["y"][idx],
+        )
+
+    def _pick(self, artist: plt.Artist, mouseevent: MouseEvent) -> tuple[bool, dict]:
+        """Picker of the proxy artist, only hits if an eigenvalue is nearby."""
+        if mouseevent.inaxes is not self.ax:
+            return False, {}
+        return self.resolve_pick(mouseevent) is not None, {}
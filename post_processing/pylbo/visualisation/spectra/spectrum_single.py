@@ -1,12 +1,12 @@
 import matplotlib.colors as mpl_colors
 import numpy as np
-from pylbo.utilities.toolbox import add_pickradius_to_item
 from pylbo.visualisation.continua import ContinuaHandler
 from pylbo.visualisation.eigenfunctions.derived_eigfunc_handler import (
     DerivedEigenfunctionHandler,
 )
 from pylbo.visualisation.eigenfunctions.eigfunc_handler import EigenfunctionHandler
 from pylbo.visualisation.spectra.spectrum_figure import SpectrumFigure
+from pylbo.visualisation.spectra.spectrum_picker import SpectrumPicker
 
 
 class SingleSpectrumPlot(SpectrumFigure):
@@ -66,7 +66,10 @@ class SingleSpectrumPlot(SpectrumFigure):
         )
         # set dataset associated with this line of points
         setattr(spectrum_points, "dataset", self.dataset)
-        add_pickradius_to_item(item=spectrum_points, pickradius=10)
+        self.picker = SpectrumPicker(self.ax)
+        self.picker.add_artist(
+            spectrum_points, self.dataset, ev_idxs=self._nonzero_w_idxs
+        )
         if self._use_residuals:
             self.cbar = self.fig.colorbar(spectrum_points, ax=self.ax, label="Residual")
         self.ax.axhline(y=0, linestyle="dotted", color="grey", alpha=0.3)
@@ -121,7 +124,9 @@ class SingleSpectrumPlot(SpectrumFigure):
         if self._ef_ax is None:
             self._ef_ax = super().add_subplot_axes(self.ax, loc="right")
         if self._ef_handler is None:
-            self._ef_handler = EigenfunctionHandler(self.dataset, self._ef_ax, self.ax)
+            self._ef_handler = EigenfunctionHandler(
+                self.dataset, self._ef_ax, self.ax, prefetcher=self.ef_prefetcher
+            )
         super().add_eigenfunction_interface(efhandler=self._ef_handler)
 
     def add_derived_eigenfunctions(self):
@@ -132,7 +137,7 @@ class SingleSpectrumPlot(SpectrumFigure):
             self._def_ax = super().add_subplot_axes(self.ax, loc="right")
         if self._def_handler is None:
             self._def_handler = DerivedEigenfunctionHandler(
-                self.dataset, self._def_ax, self.ax
+                self.dataset, self._def_ax, self.ax, prefetcher=self.ef_prefetcher
             )
         super().add_eigenfunction_interface(efhandler=self._def_handler)
 
@@ -1,10 +1,14 @@
+from __future__ import annotations
+
 from copy import copy
 from functools import wraps
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import matplotlib.axes
 import numpy as np
 
+if TYPE_CHECKING:
+    import matplotlib.axes
+
 _BACKGROUND_NAME_MAPPING = {
     "rho0": r"$\rho_0$",
     "drho0": r"$\partial \rho_0$",
@@ -3,6 +3,7 @@ from pathlib import Path
 
 package_name = "pylbo"
 required_packages = ["numpy", "matplotlib", "f90nml", "tqdm", "psutil", "packaging"]
+optional_packages = {"hdf5": ["h5py"], "sampling": ["scipy"]}
 
 version_filepath = (Path(__file__).parent / "pylbo/_version.py").resolve()
 VERSION = None
@@ -20,5 +21,7 @@ setup(
     keywords="interface data-analysis",
     python_requires=">=3.6",
     install_requires=required_packages,
+    extras_require=optional_packages,
     packages=find_packages(),
+    entry_points={"console_scripts": ["pylbo=pylbo.cli:main"]},
 )
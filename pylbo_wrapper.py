@@ -29,6 +29,10 @@ except ModuleNotFoundError as e:
 
 
 def _main():
+    # subcommands to inspect datfiles, e.g. `pylbo_wrapper.py ls output/`
+    if len(sys.argv) > 1 and sys.argv[1] in pylbo.cli.COMMANDS:
+        exit(pylbo.cli.main(sys.argv[1:]))
+
     parser = ArgumentParser()
     parser.add_argument("-i", "--datfile", dest="datfile")
     args = parser.parse_args()
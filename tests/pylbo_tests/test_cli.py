@@ -0,0 +1,111 @@
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+import pylbo
+import pytest
+from pylbo import cli
+from pylbo.utilities.datfiles.header import LegolasHeader
+
+utils = Path(__file__).resolve().parent / "utility_files"
+
+
+def test_read_header(ds_v112):
+    header = pylbo.read_header(ds_v112.datfile)
+    assert isinstance(header, LegolasHeader)
+    assert str(header.legolas_version) == str(ds_v112.legolas_version)
+    for key in ("geometry", "gridpoints", "eq_type", "nb_eigenvalues", "parameters"):
+        assert header[key] == ds_v112.header[key]
+    assert np.all(header["ef_written_idxs"] == ds_v112.header["ef_written_idxs"])
+
+
+def test_read_header_v200(ds_v200_mri_efs):
+    header = pylbo.read_header(ds_v200_mri_efs.datfile)
+    assert header["offsets"] == ds_v200_mri_efs.header["offsets"]
+    assert header["physics"] == ds_v200_mri_efs.header["physics"]
+
+
+def test_read_header_invalid():
+    with pytest.raises(ValueError):
+        pylbo.read_header([utils / "v1.1.2_datfile_efs.dat"])
+    with pytest.raises(FileNotFoundError):
+        pylbo.read_header("unknown_file.dat")
+
+
+def test_read_record(ds_v114_subset_defs):
+    record = cli.read_record(ds_v114_subset_defs.datfile)
+    assert record["error"] is None
+    assert record["version"] == "1.1.4"
+    assert record["equilibrium"] == ds_v114_subset_defs.eq_type
+    assert record["eigenvalues"] == len(ds_v114_subset_defs.eigenvalues)
+    assert record["efs_written"] == len(ds_v114_subset_defs.header["ef_written_idxs"])
+    assert record["contents"] == ["efs", "derived_efs"]
+
+
+def test_read_record_invalid(tmpdir):
+    datfile = tmpdir / "invalid.dat"
+    datfile.write_bytes(b"not a datfile")
+    record = cli.read_record(datfile)
+    assert record["error"] is not None
+
+
+def test_read_records_parallel(monkeypatch):
+    datfiles = sorted(utils.glob("*.dat"))
+    monkeypatch.setattr(cli, "_MIN_FILES_PARALLEL", 0)
+    records = cli.read_records(datfiles, jobs=2)
+    assert records == [cli.read_record(datfile) for datfile in datfiles]
+
+
+def test_find_datfiles(tmpdir):
+    rootdir = tmpdir / "find_datfiles"
+    subdir = rootdir / "sub"
+    subdir.mkdir(parents=True, exist_ok=True)
+    for path in (rootdir / "a.dat", subdir / "b.dat", rootdir / "c.log"):
+        path.write_text("")
+    assert len(cli._find_datfiles([rootdir])) == 1
+    assert len(cli._find_datfiles([rootdir], recursive=True)) == 2
+
+
+def test_cli_ls(capsys):
+    assert cli.main(["ls", str(utils)]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == list(cli.LS_COLUMNS)
+    assert len(lines) == 1 + len(list(utils.glob("*.dat")))
+
+
+def test_cli_ls_json(capsys):
+    assert cli.main(["ls", "-f", "json", str(utils / "v1.1.2_datfile_eta.dat")]) == 0
+    (record,) = json.loads(capsys.readouterr().out)
+    assert record["equilibrium"] == "resistive_tearing_flow"
+    assert record["parameters"]["alpha"] == pytest.approx(4.73884)
+    assert "error" not in record
+
+
+def test_cli_ls_csv(tmpdir):
+    output = tmpdir / "files.csv"
+    assert cli.main(["ls", "-f", "csv", "-o", str(output), str(utils)]) == 0
+    with open(output) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == len(list(utils.glob("*.dat")))
+    assert "parameters.k2" in rows[0]
+
+
+def test_cli_info(capsys):
+    assert cli.main(["info", str(utils / "v2.0.0_mri_subset_efs.dat")]) == 0
+    out = capsys.readouterr().out
+    assert "equilibrium   : MRI_accretion" in out
+    assert "contents      : efs,derived_efs,eigenvectors,residuals" in out
+
+
+def test_cli_summary(capsys):
+    assert cli.main(["summary", "-f", "json", str(utils)]) == 0
+    rows = json.loads(capsys.readouterr().out)
+    assert sum(row["files"] for row in rows) == len(list(utils.glob("*.dat")))
+    (adiabatic,) = [row for row in rows if row["equilibrium"] == "adiabatic_homo"]
+    assert adiabatic["gridpoints"] == [6, 31]
+
+
+def test_cli_unreadable_file(capsys):
+    assert cli.main(["ls", str(utils / "unknown.dat")]) == 1
+    assert "unknown.dat" in capsys.readouterr().err
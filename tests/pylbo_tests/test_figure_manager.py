@@ -1,6 +1,12 @@
+import gc
+import io
+
 import matplotlib.pyplot as plt
+import psutil
+import pylbo
 import pytest
 from pylbo.utilities.toolbox import get_axis_geometry
+from pylbo.visualisation.figure_window import FigureWindow
 from pylbo.visualisation.spectra.spectrum_figure import SpectrumFigure
 
 
@@ -258,3 +264,76 @@ def test_add_subplot_matrix_bottom():
     assert get_axis_geometry(p.ax) == (2, 1, 0)
     assert get_axis_geometry(new_ax) == (2, 1, 1)
     assert len(fig.get_axes()) == 10
+
+
+# ========== TESTS FOR THE FIGURE STACK ==========
+def test_release():
+    p = SpectrumFigure(figlabel="test")
+    assert p.figure_id in p.figure_ids
+    p.release()
+    assert p.figure_id not in p.figure_ids
+    assert not plt.fignum_exists(p.figure_id)
+
+
+def test_context_manager(ds_v112):
+    with pylbo.plot_spectrum(ds_v112) as p:
+        p.add_eigenfunctions()
+        assert p.figure_id in p.figure_ids
+    assert p.figure_id not in FigureWindow.figure_stack
+    assert not p._mpl_callbacks
+    assert not plt.fignum_exists(p.fig.number)
+
+
+def test_closed_figures_removed_from_stack():
+    p = SpectrumFigure(figlabel="test")
+    plt.close(p.fig)
+    assert p.figure_id not in p.figure_ids
+
+
+def test_figure_ids_unique_after_release():
+    p1 = SpectrumFigure(figlabel="test")
+    p2 = SpectrumFigure(figlabel="test")
+    p1.release()
+    p3 = SpectrumFigure(figlabel="test")
+    assert p3.figure_id not in (p1.figure_id, p2.figure_id)
+    assert p3.fig is not p2.fig
+
+
+def test_max_figures(monkeypatch):
+    monkeypatch.setattr(FigureWindow, "max_figures", 3)
+    windows = [SpectrumFigure(figlabel="test") for _ in range(5)]
+    assert windows[-1].figure_ids == [p.figure_id for p in windows[2:]]
+    assert not any(plt.fignum_exists(p.figure_id) for p in windows[:2])
+
+
+def test_no_max_figures_by_default():
+    assert FigureWindow.max_figures is None
+    windows = [SpectrumFigure(figlabel="test") for _ in range(5)]
+    assert all(p.figure_id in windows[-1].figure_ids for p in windows)
+    assert all(plt.fignum_exists(p.figure_id) for p in windows)
+
+
+def _plot_and_save(nb_cycles):
+    for i in range(nb_cycles):
+        p = SpectrumFigure(figlabel="memory", figsize=(1, 1))
+        p.ax.set_axis_off()
+        p.ax.plot([0, 1], [0, 1])
+        p.fig.savefig(io.BytesIO(), format="png", dpi=10)
+        # both explicit releases and figures closed through pyplot
+        if i % 2 == 0:
+            p.release()
+        else:
+            plt.close(p.fig)
+
+
+def test_memory_flat_over_plot_save_cycles():
+    process = psutil.Process()
+    _plot_and_save(50)
+    gc.collect()
+    rss_start = process.memory_info().rss
+    _plot_and_save(1000)
+    gc.collect()
+    # figures kept alive by the stack would retain about 0.5 MB each
+    assert process.memory_info().rss - rss_start < 50e6
+    # windows of released and closed figures are dropped from the stack
+    assert len(FigureWindow.figure_stack) <= 1
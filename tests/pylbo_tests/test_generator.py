@@ -1,3 +1,4 @@
+import shutil
 from pathlib import Path
 
 import f90nml
@@ -5,6 +6,19 @@ import numpy as np
 import pylbo
 import pytest
 from pylbo.automation.generator import ParfileGenerator
+from pylbo.automation.parfile_writer import (
+    ParfileBundle,
+    ParfileTemplate,
+    format_value,
+)
+from pylbo.automation.sweeps import (
+    LatinHypercube,
+    Product,
+    Sobol,
+    Zip,
+    load_sweep_manifest,
+    write_sweep_manifest,
+)
 
 
 def test_basename_none(tmpdir):
@@ -117,3 +131,223 @@ def test_datfile_name_generation_multiruns(tmpdir):
     container = [f90nml.read(file) for file in parfiles]
     for i, config in enumerate(container, start=1):
         assert config["savelist"]["basename_datfile"] == f"{i:04d}parfile"
+
+
+def test_sweep_product():
+    sweep = Product(Zip(a=[1, 2], b=[3, 4]), c=[5, 6, 7])
+    assert sweep.names == ("a", "b", "c")
+    assert len(sweep) == 6
+    assert list(sweep) == [sweep[i] for i in range(6)]
+    assert sweep[0] == (1, 3, 5)
+    assert sweep[4] == (2, 4, 6)
+    assert sweep[-1] == (2, 4, 7)
+    assert sweep.get_run(1) == {"a": 1, "b": 3, "c": 6}
+    with pytest.raises(IndexError):
+        sweep[6]
+
+
+def test_sweep_zip_invalid():
+    with pytest.raises(ValueError):
+        Zip(a=[1, 2], b=[1, 2, 3])
+    with pytest.raises(ValueError):
+        Product(Zip(a=[1, 2]), a=[3, 4])
+
+
+def test_latin_hypercube():
+    sweep = LatinHypercube(20, seed=3, k2=(0, 1), k3=(-2, 2))
+    samples = np.array(list(sweep))
+    assert samples.shape == (20, 2)
+    # every interval of every parameter is sampled exactly once
+    assert sorted(np.floor(samples[:, 0] * 20)) == list(range(20))
+    assert sorted(np.floor((samples[:, 1] + 2) / 4 * 20)) == list(range(20))
+    assert np.array_equal(
+        samples, list(LatinHypercube(20, seed=3, k2=(0, 1), k3=(-2, 2)))
+    )
+
+
+def test_sobol():
+    pytest.importorskip("scipy")
+    samples = np.array(list(Sobol(16, seed=1, k2=(0, 1), k3=(1, 2))))
+    assert samples.shape == (16, 2)
+    assert np.all((samples[:, 1] >= 1) & (samples[:, 1] <= 2))
+
+
+def test_sweep_manifest_roundtrip(tmpdir):
+    sweep = Product(
+        Zip(k2=np.linspace(0, 1, 3), gridpoints=[10, 20, 30]),
+        LatinHypercube(4, seed=0, k3=(0, 1)),
+    )
+    write_sweep_manifest(tmpdir / "sweep_roundtrip.json", sweep, info="test")
+    loaded, info = load_sweep_manifest(tmpdir / "sweep_roundtrip.json")
+    assert info == {"names": ["k2", "gridpoints", "k3"], "nb_runs": 12, "info": "test"}
+    assert list(loaded) == list(sweep)
+    assert isinstance(loaded[0][1], int)
+
+
+def test_generate_sweep(tmpdir):
+    output_dir = tmpdir / "sweep"
+    output_dir.mkdir(exist_ok=True)
+    sweep = Product(k2=[0.5, 1.0, 1.5], gridpoints=[20, 40])
+    parfiles = pylbo.generate_parfiles(
+        {
+            "equilibrium_type": "adiabatic_homo",
+            "parameters": {"k3": 2.0},
+            "solver": "QR-invert",
+            "sweep": sweep,
+        },
+        basename="sweep",
+        output_dir=output_dir,
+    )
+    assert len(parfiles) == 6
+    sweep_manifest, info = load_sweep_manifest(output_dir / "parfiles" / "sweep.json")
+    for i, parfile in enumerate(parfiles):
+        namelist = f90nml.read(parfile)
+        assert namelist["paramlist"]["k2"] == sweep[i][0]
+        assert namelist["paramlist"]["k3"] == 2.0
+        assert namelist["gridlist"]["gridpoints"] == sweep[i][1]
+        assert namelist["equilibriumlist"]["use_defaults"] is False
+        assert namelist["savelist"]["basename_datfile"] == f"{i + 1:04d}sweep"
+        assert sweep_manifest.get_run(i) == {
+            "k2": sweep[i][0],
+            "gridpoints": sweep[i][1],
+        }
+    assert info["first_parfile"] == Path(parfiles[0]).name
+    assert info["last_parfile"] == Path(parfiles[-1]).name
+
+
+def test_generate_sweep_invalid(tmpdir):
+    with pytest.raises(ValueError):
+        pylbo.generate_parfiles(
+            {"gridpoints": 10, "sweep": Product(gridpoints=[10, 20])}, output_dir=tmpdir
+        )
+    with pytest.raises(ValueError):
+        pylbo.generate_parfiles(
+            {"number_of_runs": 3, "sweep": Product(k2=[1, 2])}, output_dir=tmpdir
+        )
+    with pytest.raises(TypeError):
+        pylbo.generate_parfiles(
+            {"sweep": LatinHypercube(2, gridpoints=(10, 20))}, output_dir=tmpdir
+        )
+
+
+def test_iter_parfiles_is_lazy(tmpdir):
+    output_dir = tmpdir / "lazy_sweep"
+    shutil.rmtree(output_dir, ignore_errors=True)
+    output_dir.mkdir()
+    sweep = Product(k2=np.linspace(0, 1, 100), k3=np.linspace(0, 1, 100))
+    parfiles = pylbo.iter_parfiles(
+        {"equilibrium_type": "adiabatic_homo", "sweep": sweep}, output_dir=output_dir
+    )
+    first = [next(parfiles) for _ in range(3)]
+    assert len(list((output_dir / "parfiles").glob("*.par"))) == 3
+    assert f90nml.read(first[2])["paramlist"]["k3"] == pytest.approx(2 / 99)
+    parfiles.close()
+
+
+def _f90nml_text(namelists, filepath):
+    f90nml.write(namelists, filepath, force=True)
+    return Path(filepath).read_text()
+
+
+def test_format_value(tmpdir):
+    values = [True, False, 0, -3, np.int64(7), 0.1, 1e20, 1e-05, -0.0, np.float64(2.5)]
+    values += [complex(1, -2), 1.5j, "it's", 'say "hi"', "back\\slash", ""]
+    for value in values:
+        text = _f90nml_text({"n": {"a": value}}, tmpdir / "value.par")
+        assert text == f"&n\n    a = {format_value(value)}\n/\n"
+    with pytest.raises(ValueError):
+        format_value(np.bool_(True))
+
+
+def test_parfile_template_matches_f90nml(tmpdir):
+    namelists = {
+        "savelist": {"basename_datfile": "run", "write_matrices": False},
+        "paramlist": {"k2": 0.5, "cte_T0": 1e-05, "cte_B02": 2, "cte_rho0": 1e20},
+        "solvelist": {"solver": "arnoldi", "sigma": complex(1, 2)},
+        "gridlist": {"gridpoints": 50, "geometry": "Cartesian"},
+        "emptylist": {},
+    }
+    varying = [("paramlist", "cte_T0"), ("savelist", "basename_datfile")]
+    template = ParfileTemplate(namelists, varying)
+    for values in ([1e-05, "run"], [-2.5, "it's run"], [np.float64(3), "0001run"]):
+        namelists["paramlist"]["cte_T0"] = values[0]
+        namelists["savelist"]["basename_datfile"] = values[1]
+        expected = _f90nml_text(namelists, tmpdir / "template.par")
+        assert template.render(values) == expected
+    with pytest.raises(ValueError):
+        ParfileTemplate(namelists, [("paramlist", "unknown")])
+
+
+def test_generate_parfiles_matches_f90nml(tmpdir):
+    output_dir = tmpdir / "template_runs"
+    output_dir.mkdir(exist_ok=True)
+    parfiles = pylbo.generate_parfiles(
+        {
+            "number_of_runs": 3,
+            "gridpoints": [10, 20, 30],
+            "solver": "arnoldi",
+            "sigma": 1.0,
+            "equilibrium_type": "adiabatic_homo",
+            "parameters": {"k2": np.linspace(0, 1, 3), "cte_T0": 1e-05},
+        },
+        basename="run",
+        output_dir=output_dir,
+    )
+    for i, parfile in enumerate(parfiles):
+        expected = {
+            "gridlist": {"gridpoints": 10 * (i + 1)},
+            "solvelist": {"solver": "arnoldi", "sigma": 1 + 0j},
+            "equilibriumlist": {
+                "equilibrium_type": "adiabatic_homo",
+                "use_defaults": False,
+            },
+            "paramlist": {"k2": np.linspace(0, 1, 3)[i], "cte_T0": 1e-05},
+            "savelist": {"basename_datfile": f"{i + 1:04d}run"},
+        }
+        text = _f90nml_text(expected, tmpdir / "expected.par")
+        assert Path(parfile).read_text() == text
+
+
+def test_generate_parfiles_parallel(tmpdir):
+    sweep = Product(k2=np.linspace(0, 1, 30), gridpoints=list(range(10, 30)))
+    config = {"equilibrium_type": "adiabatic_homo", "sweep": sweep}
+    texts = []
+    for nb_workers in (1, 3):
+        output_dir = tmpdir / f"parallel_{nb_workers}"
+        shutil.rmtree(output_dir, ignore_errors=True)
+        output_dir.mkdir()
+        parfiles = pylbo.generate_parfiles(
+            config, basename="run", output_dir=output_dir, nb_workers=nb_workers
+        )
+        names = [Path(parfile).name for parfile in parfiles]
+        assert names == [f"{i:04d}run.par" for i in range(1, 601)]
+        texts.append([Path(parfile).read_text() for parfile in parfiles])
+    assert texts[0] == texts[1]
+    assert f90nml.read(parfiles[-1])["gridlist"]["gridpoints"] == 29
+    with pytest.raises(ValueError):
+        pylbo.generate_parfiles(config, output_dir=output_dir, nb_workers=0)
+
+
+def test_generate_parfiles_bundle(tmpdir):
+    output_dir = tmpdir / "bundle"
+    shutil.rmtree(output_dir, ignore_errors=True)
+    output_dir.mkdir()
+    config = {
+        "equilibrium_type": "adiabatic_homo",
+        "sweep": Product(k2=[0.1, 0.2], k3=[1.0, 2.0, 3.0]),
+    }
+    parfiles = pylbo.generate_parfiles(config, basename="run", output_dir=output_dir)
+    (bundle_file,) = pylbo.generate_parfiles(
+        config, basename="run", output_dir=output_dir, nb_workers=2, bundle=True
+    )
+    assert Path(bundle_file).name == "run.parbundle"
+    bundle = ParfileBundle(bundle_file)
+    assert len(bundle) == 6
+    assert bundle.names == [Path(parfile).name for parfile in parfiles]
+    for i, (name, text) in enumerate(bundle):
+        assert text == Path(parfiles[i]).read_text() == bundle.read(i)
+    name, namelist = list(bundle.read_namelists())[-1]
+    assert namelist["paramlist"]["k3"] == 3.0
+    bundle.remove()
+    assert not Path(bundle_file).exists()
+    assert not bundle.index_file.exists()
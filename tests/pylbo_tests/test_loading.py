@@ -1,8 +1,52 @@
+import subprocess
+import sys
+
 import numpy as np
 import pylbo
 import pytest
 
 
+def _run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, check=True
+    )
+
+
+def test_load_without_matplotlib(datv112_eta):
+    code = (
+        "import sys, pylbo\n"
+        f"ds = pylbo.load({str(datv112_eta)!r})\n"
+        "assert len(ds.eigenvalues) > 0\n"
+        "print(sorted({'matplotlib', 'tkinter'} & set(sys.modules)))\n"
+    )
+    result = _run_python("-c", code)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_import_time():
+    # import-time benchmark, heavy dependencies should only load on first use
+    result = _run_python("-X", "importtime", "-c", "import pylbo")
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line.split("|")
+        timings[module.strip()] = int(cumulative_us)
+    for module in ("matplotlib", "tkinter", "f90nml", "pylbo.visualisation.api"):
+        assert module not in timings
+    # generous bound, the import takes tens of milliseconds on a typical machine
+    assert timings["pylbo"] < 2_000_000
+
+
+def test_lazy_attributes():
+    for name in pylbo.__all__:
+        assert name in dir(pylbo)
+        assert getattr(pylbo, name) is not None
+    assert pylbo.run_legolas.__module__ == "pylbo.automation.api"
+    with pytest.raises(AttributeError):
+        pylbo.unknown_attribute
+
+
 def test_invalid_file():
     with pytest.raises(FileNotFoundError):
         pylbo.load("unknown_file")
@@ -0,0 +1,69 @@
+import numpy as np
+import pylbo
+import pytest
+from pylbo.visualisation.modes.mode_data import ModeVisualisationData
+from pylbo.visualisation.modes.time_stepper import ModeTimeStepper
+
+omegas = [1.19029 + 3.75969j, 0.65179 + 1.32900j]
+u2 = np.linspace(0, 2, 15)
+u3 = np.linspace(0, 1, 5)
+times = np.linspace(0, 2, 7)
+
+
+@pytest.fixture(scope="function")
+def data(ds_v121_rti_khi):
+    return ModeVisualisationData(
+        ds_v121_rti_khi, omegas, "rho", complex_factor=2 - 1j, add_background=True
+    )
+
+
+def test_stepper_shape(data):
+    stepper = ModeTimeStepper(data, u2, u3)
+    assert stepper.shape == (len(data.ds.ef_grid), len(u2), len(u3))
+    assert stepper.get_solutions(times).shape == (len(times), *stepper.shape)
+
+
+def test_stepper_solutions(data):
+    stepper = ModeTimeStepper(data, u2, u3, name="v1")
+    solutions = stepper.get_solutions(times)
+    for t, solution in zip(times, solutions):
+        expected = data.get_separable_mode_solution(u2, u3, t, name="v1")
+        assert np.allclose(solution, expected)
+
+
+def test_stepper_background(data):
+    stepper = ModeTimeStepper(data, u2, u3, add_background=True)
+    solutions = stepper.get_solutions(times)
+    bg = data.get_background(shape=stepper.shape)
+    for t, solution in zip(times, solutions):
+        expected = data.get_separable_mode_solution(u2, u3, t) + bg
+        assert np.allclose(solution, expected)
+
+
+def test_stepper_iter_batches(data):
+    stepper = ModeTimeStepper(data, u2, u3)
+    expected = stepper.get_solutions(times)
+    iterated = list(stepper.iter_solutions(times, batch_size=3))
+    assert np.allclose([t for t, _ in iterated], times)
+    assert np.allclose([solution for _, solution in iterated], expected)
+
+
+def test_stepper_float32(data):
+    stepper = ModeTimeStepper(data, u2, u3)
+    solutions = stepper.get_solutions(times, dtype="float32")
+    assert solutions.dtype == np.float32
+    assert np.allclose(solutions, stepper.get_solutions(times), atol=1e-4)
+
+
+def test_stepper_invalid_out(data):
+    stepper = ModeTimeStepper(data, u2, u3)
+    with pytest.raises(ValueError):
+        stepper.get_solutions(times, out=np.empty(stepper.shape))
+
+
+def test_stepper_matches_2d_view(ds_v121_rti_khi):
+    view = pylbo.plot_2d_slice(
+        ds_v121_rti_khi, omegas, "rho", u2, 0, 0, "z", add_background=True
+    )
+    ((t, solution),) = view.get_time_stepper().iter_solutions(0)
+    assert np.allclose(solution.reshape(view.solutions.shape), view.solutions)
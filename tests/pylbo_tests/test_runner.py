@@ -1,17 +1,55 @@
 import copy
+import json
 import multiprocessing
 import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from types import SimpleNamespace
 
+import numpy as np
+import psutil
 import pylbo
 import pytest
+from pylbo.automation import affinity
+from pylbo.automation.adaptive import AdaptiveSweep
 from pylbo.automation.api import run_legolas
+from pylbo.automation.cache import get_run_key
+from pylbo.automation.executors import BatchExecutor, SubprocessPool
+from pylbo.automation.jobs import LegolasJob
 from pylbo.automation.runner import LegolasRunner
+from pylbo.automation.scheduler import (
+    CostModel,
+    JobScheduler,
+    get_run_features,
+    parse_memory,
+)
+from pylbo.automation.telemetry import ProcessMonitor, fit_scaling, load_reports
+from pylbo.data_containers import LegolasDataSet
 
 # get executable from LEGOLASDIR environment variable
 DEFAULT_EXEC = Path(os.environ["LEGOLASDIR"]) / "legolas"
 
 
+def _fake_executable(path, script):
+    exe = Path(path) / "fake_legolas"
+    exe.write_text(f"#!/bin/sh\n{script}\n")
+    exe.chmod(0o755)
+    return exe
+
+
+#: shell snippet creating the datfile of the parfile passed to a fake executable
+_TOUCH_DATFILE = (
+    'folder=$(sed -n "s/.*output_folder = \'\\(.*\\)\'/\\1/p" "$2")\n'
+    'base=$(sed -n "s/.*basename_datfile = \'\\(.*\\)\'/\\1/p" "$2")\n'
+    'touch "$folder/$base.dat"'
+)
+
+
 def test_invalid_parfiles():
     with pytest.raises(FileNotFoundError):
         run_legolas(["unknown_parfile.par"])
@@ -36,6 +74,12 @@ def test_cpu_count(default_parfile):
     assert run.nb_cpus == cpus_available
 
 
+@pytest.mark.parametrize("nb_cpus", [0, -1])
+def test_invalid_cpu_count(default_parfile, nb_cpus):
+    with pytest.raises(ValueError):
+        run_legolas(default_parfile, nb_cpus=nb_cpus, executable=DEFAULT_EXEC)
+
+
 def test_multirun(default_pf_dict):
     pf_dict = copy.deepcopy(default_pf_dict)
     pf_dict["number_of_runs"] = 4
@@ -49,3 +93,630 @@ def test_multirun(default_pf_dict):
             Path(pf_dict["output_folder"]) / f"{i:04d}{pf_dict['basename_datfile']}.dat"
         )
         assert filepath.is_file()
+
+
+def test_multirun_manifest(default_pf_dict, tmpdir):
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict["number_of_runs"] = 3
+    pf_dict["gridpoints"] = [10, 12, 14]
+    (tmpdir / "manifest").mkdir(exist_ok=True)
+    parfiles = pylbo.generate_parfiles(pf_dict, output_dir=tmpdir / "manifest")
+    cwd = Path.cwd()
+    manifest = pylbo.run_legolas(parfiles, nb_cpus=2, executable=DEFAULT_EXEC)
+    assert Path.cwd() == cwd
+    assert [job["parfile"] for job in manifest] == parfiles
+    for job in manifest:
+        assert job["status"] == "completed"
+        assert job["returncode"] == 0
+        assert job["attempts"] == 1
+        assert job["wall_time"] > 0
+        assert Path(job["datfile"]).is_file()
+        assert Path(job["stdout"]).is_file()
+    manifest_file = Path(pf_dict["output_folder"]) / "legolas_jobs" / "manifest.json"
+    assert json.loads(manifest_file.read_text()) == manifest
+
+
+def test_run_bundle(default_pf_dict, tmpdir):
+    rundir = tmpdir / "run_bundle"
+    shutil.rmtree(rundir, ignore_errors=True)
+    rundir.mkdir()
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict.update({"output_folder": str(rundir), "number_of_runs": 2})
+    pf_dict["gridpoints"] = [10, 12]
+    (bundle,) = pylbo.generate_parfiles(
+        pf_dict, basename="run", output_dir=rundir, bundle=True
+    )
+    manifest = run_legolas(bundle, nb_cpus=2, executable=DEFAULT_EXEC)
+    parfiles = [Path(job["parfile"]) for job in manifest]
+    assert [parfile.name for parfile in parfiles] == ["0001run.par", "0002run.par"]
+    assert not any(parfile.exists() for parfile in parfiles)
+    assert all(job["status"] == "completed" for job in manifest)
+    assert pylbo.load(manifest[1]["datfile"]).gridpoints == 12
+    run_legolas(bundle, executable=DEFAULT_EXEC, remove_parfiles=True)
+    assert not Path(bundle).exists()
+    assert not (rundir / "parfiles").exists()
+
+
+def test_subprocess_pool_single_thread(default_parfile, tmpdir):
+    exe = _fake_executable(tmpdir, f"sleep 0.2\n{_TOUCH_DATFILE}")
+    parfiles = default_parfile * 4
+    threads = set()
+
+    def _get_threads(job):
+        threads.update(thread.name for thread in threading.enumerate())
+
+    runner = LegolasRunner(parfiles, False, 4, exe, work_dir=tmpdir / "pool_jobs")
+    runner.execute(callback=_get_threads)
+    assert all(job.status == "completed" for job in runner.jobs)
+    assert all(job.telemetry["max_threads"] >= 1 for job in runner.jobs)
+    # all processes are managed by the thread of the pool
+    assert {name for name in threads if name.startswith("pylbo")} == {
+        "pylbo-subprocess-pool"
+    }
+    pool = SubprocessPool()
+    pool.shutdown()
+    with pytest.raises(RuntimeError):
+        pool.submit_job(runner.jobs[0])
+
+
+@pytest.mark.parametrize(
+    "get_executor",
+    [
+        lambda: ThreadPoolExecutor(max_workers=2),
+        lambda: ProcessPoolExecutor(max_workers=2),
+        lambda: BatchExecutor(batch_size=2, max_delay=0.1, max_batches=2),
+    ],
+    ids=["threads", "processes", "batches"],
+)
+def test_executor_backends(get_executor, default_pf_dict, tmpdir):
+    rundir = tmpdir / "executor_backends"
+    shutil.rmtree(rundir, ignore_errors=True)
+    rundir.mkdir()
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict.update({"output_folder": str(rundir), "number_of_runs": 3})
+    pf_dict["gridpoints"] = [10, 12, 14]
+    parfiles = pylbo.generate_parfiles(pf_dict, output_dir=rundir)
+    with get_executor() as executor:
+        manifest = run_legolas(
+            parfiles,
+            nb_cpus=2,
+            executable=DEFAULT_EXEC,
+            remove_parfiles=True,
+            executor=executor,
+        )
+    for job, gridpoints in zip(manifest, [10, 12, 14]):
+        assert job["status"] == "completed"
+        assert job["attempts"] == 1
+        assert job["peak_rss"] > 0
+        assert pylbo.load(job["datfile"]).gridpoints == gridpoints
+    assert not (rundir / "parfiles").exists()
+
+
+def test_executor_cancel(default_pf_dict, tmpdir):
+    rundir = tmpdir / "executor_cancel"
+    shutil.rmtree(rundir, ignore_errors=True)
+    rundir.mkdir()
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict.update({"output_folder": str(rundir), "number_of_runs": 4})
+    pf_dict["gridpoints"] = [10] * 4
+    parfiles = pylbo.generate_parfiles(pf_dict, output_dir=rundir)
+    exe = _fake_executable(rundir, "sleep 30")
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        runner = LegolasRunner(parfiles, True, 2, exe, executor=executor)
+        thread = threading.Thread(target=runner.execute)
+        thread.start()
+        while not (runner.jobs[0].job_dir / "stdout.log").is_file():
+            time.sleep(0.05)
+        start = time.perf_counter()
+        runner.cancel()
+        thread.join()
+    assert time.perf_counter() - start < 5
+    assert [job.status for job in runner.jobs] == ["cancelled"] * 4
+    assert runner.jobs[0].attempts == 1
+    assert runner.jobs[-1].attempts == 0
+    # parfiles of runs that did not complete are kept
+    assert all(Path(parfile).is_file() for parfile in parfiles)
+
+
+def test_relative_output_folder(default_pf_dict, tmpdir):
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict["output_folder"] = "relative_output"
+    (tmpdir / "relative").mkdir(exist_ok=True)
+    parfile = pylbo.generate_parfiles(pf_dict, output_dir=tmpdir / "relative")
+    exe_dir = tmpdir / "relative_exe"
+    exe_dir.mkdir(exist_ok=True)
+    exe = exe_dir / "legolas"
+    shutil.copy(DEFAULT_EXEC, exe)
+    (job,) = pylbo.run_legolas(parfile, executable=exe, work_dir=tmpdir / "jobs")
+    assert job["status"] == "completed"
+    assert Path(job["datfile"]) == exe_dir / "relative_output" / "default_ds.dat"
+    assert Path(job["datfile"]).is_file()
+
+
+def test_failed_run_retries(default_parfile, tmpdir):
+    exe = _fake_executable(tmpdir, "echo 'something went wrong' >&2; exit 3")
+    (job,) = pylbo.run_legolas(
+        default_parfile, executable=exe, retries=2, remove_parfiles=True
+    )
+    assert job["status"] == "failed"
+    assert job["returncode"] == 3
+    assert job["attempts"] == 3
+    assert "something went wrong" in Path(job["stderr"]).read_text()
+    # parfiles of failed runs are kept
+    assert Path(job["parfile"]).is_file()
+
+
+def test_timeout_kills_process_tree(default_parfile, tmpdir):
+    pidfile = tmpdir / "child.pid"
+    exe = _fake_executable(tmpdir, f"sleep 30 & echo $! > {pidfile}; wait")
+    start = time.perf_counter()
+    (job,) = pylbo.run_legolas(default_parfile, executable=exe, timeout=0.5)
+    assert time.perf_counter() - start < 10
+    assert job["status"] == "timeout"
+    assert job["returncode"] < 0
+    child_pid = int(pidfile.read_text())
+    assert not psutil.pid_exists(child_pid) or (
+        psutil.Process(child_pid).status() == psutil.STATUS_ZOMBIE
+    )
+
+
+def test_invalid_timeout(default_parfile):
+    with pytest.raises(ValueError):
+        run_legolas(default_parfile, executable=DEFAULT_EXEC, timeout=0)
+
+
+def test_threads_per_run(default_parfile, tmpdir):
+    exe = _fake_executable(
+        tmpdir,
+        "echo $OMP_NUM_THREADS $OPENBLAS_NUM_THREADS $MKL_NUM_THREADS\n"
+        f"{_TOUCH_DATFILE}",
+    )
+    (job,) = pylbo.run_legolas(default_parfile, executable=exe, threads_per_run=1)
+    assert job["status"] == "completed"
+    assert job["cpus"] is None
+    assert Path(job["stdout"]).read_text().strip() == "1 1 1"
+
+
+@pytest.mark.skipif(
+    not hasattr(psutil.Process, "cpu_affinity"), reason="no cpu affinity support"
+)
+def test_pin_cpus(default_parfile, tmpdir):
+    exe = _fake_executable(
+        tmpdir, f"echo $OMP_NUM_THREADS; sleep 0.2\n{_TOUCH_DATFILE}"
+    )
+    (job,) = pylbo.run_legolas(default_parfile, executable=exe, pin_cpus=True)
+    nb_available = len(affinity.get_available_cpus())
+    assert job["status"] == "completed"
+    assert len(job["cpus"]) == nb_available
+    assert Path(job["stdout"]).read_text().strip() == str(nb_available)
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity"), reason="no sched_setaffinity support"
+)
+def test_pin_cpus_before_exec(default_parfile, tmpdir):
+    # the affinity is set in the child, before Legolas starts any thread
+    exe = _fake_executable(tmpdir, "grep Cpus_allowed_list /proc/self/status")
+    cpu = affinity.get_available_cpus()[-1]
+    job = LegolasJob(default_parfile[0], exe, tmpdir / "pinned_job", cpus=[cpu])
+    job.run()
+    assert Path(job.stdout).read_text().split() == ["Cpus_allowed_list:", str(cpu)]
+
+
+def test_threads_per_run_oversubscribed(default_parfile):
+    threads = len(affinity.get_available_cpus()) + 1
+    with pytest.raises(ValueError):
+        run_legolas(default_parfile, executable=DEFAULT_EXEC, threads_per_run=threads)
+
+
+def test_parse_cpulist():
+    assert affinity._parse_cpulist("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+
+
+@pytest.mark.parametrize(
+    "nb_sets, threads, expected",
+    [
+        (2, 3, [[0, 1, 2], [4, 5, 6]]),
+        (2, 4, [[0, 1, 2, 3], [4, 5, 6, 7]]),
+        (3, 2, [[0, 1], [2, 3], [4, 5]]),
+        # sets that do not fit on a single node span multiple nodes
+        (1, 6, [[0, 1, 2, 3, 4, 5]]),
+        (3, 3, [[0, 1, 2], [4, 5, 6], [3, 7, 8]]),
+    ],
+)
+def test_core_sets_numa(nb_sets, threads, expected):
+    nodes = [[0, 1, 2, 3], [4, 5, 6, 7], [8]]
+    sets = affinity.get_core_sets(
+        nb_sets, threads, cpus=list(range(9)), numa_nodes=nodes
+    )
+    assert sets == expected
+
+
+def test_core_sets_too_many():
+    with pytest.raises(ValueError):
+        affinity.get_core_sets(3, 3, cpus=list(range(8)), numa_nodes=[range(8)])
+
+
+def _job(name, gridpoints, solver="QR-invert", physics_type="mhd"):
+    namelist = {
+        "gridlist": {"gridpoints": gridpoints},
+        "physicslist": {"physics_type": physics_type},
+        "solvelist": {"solver": solver},
+    }
+    return SimpleNamespace(
+        parfile=Path(f"{name}.par"), features=get_run_features(namelist)
+    )
+
+
+def test_run_features():
+    features = get_run_features({"physicslist": {"physics_type": "hd"}})
+    assert features["gridpoints"] == 50
+    assert features["dim_matrix"] == 50 * 2 * 5
+    assert features["solver"] == "QR-invert"
+    assert features["number_of_eigenvalues"] == 10
+    assert get_run_features({"gridlist": {"gridpoints": 20}})["dim_matrix"] == 320
+
+
+def test_cost_model_estimate():
+    model = CostModel()
+    small, large = _job("small", 20).features, _job("large", 40).features
+    assert model.estimate(large)[0] == pytest.approx(8 * model.estimate(small)[0])
+    assert model.estimate(large)[1] > model.estimate(small)[1]
+    arnoldi = _job("arnoldi", 40, solver="arnoldi").features
+    assert model.estimate(arnoldi)[0] < model.estimate(large)[0]
+    assert model.estimate(arnoldi)[1] < model.estimate(large)[1]
+
+
+def test_cost_model_calibrate(tmpdir):
+    model = CostModel()
+    features = _job("run", 100).features
+    time, _ = model.estimate(features)
+    records = [
+        {**features, "status": "completed", "wall_time": 2 * time},
+        {**features, "status": "timeout", "wall_time": 100 * time},
+        {**features, "status": "completed", "wall_time": None},
+    ]
+    manifest = tmpdir / "calibration_manifest.json"
+    manifest.write_text(json.dumps(records))
+    calibrated = CostModel.from_manifests(manifest)
+    assert calibrated.estimate(features)[0] == pytest.approx(2 * time)
+    # solvers without measurements are corrected by the same factor
+    arnoldi = _job("arnoldi", 100, solver="arnoldi").features
+    assert calibrated.estimate(arnoldi)[0] == pytest.approx(
+        2 * model.estimate(arnoldi)[0]
+    )
+
+
+def test_scheduler_longest_first():
+    jobs = [_job("a", 10), _job("b", 40), _job("c", 20)]
+    scheduler = JobScheduler(jobs, nb_slots=1)
+    assert [job.parfile.stem for job in scheduler.pending] == ["b", "c", "a"]
+    (first,) = scheduler.next_jobs()
+    assert first.parfile.stem == "b"
+    assert scheduler.next_jobs() == []
+    scheduler.release(first)
+    assert [job.parfile.stem for job in scheduler.next_jobs()] == ["c"]
+
+
+def test_scheduler_memory_budget():
+    jobs = [_job("large1", 400), _job("large2", 400), _job("small", 10)]
+    model = CostModel()
+    large = model.estimate(jobs[0].features)[1]
+    scheduler = JobScheduler(jobs, nb_slots=3, memory_budget=1.5 * large)
+    # the second large run does not fit next to the first, the small one does
+    started = scheduler.next_jobs()
+    assert [job.parfile.stem for job in started] == ["large1", "small"]
+    assert scheduler.reserved_memory <= 1.5 * large
+    scheduler.release(started[0])
+    assert [job.parfile.stem for job in scheduler.next_jobs()] == ["large2"]
+
+
+def test_scheduler_over_budget_runs_alone():
+    jobs = [_job("huge", 1000), _job("small", 10)]
+    scheduler = JobScheduler(jobs, nb_slots=2, memory_budget="1M")
+    (huge,) = scheduler.next_jobs()
+    assert huge.parfile.stem == "huge"
+    scheduler.release(huge)
+    assert [job.parfile.stem for job in scheduler.next_jobs()] == ["small"]
+
+
+def test_scheduler_backfill_order():
+    # reference: start every pending job that fits, in longest-first order
+    rng = np.random.default_rng(1)
+    gridpoints = rng.integers(10, 400, size=200)
+    jobs = [_job(f"job{i}", int(n)) for i, n in enumerate(gridpoints)]
+    memory = {job.parfile: CostModel().estimate(job.features)[1] for job in jobs}
+    budget = 3 * np.median(list(memory.values()))
+    scheduler = JobScheduler(jobs, nb_slots=4, memory_budget=budget)
+    pending = scheduler.pending
+    running = []
+    while pending or running:
+        expected = []
+        for job in list(pending):
+            reserved = sum(memory[j.parfile] for j in running + expected)
+            fits = not (running or expected) or reserved + memory[job.parfile] <= budget
+            if len(running) + len(expected) < 4 and fits:
+                expected.append(job)
+                pending.remove(job)
+        assert scheduler.next_jobs() == expected
+        running += expected
+        done = running.pop(rng.integers(len(running)))
+        scheduler.release(done)
+    assert scheduler.nb_pending == 0
+
+
+def test_parse_memory():
+    assert parse_memory(1024) == 1024
+    assert parse_memory("2K") == 2048
+    assert parse_memory("1.5GB") == 1.5 * 1024**3
+    assert parse_memory("16GiB") == 16 * 1024**3
+
+
+def test_runner_starts_longest_first(default_pf_dict, tmpdir):
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict["number_of_runs"] = 3
+    pf_dict["gridpoints"] = [10, 30, 20]
+    (tmpdir / "longest_first").mkdir(exist_ok=True)
+    parfiles = pylbo.generate_parfiles(pf_dict, output_dir=tmpdir / "longest_first")
+    order = tmpdir / "longest_first" / "order.txt"
+    order.unlink(missing_ok=True)
+    exe = _fake_executable(tmpdir / "longest_first", f"echo $2 >> {order}")
+    manifest = pylbo.run_legolas(parfiles, executable=exe)
+    assert [entry["gridpoints"] for entry in manifest] == [10, 30, 20]
+    assert all(entry["estimated_time"] > 0 for entry in manifest)
+    started = [Path(line).name for line in order.read_text().split()]
+    assert started == [Path(parfiles[i]).name for i in (1, 2, 0)]
+
+
+def test_run_key_normalised():
+    namelist = {
+        "gridlist": {"gridpoints": 10, "geometry": "Cartesian"},
+        "savelist": {"output_folder": "output", "basename_datfile": "a"},
+    }
+    other = {
+        "SaveList": {"basename_datfile": "b", "show_results": False},
+        "gridlist": {"geometry": "Cartesian", "GRIDPOINTS": 10},
+    }
+    assert get_run_key(namelist, "exe") == get_run_key(other, "exe")
+    assert get_run_key(namelist, "exe") != get_run_key(namelist, "other_exe")
+    namelist["gridlist"]["gridpoints"] = 11
+    assert get_run_key(namelist, "exe") != get_run_key(other, "exe")
+
+
+def test_run_cache(default_pf_dict, tmpdir):
+    rundir = tmpdir / "run_cache"
+    shutil.rmtree(rundir, ignore_errors=True)
+    rundir.mkdir()
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict.update({"output_folder": str(rundir), "number_of_runs": 2})
+    pf_dict["gridpoints"] = [10, 12]
+    parfiles = pylbo.generate_parfiles(pf_dict, output_dir=rundir)
+    cache_dir = rundir / "cache"
+    manifest = run_legolas(parfiles, executable=DEFAULT_EXEC, cache_dir=cache_dir)
+    assert not any(entry["cached"] for entry in manifest)
+    assert len(list(cache_dir.glob("*/*.dat"))) == 2
+
+    # extend the sweep, in a different output folder
+    pf_dict["output_folder"] = str(rundir / "extended")
+    (rundir / "extended").mkdir()
+    pf_dict.update({"number_of_runs": 3, "gridpoints": [10, 12, 14]})
+    parfiles = pylbo.generate_parfiles(pf_dict, output_dir=rundir / "extended")
+    extended = run_legolas(parfiles, executable=DEFAULT_EXEC, cache_dir=cache_dir)
+    assert [entry["cached"] for entry in extended] == [True, True, False]
+    assert all(entry["status"] == "completed" for entry in extended)
+    assert extended[0]["wall_time"] is None
+    for old, new in zip(manifest, extended):
+        assert Path(old["datfile"]).read_bytes() == Path(new["datfile"]).read_bytes()
+    ds = pylbo.load(extended[1]["datfile"])
+    assert ds.gridpoints == 12
+    assert len(list(cache_dir.glob("*/*.dat"))) == 3
+
+
+def test_run_cache_protects_cached_files(default_parfile, tmpdir):
+    cache_dir = tmpdir / "protected_cache"
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    (job,) = run_legolas(default_parfile, executable=DEFAULT_EXEC, cache_dir=cache_dir)
+    (cached,) = cache_dir.glob("*/*.dat")
+    content = cached.read_bytes()
+    # another executable writing to the same datfile does not change the cache
+    exe_dir = tmpdir / "protected_cache_exe"
+    exe_dir.mkdir(exist_ok=True)
+    exe = _fake_executable(exe_dir, f"echo corrupted > {job['datfile']}")
+    run_legolas(default_parfile, executable=exe, cache_dir=cache_dir)
+    assert Path(job["datfile"]).read_text().strip() == "corrupted"
+    assert cached.read_bytes() == content
+
+
+def test_run_cache_missing_datfile(default_parfile, tmpdir):
+    rundir = tmpdir / "missing_datfile"
+    shutil.rmtree(rundir, ignore_errors=True)
+    rundir.mkdir()
+    exe = _fake_executable(rundir, "exit 0")
+    (job,) = run_legolas(
+        default_parfile, executable=exe, work_dir=rundir, cache_dir=rundir / "cache"
+    )
+    assert job["status"] == "failed"
+    assert (rundir / "manifest.json").is_file()
+    assert not list((rundir / "cache").glob("*/*.dat"))
+
+
+def test_run_and_load(default_pf_dict, tmpdir):
+    rundir = tmpdir / "run_and_load"
+    shutil.rmtree(rundir, ignore_errors=True)
+    rundir.mkdir()
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict.update({"output_folder": str(rundir), "number_of_runs": 3})
+    pf_dict["gridpoints"] = [10, 12, 14]
+    parfiles = pylbo.generate_parfiles(pf_dict, output_dir=rundir)
+    datasets = list(
+        pylbo.run_and_load(parfiles, nb_cpus=2, executable=DEFAULT_EXEC, retries=1)
+    )
+    assert sorted(ds.gridpoints for ds in datasets) == [10, 12, 14]
+    assert all(isinstance(ds, LegolasDataSet) for ds in datasets)
+    # finished runs are not marked as cancelled
+    assert len(list((rundir / "legolas_jobs").glob("*/stdout.log"))) == 3
+    assert not list((rundir / "legolas_jobs").glob("*/cancelled"))
+
+
+def test_run_and_load_raises(default_parfile, monkeypatch):
+    def _fail(self, *args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(LegolasRunner, "write_manifest", _fail)
+    with pytest.raises(OSError, match="disk full"):
+        list(pylbo.run_and_load(default_parfile, executable=DEFAULT_EXEC))
+
+
+def test_run_and_load_break_cancels(default_pf_dict, tmpdir):
+    rundir = tmpdir / "run_and_load_break"
+    shutil.rmtree(rundir, ignore_errors=True)
+    rundir.mkdir()
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict.update({"output_folder": str(rundir), "number_of_runs": 3})
+    pf_dict["gridpoints"] = [10] * 3
+    parfiles = pylbo.generate_parfiles(pf_dict, output_dir=rundir)
+    # only the first run completes, the others hang
+    flag = rundir / "started"
+    exe = _fake_executable(
+        rundir,
+        f'if [ ! -e {flag} ]; then touch {flag}; exec {DEFAULT_EXEC} "$@"; fi\n'
+        "sleep 30",
+    )
+    start = time.perf_counter()
+    for ds in pylbo.run_and_load(parfiles, executable=exe, work_dir=rundir):
+        assert ds.gridpoints == 10
+        break
+    assert time.perf_counter() - start < 10
+    manifest = json.loads((rundir / "manifest.json").read_text())
+    assert [job["status"] for job in manifest] == ["completed"] + ["cancelled"] * 2
+
+
+def test_process_monitor(tmpdir):
+    script = tmpdir / "allocate.py"
+    script.write_text(
+        "import time\nblock = bytearray(200 * 1024**2)\ntime.sleep(0.5)\n"
+    )
+    process = subprocess.Popen([sys.executable, str(script)])
+    monitor = ProcessMonitor(process.pid)
+    while process.poll() is None:
+        monitor.sample()
+        time.sleep(0.05)
+    usage = monitor.stop()
+    assert usage["peak_rss"] > 200 * 1024**2
+    assert usage["max_threads"] >= 1
+    assert usage["cpu_time"] > 0
+
+
+def test_telemetry_report(default_pf_dict, tmpdir):
+    rundir = tmpdir / "telemetry"
+    shutil.rmtree(rundir, ignore_errors=True)
+    rundir.mkdir()
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict.update({"output_folder": str(rundir), "number_of_runs": 2})
+    pf_dict["gridpoints"] = [10, 20]
+    parfiles = pylbo.generate_parfiles(pf_dict, output_dir=rundir)
+    manifest = run_legolas(parfiles, executable=DEFAULT_EXEC, threads_per_run=1)
+    for entry in manifest:
+        assert entry["peak_rss"] > 0
+        assert entry["threads_per_run"] == 1
+    records = load_reports(rundir)
+    assert [record["parfile"] for record in records] == parfiles
+    assert records[0]["solver"] == "QR-invert"
+    assert records[1]["gridpoints"] == 20
+    csv_records = load_reports(rundir / "telemetry.csv")
+    assert csv_records[1]["gridpoints"] == 20
+    assert csv_records[1]["peak_rss"] == records[1]["peak_rss"]
+
+    # runs are added to the existing report
+    pf_dict.update({"number_of_runs": 1, "gridpoints": 30, "basename_datfile": "new"})
+    parfile = pylbo.generate_parfiles(pf_dict, output_dir=rundir, basename="new")
+    run_legolas(parfile, executable=DEFAULT_EXEC)
+    assert [record["gridpoints"] for record in load_reports(rundir)] == [10, 20, 30]
+
+
+def test_fit_scaling():
+    records = [
+        {"status": "completed", "solver": "QR-invert", "gridpoints": n, "wall_time": t}
+        for n, t in ((10, 0.002), (20, 0.016), (40, 0.128))
+    ]
+    records.append({"status": "failed", "solver": "QR-invert", "gridpoints": 80})
+    records.append({"status": "completed", "solver": "QZ-direct", "gridpoints": 10})
+    fits = fit_scaling(records)
+    assert list(fits) == ["QR-invert"]
+    coefficient, exponent = fits["QR-invert"]
+    assert exponent == pytest.approx(3)
+    assert coefficient == pytest.approx(2e-6)
+
+
+def _run_synthetic(sweep, function):
+    while sweep._pending:
+        for point in sweep._pending:
+            sweep.results[point] = (function(*sweep.get_values(point)), None)
+        sweep.refine()
+
+
+def test_adaptive_sweep_refines_boundary():
+    # unstable outside a circle of radius 1
+    sweep = AdaptiveSweep(
+        {},
+        {"k2": (-2, 2), "k3": (-2, 2)},
+        quantity=None,
+        max_level=4,
+        tolerance=1,
+    )
+    _run_synthetic(sweep, lambda x, y: max(np.hypot(x, y) - 1, 0))
+    points, values = sweep.get_samples()
+    uniform = (4 * 2**4 + 1) ** 2
+    assert len(points) < uniform / 5
+    # the finest spacing is reached along the whole boundary
+    spacing = 4 / (4 * 2**4)
+    near_boundary = points[np.abs(np.hypot(*points.T) - 1) < spacing]
+    angles = np.sort(np.arctan2(near_boundary[:, 1], near_boundary[:, 0]))
+    assert np.max(np.diff(angles)) < 2 * spacing
+    assert np.all(np.isfinite(values))
+
+
+def test_adaptive_sweep_max_points():
+    def _get_sweep(**kwargs):
+        sweep = AdaptiveSweep({}, {"k2": (0, 1)}, None, initial_points=3, **kwargs)
+        for point in sweep._pending:
+            sweep.results[point] = (sweep.get_values(point)[0] - 0.3, None)
+        return sweep
+
+    # the sign change is refined first, the variation in the other cell next
+    sweep = _get_sweep()
+    assert [sweep.get_values(point) for point in sweep.refine(max_points=1)] == [
+        (0.25,)
+    ]
+    assert len(_get_sweep().refine()) == 2
+    assert len(_get_sweep(tolerance=1).refine()) == 1
+    assert len(_get_sweep().refine(max_points=0)) == 0
+    with pytest.raises(ValueError):
+        AdaptiveSweep({"number_of_runs": 2}, {"k2": (0, 1)}, quantity=None)
+
+
+def test_run_adaptive_sweep(default_pf_dict, tmpdir):
+    rundir = tmpdir / "adaptive"
+    shutil.rmtree(rundir, ignore_errors=True)
+    rundir.mkdir()
+    pf_dict = copy.deepcopy(default_pf_dict)
+    pf_dict.update({"output_folder": str(rundir), "equilibrium_type": "adiabatic_homo"})
+    pf_dict["parameters"] = {"k3": 1.0, "cte_rho0": 1.0, "cte_T0": 1.0}
+    pf_dict["parameters"].update({"cte_B02": 0.0, "cte_B03": 1.0})
+    sweep = pylbo.run_adaptive_sweep(
+        pf_dict,
+        {"k2": (0, 1)},
+        quantity=lambda ds: ds.parameters["k2"] - 0.3,
+        nb_cpus=2,
+        executable=DEFAULT_EXEC,
+        output_dir=rundir,
+        max_level=2,
+        tolerance=1,
+    )
+    points, values = sweep.get_samples()
+    assert np.allclose(points[:, 0], [0, 0.25, 0.3125, 0.375, 0.5, 0.75, 1])
+    assert np.allclose(values, points[:, 0] - 0.3)
+    manifest = json.loads((rundir / "adaptive.json").read_text())
+    assert len(manifest["runs"]) == 7
+    assert all(Path(run["datfile"]).is_file() for run in manifest["runs"])
+    assert not list((rundir / "parfiles").glob("*.par"))
@@ -0,0 +1,125 @@
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import pylbo
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from pylbo.visualisation import batch
+from pylbo.visualisation.figure_window import FigureWindow
+
+RECIPE = [
+    {"plot": "spectrum", "continua": True, "xlim": (-1, 1), "ylim": (-0.1, 0.1)},
+    {
+        "plot": "spectrum",
+        "name": "efs",
+        "eigenfunctions": True,
+        "ev_guesses": [0.1 + 0.01j],
+        "ef_name": "rho",
+    },
+    {"plot": "continua"},
+    {"plot": "equilibrium"},
+]
+
+
+@pytest.fixture
+def datasets(ds_v112, ds_v112_eta, ds_v114_subset_defs):
+    return [ds_v112, ds_v112_eta, ds_v114_subset_defs]
+
+
+def test_render_batch(datasets, tmpdir):
+    stack = set(FigureWindow.figure_stack)
+    manifest = pylbo.render_batch(datasets, RECIPE, tmpdir)
+    assert len(manifest) == len(datasets) * len(RECIPE)
+    for i, ds in enumerate(datasets):
+        for item, entry in zip(manifest[i * len(RECIPE) :], RECIPE):
+            assert item["datfile"] == str(ds.datfile)
+            assert item["plot"] == entry["plot"]
+            assert item["name"] == entry.get("name", entry["plot"])
+            assert Path(item["file"]).is_file()
+            assert Path(item["file"]).name.startswith(ds.datfile.stem)
+    # figures are closed and removed from the stack
+    assert set(FigureWindow.figure_stack) <= stack
+
+
+def test_render_batch_workers(datasets, tmpdir):
+    manifest = pylbo.render_batch(datasets, RECIPE, tmpdir / "serial")
+    manifest_workers = pylbo.render_batch(
+        datasets, RECIPE, tmpdir / "parallel", workers=2
+    )
+    assert len(manifest_workers) == len(manifest)
+    for item, item_workers in zip(manifest, manifest_workers):
+        assert item["name"] == item_workers["name"]
+        assert item["datfile"] == item_workers["datfile"]
+        assert Path(item_workers["file"]).parent == Path(tmpdir / "parallel")
+        assert Path(item_workers["file"]).is_file()
+
+
+def test_render_batch_derived_eigenfunctions(ds_v114_subset_defs, tmpdir):
+    ds = ds_v114_subset_defs
+    recipe = {
+        "plot": "spectrum",
+        "eigenfunctions": "derived_eigenfunctions",
+        "ev_idxs": ds.header["ef_written_idxs"][:2],
+    }
+    (item,) = pylbo.render_batch(ds, recipe, tmpdir, fmt="pdf")
+    assert item["file"].endswith("_spectrum.pdf")
+    assert Path(item["file"]).is_file()
+
+
+def test_render_batch_serial_agg(ds_v112, tmpdir, monkeypatch):
+    canvases = []
+
+    def _savefig(self, *args, **kwargs):
+        canvases.append(type(self.canvas))
+        return savefig(self, *args, **kwargs)
+
+    savefig = Figure.savefig
+    monkeypatch.setattr(Figure, "savefig", _savefig)
+    backend = plt.get_backend()
+    # a backend that does not render through Agg itself
+    plt.switch_backend("svg")
+    try:
+        fig = plt.figure()
+        pylbo.render_batch(ds_v112, {"plot": "continua"}, tmpdir, workers=1)
+        assert canvases == [FigureCanvasAgg]
+        # figures of the user and the backend are left untouched
+        assert plt.fignum_exists(fig.number)
+        assert plt.get_backend() == "svg"
+    finally:
+        plt.switch_backend(backend)
+
+
+def test_render_batch_skipped_entry(ds_v112, tmpdir, monkeypatch):
+    warnings = []
+    monkeypatch.setitem(batch.RECIPE_PLOTS, "equilibrium", lambda *a, **kw: None)
+    monkeypatch.setattr(batch.pylboLogger, "warning", warnings.append)
+    manifest = pylbo.render_batch(ds_v112, RECIPE, tmpdir)
+    assert [item["name"] for item in manifest] == ["spectrum", "efs", "continua"]
+    assert len(warnings) == 1
+    assert "'equilibrium'" in warnings[0]
+
+
+@pytest.mark.parametrize(
+    "recipe",
+    [
+        {"plot": "unknown"},
+        {"plot": "continua", "eigenfunctions": True},
+        {"plot": "spectrum", "eigenfunctions": "unknown"},
+        {"plot": "spectrum", "ev_idxs": [1], "ev_guesses": [0.1]},
+        [{"plot": "spectrum"}, {"plot": "spectrum"}],
+    ],
+)
+def test_render_batch_invalid_recipe(ds_v112, tmpdir, recipe):
+    with pytest.raises(ValueError):
+        pylbo.render_batch(ds_v112, recipe, tmpdir)
+
+
+def test_render_batch_invalid_workers(ds_v112, tmpdir):
+    with pytest.raises(ValueError):
+        pylbo.render_batch(ds_v112, RECIPE, tmpdir, workers=0)
+
+
+def test_render_batch_duplicate_names(series_v112, tmpdir):
+    with pytest.raises(ValueError):
+        pylbo.render_batch(series_v112, RECIPE, tmpdir)
@@ -1,5 +1,6 @@
 import numpy as np
 import pylbo
+from matplotlib.collections import LineCollection, PathCollection
 
 
 def test_plot_equilibrium_profile(ds_v112):
@@ -26,6 +27,43 @@ def test_plot_matrices(ds_v100):
     p.draw()
 
 
+def test_plot_matrices_block_grid(ds_v100):
+    p = pylbo.plot_matrices(ds_v100)
+    assert not p.raster
+    for ax in (p.ax, p.ax2):
+        assert len([c for c in ax.collections if isinstance(c, LineCollection)]) == 1
+
+
+def test_plot_matrices_raster(ds_v100):
+    p = pylbo.plot_matrices(ds_v100, raster=True)
+    assert len(p.rasters) == 2
+    assert not [c for c in p.ax.collections if isinstance(c, PathCollection)]
+    rows, cols, vals = ds_v100.get_matrix_A()
+    raster = p.rasters[0]
+    # zoomed in, every bin is a single matrix element
+    p.ax.set_xlim(0.5, 32.5)
+    p.ax.set_ylim(32.5, 0.5)
+    assert raster.bin_size == (1, 1)
+    data = raster.image.get_array()
+    assert data.shape == (32, 32)
+    expected = np.zeros((32, 32))
+    in_view = (rows <= 32) & (cols <= 32)
+    idxs = (rows[in_view] - 1, cols[in_view] - 1)
+    np.maximum.at(expected, idxs, np.abs(vals[in_view]))
+    assert np.allclose(data.filled(0), expected)
+
+
+def test_plot_matrices_raster_max_modulus(ds_v100):
+    p = pylbo.plot_matrices(ds_v100, figsize=(2, 1), raster=True)
+    raster = p.rasters[1]
+    sx, sy = raster.bin_size
+    assert sx > 1 or sy > 1
+    rows, cols, vals = ds_v100.get_matrix_B()
+    data = raster.image.get_array()
+    assert np.isclose(np.max(data), np.max(np.abs(vals)))
+    assert data.count() < len(vals)
+
+
 def test_plot_equilibrium_profile_no_bg(ds_v200_tear_nobg):
     p = pylbo.plot_equilibrium(ds_v200_tear_nobg)
     assert p is None
@@ -3,8 +3,13 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pylbo
 import pytest
+from matplotlib.backend_bases import MouseEvent
+from matplotlib.image import BboxImage
 from pylbo.exceptions import BackgroundNotPresent, EigenfunctionsNotPresent
 from pylbo.utilities.toolbox import get_axis_geometry
+from pylbo.visualisation.eigenfunctions.eigfunc_prefetcher import (
+    EigenfunctionPrefetcher,
+)
 from pylbo.visualisation.spectra.spectrum_single import SingleSpectrumPlot
 
 
@@ -285,6 +290,240 @@ def test_merged_plot_eigenfunctions(series_v112):
     assert getattr(p, "ef_ax", None) is not None
 
 
+def _click_on(p, x, y, button=1):
+    px, py = p.ax.transData.transform((x, y))
+    mouseevent = MouseEvent("button_press_event", p.fig.canvas, px, py, button)
+    p.fig.pick(mouseevent)
+
+
+def test_merged_plot_density(series_v112):
+    p = pylbo.plot_merged_spectrum(series_v112)
+    p.set_density_mode(max_points=10)
+    handler = p.density_handler
+    assert handler is not None
+    assert not handler.uses_points
+    assert handler.image.get_visible() and not handler.points.get_visible()
+    # no per-dataset scatter artists or legend in density mode
+    assert not [child for child in p.ax.get_children() if hasattr(child, "dataset")]
+    assert p.ax.get_legend() is None
+
+
+def test_merged_plot_density_zoom(series_v112):
+    p = pylbo.plot_merged_spectrum(series_v112)
+    p.set_density_mode(max_points=10)
+    handler = p.density_handler
+    xlim, ylim = p.ax.get_xlim(), p.ax.get_ylim()
+    w = series_v112[0].eigenvalues[0]
+    p.ax.set_xlim(w.real - 1e-8, w.real + 1e-8)
+    p.ax.set_ylim(w.imag - 1e-8, w.imag + 1e-8)
+    assert handler.nb_visible == len(series_v112)
+    assert handler.uses_points
+    assert handler.points.get_visible() and not handler.image.get_visible()
+    p.ax.set_xlim(xlim)
+    p.ax.set_ylim(ylim)
+    assert not handler.uses_points
+
+
+def test_merged_plot_density_disable(series_v112):
+    p = pylbo.plot_merged_spectrum(series_v112)
+    p.set_density_mode(max_points=10)
+    p.set_density_mode(enabled=False)
+    assert not [child for child in p.ax.get_children() if isinstance(child, BboxImage)]
+    assert len(p.ax.get_legend_handles_labels()[1]) == len(series_v112)
+
+
+def test_merged_plot_density_picking(series_v112):
+    p = pylbo.plot_merged_spectrum(series_v112)
+    p.set_density_mode(max_points=10)
+    p.add_eigenfunctions()
+    ds = series_v112[0]
+    w = ds.eigenvalues[193]
+    p.ax.set_xlim(w.real - 0.01, w.real + 0.01)
+    p.ax.set_ylim(w.imag - 0.01, w.imag + 0.01)
+    _click_on(p, w.real, w.imag)
+    selected = p.ef_handler._selected_idxs
+    assert list(selected.keys()) == [ds]
+    assert list(selected[ds].keys()) == ["193"]
+    _click_on(p, w.real, w.imag, button=3)
+    assert not p.ef_handler._selected_idxs
+
+
+def test_multispectrum_plot_density(series_v112):
+    p = pylbo.plot_spectrum_multi(series_v112, xdata=[1, 2, 3])
+    p.set_density_mode(max_points=10)
+    p.add_eigenfunctions()
+    handler = p.density_handler
+    assert not handler.uses_points
+    ds = series_v112[1]
+    idx = 193
+    w = ds.eigenvalues[idx].real
+    p.ax.set_xlim(1.9, 2.1)
+    p.ax.set_ylim(w - 1e-4, w + 1e-4)
+    _click_on(p, 2, w)
+    selected = p.ef_handler._selected_idxs
+    assert list(selected.keys()) == [ds]
+    assert list(selected[ds].keys()) == [str(idx)]
+
+
+def test_spectrum_plot_picker(ds_v112):
+    p = pylbo.plot_spectrum(ds_v112)
+    p.add_eigenfunctions()
+    p.draw()
+    idx = ds_v112.header["ef_written_idxs"][5]
+    w = ds_v112.eigenvalues[idx]
+    p.ax.set_xlim(w.real - 1e-3, w.real + 1e-3)
+    p.ax.set_ylim(w.imag - 1e-3, w.imag + 1e-3)
+    _click_on(p, w.real, w.imag)
+    assert list(p.ef_handler._selected_idxs[ds_v112].keys()) == [str(idx)]
+
+
+def test_spectrum_plot_prefetch_on_click(ds_v112, monkeypatch):
+    p = pylbo.plot_spectrum(ds_v112)
+    p.add_eigenfunctions()
+    p.set_eigenfunction_prefetching(nearest=3)
+    p.draw()
+    idx = ds_v112.header["ef_written_idxs"][5]
+    w = ds_v112.eigenvalues[idx]
+    p.ax.set_xlim(w.real - 1e-3, w.real + 1e-3)
+    p.ax.set_ylim(w.imag - 1e-3, w.imag + 1e-3)
+    _click_on(p, w.real, w.imag)
+    assert p.ef_prefetcher.nb_cached == 4
+    expected = ds_v112.get_eigenfunctions(ev_idxs=[idx])[0]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("eigenfunctions read from disk")
+
+    # plot updates are served from the cache
+    monkeypatch.setattr(ds_v112, "get_eigenfunctions", fail)
+    p.ef_handler.update_plot()
+    (line,) = p.ef_ax.get_lines()[:1]
+    assert np.allclose(line.get_ydata(), expected["rho"].real)
+
+
+def test_spectrum_plot_prefetch_invalid(ds_v112):
+    p = pylbo.plot_spectrum(ds_v112)
+    with pytest.raises(ValueError):
+        p.set_eigenfunction_prefetching(nearest=-1)
+
+
+def test_prefetcher_nearest(ds_v112):
+    prefetcher = EigenfunctionPrefetcher(nearest=5)
+    written = np.asarray(ds_v112.header["ef_written_idxs"])
+    idx = written[10]
+    nearest = prefetcher._get_nearest_idxs(ds_v112, idx)
+    distances = np.abs(ds_v112.eigenvalues[written] - ds_v112.eigenvalues[idx])
+    assert idx not in nearest
+    assert np.all(np.isin(nearest, written))
+    assert np.allclose(
+        np.sort(np.abs(ds_v112.eigenvalues[nearest] - ds_v112.eigenvalues[idx])),
+        np.sort(distances)[1:6],
+    )
+
+
+def test_prefetcher_both_kinds(ds_v114_subset_defs):
+    ds = ds_v114_subset_defs
+    prefetcher = EigenfunctionPrefetcher()
+    idxs = ds.header["ef_written_idxs"][:2]
+    for idx in idxs:
+        prefetcher.prefetch(ds, idx, kind="derived_eigenfunctions")
+    assert prefetcher.nb_cached == 4
+    for kind in ("eigenfunctions", "derived_eigenfunctions"):
+        cached = prefetcher.get(ds, idxs, kind)
+        expected = getattr(ds, f"get_{kind}")(ev_idxs=idxs)
+        for efs, expected_efs in zip(cached, expected):
+            assert efs.keys() == expected_efs.keys()
+            for name, values in expected_efs.items():
+                assert np.allclose(efs[name], values)
+    assert prefetcher.nb_cached == 4
+    prefetcher.shutdown()
+    assert prefetcher.nb_cached == 0
+
+
+def test_prefetcher_bounded(ds_v112):
+    prefetcher = EigenfunctionPrefetcher(max_cached=3)
+    idxs = ds_v112.header["ef_written_idxs"][:5]
+    efs = prefetcher.get(ds_v112, idxs, "eigenfunctions")
+    eigenvalues = [ef["eigenvalue"] for ef in efs]
+    assert np.allclose(eigenvalues, ds_v112.eigenvalues[idxs])
+    assert prefetcher.nb_cached == 3
+
+
+def test_prefetcher_invalid_kind(ds_v112):
+    with pytest.raises(ValueError):
+        EigenfunctionPrefetcher().get(ds_v112, [0], "unknown")
+    with pytest.raises(ValueError):
+        EigenfunctionPrefetcher(nearest=-1)
+
+
+def test_spectrum_plot_picker_skips_zero_eigenvalues(ds_v112):
+    p = pylbo.plot_spectrum(ds_v112)
+    p.draw()
+    for idx in p._nonzero_w_idxs[:10]:
+        w = ds_v112.eigenvalues[idx]
+        px, py = p.ax.transData.transform((w.real, w.imag))
+        mouseevent = MouseEvent("button_press_event", p.fig.canvas, px, py, 1)
+        ds, picked_idx, x, y = p.picker.resolve_pick(mouseevent)
+        assert ds is ds_v112
+        assert np.isclose(complex(x, y), ds_v112.eigenvalues[picked_idx])
+
+
+def test_spectrum_plot_picker_miss(ds_v112):
+    p = pylbo.plot_spectrum(ds_v112)
+    p.draw()
+    px, py = p.ax.transAxes.transform((0.01, 0.99))
+    mouseevent = MouseEvent("button_press_event", p.fig.canvas, px, py, 1)
+    assert p.picker.resolve_pick(mouseevent) is None
+
+
+def test_spectrum_plot_picker_rebuilds_on_zoom(ds_v112):
+    p = pylbo.plot_spectrum(ds_v112)
+    p.draw()
+    w = ds_v112.eigenvalues[p._nonzero_w_idxs[0]]
+    _click_on(p, w.real, w.imag)
+    index = p.picker._index
+    _click_on(p, w.real, w.imag)
+    assert p.picker._index is index
+    p.ax.set_xlim(w.real - 1, w.real + 1)
+    _click_on(p, w.real, w.imag)
+    assert p.picker._index is not index
+
+
+def test_spectrum_picker_matches_brute_force():
+    from pylbo.visualisation.spectra.spectrum_picker import SpectrumPicker
+
+    fig, ax = plt.subplots()
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(size=(2, 100000))
+    picker = SpectrumPicker(ax, pickradius=5)
+    picker.add_points(x, y, dataset="ds")
+    ax.set_xlim(-3, 3)
+    ax.set_ylim(-3, 3)
+    px = ax.transData.transform(np.column_stack([x, y]))
+    for click in rng.uniform(100, 400, size=(25, 2)):
+        mouseevent = MouseEvent("button_press_event", fig.canvas, *click, 1)
+        result = picker.resolve_pick(mouseevent)
+        # mouse events are located at integer pixels
+        distances = np.sum((px - [mouseevent.x, mouseevent.y]) ** 2, axis=1)
+        if np.min(distances) > 25:
+            assert result is None
+        else:
+            assert result[1] == np.argmin(distances)
+
+
+def test_multispectrum_plot_picker_hidden_artist(series_v112):
+    p = pylbo.plot_spectrum_multi(series_v112, xdata=[1, 2, 3])
+    p.draw()
+    p.fig.canvas.draw()
+    ds = series_v112[0]
+    w = p.ydata[0][np.nanargmin(np.abs(p.ydata[0]))]
+    px, py = p.ax.transData.transform((1, w))
+    mouseevent = MouseEvent("button_press_event", p.fig.canvas, px, py, 1)
+    assert p.picker.resolve_pick(mouseevent)[0] is ds
+    p.picker._sources[0]["artist"].set_visible(False)
+    mouseevent = MouseEvent("button_press_event", p.fig.canvas, px, py, 1)
+    assert p.picker.resolve_pick(mouseevent) is None
+
+
 def test_comparison_plot(ds_v100, ds_v112):
     p = pylbo.plot_spectrum_comparison(ds_v100, ds_v112)
     p.draw()
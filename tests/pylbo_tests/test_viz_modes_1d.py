@@ -70,9 +70,21 @@ class TestTemporal1DCart1Mode(TemporalTest):
                 ds, self.omega, "rho", u2=1, u3=[0], time=0
             )
 
-    def test_animation_fail(self, view):
-        with pytest.raises(ValueError):
-            view.create_animation(times=np.linspace(0, 1, 10), filename="test.mp4")
+    def test_animation(self, view, tmpdir, mode_solution):
+        view.create_animation(
+            times=np.linspace(0, 1, 5), filename=tmpdir / "test_1d.mp4", fps=1
+        )
+        assert np.allclose(view.solutions, mode_solution)
+
+    def test_animation_frames(self, ds, view, mode_solution):
+        times = view._time[0] + np.array([0.0, 0.5])
+        frames = list(view._iter_animation_frames(times))
+        assert np.allclose(frames[0][1], mode_solution)
+        window = view._time - view._time[0] + times[1]
+        shifted = pylbo.plot_1d_temporal_evolution(
+            ds, self.omega, "rho", u2=1, u3=1, time=window
+        )
+        assert np.allclose(frames[1][1], shifted.solutions)
 
 
 class TestTemporal1dCyl1Mode(TemporalTest):
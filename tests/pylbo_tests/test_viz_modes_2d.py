@@ -128,6 +128,26 @@ class TestSliceZ_2DCart(Slice2D):
         assert self.cbar_matches(view, mode_solution)
         assert np.allclose(view.solutions, mode_solution)
 
+    def test_animation_workers(self, view, tmpdir, mode_solution):
+        filename = tmpdir / "test_2d_workers.mp4"
+        view.create_animation(times=np.arange(5), filename=filename, fps=1, workers=2)
+        assert filename.is_file()
+        assert np.allclose(view.solutions, mode_solution)
+
+    def test_animation_workers_contour(self, view, tmpdir, mode_solution):
+        view.set_contours(20, fill=True)
+        view.draw()
+        filename = tmpdir / "test_contour_workers.mp4"
+        view.create_animation(times=np.arange(5), filename=filename, fps=1, workers=3)
+        assert filename.is_file()
+        assert np.allclose(view.solutions, mode_solution)
+
+    def test_animation_invalid_workers(self, view, tmpdir):
+        with pytest.raises(ValueError):
+            view.create_animation(
+                times=np.arange(5), filename=tmpdir / "test_2d.mp4", workers=0
+            )
+
 
 class TestSliceZ_2DCartBackground(Slice2D):
     filename = "slice_2d_z_cart_rho_bg.npy"
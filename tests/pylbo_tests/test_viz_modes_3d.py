@@ -65,6 +65,16 @@ class Slice3D(ModeVizTest):
         assert view.update_colorbar is True
         assert np.allclose(view.solutions, mode_solution)
 
+    def test_animation_workers(self, view, tmpdir, mode_solution):
+        filename = tmpdir / "test_3d_workers.mp4"
+        view.create_animation(times=np.arange(4), filename=filename, fps=1, workers=2)
+        assert filename.is_file()
+        assert np.allclose(view.solutions, mode_solution)
+
+    def test_animation_frames(self, view, mode_solution):
+        _, frame = next(view._iter_animation_frames([0]))
+        assert np.allclose(frame, mode_solution)
+
 
 class TestSliceZ_3DCart(Slice3D):
     filename = "slice_3d_z_cart_rho.npy"
@@ -89,6 +99,18 @@ class TestSliceZ_3DCart(Slice3D):
         assert self.cbar_matches(view, mode_solution)
         assert np.allclose(view.solutions, mode_solution)
 
+    def test_multiple_modes(self, ds):
+        omegas = [self.omega, 0.65179 + 1.32900j]
+        kwargs = dict(ef_name="rho", u2=self.u2vals, u3=self.u3vals, time=0)
+        view = pylbo.plot_3d_slice(ds, omegas, slicing_axis="z", **kwargs)
+        expected = sum(
+            pylbo.plot_3d_slice(ds, omega, slicing_axis="z", **kwargs).solutions
+            for omega in omegas
+        )
+        assert np.allclose(view.solutions, expected)
+        _, frame = next(view._iter_animation_frames([0]))
+        assert np.allclose(frame, expected)
+
 
 class TestSliceZ_3DCyl(Slice3D):
     filename = "slice_3d_z_cyl_rho.npy"
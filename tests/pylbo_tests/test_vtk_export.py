@@ -1,3 +1,8 @@
+import logging
+import struct
+import time
+import zlib
+
 import numpy as np
 import pylbo
 import pytest
@@ -11,6 +16,8 @@ u3 = np.linspace(0, 3, nb_u3_pts)
 omega_cart = 1.19029136 + 3.75969744j
 omega_cyl = 0.01746995 + 0.02195201j
 
+testlog = logging.getLogger("test_logger_pylbo")
+
 
 @pytest.fixture(scope="function")
 def vtkdata_cart(ds_v121_rti_khi):
@@ -125,3 +132,269 @@ def test_vtk_write_invalid_ef(vtkdata_cart, tmpdir):
     file = tmpdir / "test_cart_invalid_ef.vtk"
     with pytest.raises(ValueError):
         vtkdata_cart.export_to_vtk(filename=file, time=0, names=["rho1"])
+
+
+def _broadcasted_solution(vtkdata, name, time):
+    u1, u2, u3 = np.meshgrid(vtkdata._u1, vtkdata._u2, vtkdata._u3, indexing="ij")
+    solution = 0
+    for all_efs in vtkdata.data._all_efs:
+        solution += vtkdata.data.get_mode_solution(
+            ef=vtkdata.broadcast_to_3d(all_efs.get(name)),
+            omega=all_efs.get("eigenvalue"),
+            u2=u2,
+            u3=u3,
+            t=time,
+        )
+    return solution
+
+
+@pytest.mark.parametrize("use_real_part", [True, False])
+def test_vtk_separable_solution(ds_v121_rti_khi, use_real_part):
+    vtkdata = pylbo.prepare_vtk_export(
+        ds_v121_rti_khi,
+        [omega_cart, 0.65179 + 1.32900j],
+        u2=u2cart,
+        u3=u3,
+        use_real_part=use_real_part,
+        complex_factor=0.5 + 2j,
+    )
+    for name in ("rho", "v2", "B3"):
+        expected = _broadcasted_solution(vtkdata, name, time=0.3)
+        assert np.allclose(vtkdata.get_solution(name, 0.3), expected)
+
+
+def test_vtk_separable_solution_out(vtkdata_cyl):
+    out = np.empty(vtkdata_cyl.dims, dtype=np.float32)
+    solution = vtkdata_cyl.get_solution("v1", 1.5, out=out)
+    assert solution is out
+    expected = _broadcasted_solution(vtkdata_cyl, "v1", time=1.5)
+    assert np.allclose(out, expected, atol=1e-6 * np.max(np.abs(expected)))
+
+
+def test_vtk_separable_solution_invalid_out(vtkdata_cart):
+    with pytest.raises(ValueError):
+        vtkdata_cart.get_solution("rho", 0, out=np.empty((2, 2, 2)))
+
+
+def _struct_coordinate_bytes(vtkdata, fmt):
+    # reference implementation: the original point-by-point writer
+    u1_data, u2_data, u3_data = vtkdata.get_coordinate_data()
+    values = []
+    for k in range(vtkdata.dims[2]):
+        for j in range(vtkdata.dims[1]):
+            for i in range(vtkdata.dims[0]):
+                values.append(struct.pack(fmt, u1_data[i, j, k]))
+                values.append(struct.pack(fmt, u2_data[i, j, k]))
+                values.append(struct.pack(fmt, u3_data[i, j, k]))
+    return b"".join(values)
+
+
+def _struct_field_bytes(vtkdata, fielddata, fmt):
+    values = []
+    for k in range(vtkdata.dims[2]):
+        for j in range(vtkdata.dims[1]):
+            for i in range(vtkdata.dims[0]):
+                values.append(struct.pack(fmt, fielddata[i, j, k]))
+    return b"".join(values)
+
+
+@pytest.mark.parametrize("dtype, fmt", [("float32", ">f"), ("float64", ">d")])
+def test_vtk_vectorized_writer(vtkdata_cyl, tmpdir, dtype, fmt):
+    vtkdata_cyl._validate_and_set_dtype(dtype)
+    coords = vtkdata_cyl._get_vtk_coordinate_bytes()
+    assert coords == _struct_coordinate_bytes(vtkdata_cyl, fmt)
+
+    solution = vtkdata_cyl.get_solution("rho", 0)
+    file = tmpdir / f"test_cyl_vectorized_{dtype}.vtk"
+    file.write_bytes(b"")
+    vtkdata_cyl._write_vtk_scalar_field(file, "rho", solution)
+    header = f"SCALARS rho {vtkdata_cyl._vtk_dtype} \nLOOKUP_TABLE default \n"
+    expected = header.encode() + _struct_field_bytes(vtkdata_cyl, solution, fmt)
+    assert file.read_bytes() == expected
+
+
+def test_vtk_coordinate_bytes_cached(vtkdata_cart, tmpdir):
+    file = tmpdir / "test_cart_cached.vtk"
+    vtkdata_cart.export_to_vtk(filename=file, time=np.arange(2), names="rho")
+    coords = vtkdata_cart._get_vtk_coordinate_bytes()
+    assert vtkdata_cart._get_vtk_coordinate_bytes() is coords
+
+
+def test_vtk_vectorized_writer_benchmark(ds_v121_rti_khi, tmpdir):
+    vtkdata = pylbo.prepare_vtk_export(
+        ds_v121_rti_khi,
+        omega_cart,
+        u2=np.linspace(0, 1, 40),
+        u3=np.linspace(0, 1, 30),
+    )
+    vtkdata._validate_and_set_dtype("float32")
+    solution = vtkdata.get_solution("rho", 0)
+
+    t0 = time.perf_counter()
+    reference = _struct_field_bytes(vtkdata, solution, ">f")
+    time_struct = time.perf_counter() - t0
+
+    file = tmpdir / "test_benchmark.vtk"
+    file.write_bytes(b"")
+    t0 = time.perf_counter()
+    vtkdata._write_vtk_scalar_field(file, "rho", solution)
+    time_vectorized = time.perf_counter() - t0
+
+    assert file.read_bytes().endswith(reference)
+    testlog.info(
+        f"{np.prod(vtkdata.dims)} points: struct {time_struct:.4f}s, vectorized "
+        f"{time_vectorized:.4f}s (speedup {time_struct / time_vectorized:.1f}x)"
+    )
+
+
+def _read_vts_arrays(vtsfile):
+    content = vtsfile.read_bytes()
+    xml, appended = content.split(b'<AppendedData encoding="raw">\n   _')
+    compressed = b"vtkZLibDataCompressor" in xml
+    arrays = {}
+    for line in xml.decode().splitlines():
+        if "<DataArray" not in line:
+            continue
+        attrs = dict(
+            item.split("=") for item in line.strip(" <>/").split()[1:] if "=" in item
+        )
+        attrs = {key: val.strip('"') for key, val in attrs.items()}
+        dtype = "<f4" if attrs["type"] == "Float32" else "<f8"
+        offset = int(attrs["offset"])
+        if compressed:
+            nblocks = int(np.frombuffer(appended, "<u8", 1, offset)[0])
+            header = np.frombuffer(appended, "<u8", 3 + nblocks, offset)
+            start = offset + 8 * len(header)
+            data = b""
+            for size in header[3:]:
+                data += zlib.decompress(appended[start : start + int(size)])
+                start += int(size)
+        else:
+            nbytes = int(np.frombuffer(appended, "<u8", 1, offset)[0])
+            data = appended[offset + 8 : offset + 8 + nbytes]
+        arrays[attrs.get("Name", "Points")] = np.frombuffer(data, dtype)
+    return arrays
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+@pytest.mark.parametrize("nb_cpus", [1, 2])
+def test_vts_export(vtkdata_cyl, tmpdir, compression, nb_cpus):
+    file = tmpdir / f"test_vts_{compression}_{nb_cpus}.vts"
+    time = np.linspace(0, 1, 3)
+    pvdfile = vtkdata_cyl.export_to_vts(
+        filename=file,
+        time=time,
+        names=["rho", "v1"],
+        bg_names="rho0",
+        compression=compression,
+        nb_cpus=nb_cpus,
+    )
+    assert pvdfile == file.with_suffix(".pvd").resolve()
+    pvd = pvdfile.read_text()
+    for it, t in enumerate(time):
+        vtsfile = tmpdir / f"test_vts_{compression}_{nb_cpus}_t{it:04d}.vts"
+        assert f'file="{vtsfile.name}"' in pvd
+        assert f'timestep="{float(t)!r}"' in pvd
+        arrays = _read_vts_arrays(vtsfile)
+        assert list(arrays) == ["rho", "v1", "rho0", "thetas", "Points"]
+        for name in ("rho", "v1"):
+            expected = vtkdata_cyl.get_solution(name, t).ravel(order="F")
+            assert np.allclose(arrays[name], expected, atol=1e-6)
+        points = np.stack(vtkdata_cyl.get_coordinate_data()).ravel(order="F")
+        assert np.allclose(arrays["Points"], points, atol=1e-6)
+
+
+def test_vts_export_f64(vtkdata_cart, tmpdir):
+    file = tmpdir / "test_vts_f64.vts"
+    vtkdata_cart.export_to_vts(filename=file, time=0.5, names="rho", dtype="float64")
+    arrays = _read_vts_arrays(tmpdir / "test_vts_f64_t0000.vts")
+    assert arrays["rho"].dtype == np.dtype("<f8")
+    expected = vtkdata_cart.get_solution("rho", 0.5).ravel(order="F")
+    assert np.allclose(arrays["rho"], expected)
+
+
+def test_vts_export_worker_error(vtkdata_cart, tmpdir, monkeypatch):
+    def _fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    vtk_export = pylbo.visualisation.modes.vtk_export
+    monkeypatch.setattr(vtk_export.multiprocessing, "cpu_count", lambda: 2)
+    monkeypatch.setattr(vtk_export.VTKDataExporter, "_write_vts_batch", _fail)
+    file = tmpdir / "test_vts_error.vts"
+    with pytest.raises(OSError, match="disk full"):
+        vtkdata_cart.export_to_vts(filename=file, time=[0, 1], names="rho", nb_cpus=2)
+    assert not file.with_suffix(".pvd").exists()
+
+
+def test_vts_export_invalid_compression(vtkdata_cart, tmpdir):
+    with pytest.raises(ValueError):
+        vtkdata_cart.export_to_vts(
+            filename=tmpdir / "test.vts", time=0, names="rho", compression="lz4"
+        )
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_hdf5_export(vtkdata_cyl, tmpdir, compression):
+    h5py = pytest.importorskip("h5py")
+    file = tmpdir / f"test_hdf5_{compression}.h5"
+    time = np.linspace(0, 1, 4)
+    xdmffile = vtkdata_cyl.export_to_hdf5(
+        filename=file,
+        time=time,
+        names=["rho", "v1"],
+        bg_names="rho0",
+        compression=compression,
+    )
+    assert xdmffile == file.with_suffix(".xdmf").resolve()
+    shape = tuple(reversed(vtkdata_cyl.dims))
+    with h5py.File(file, "r") as h5:
+        assert np.allclose(h5["time"], time)
+        points = np.stack(vtkdata_cyl.get_coordinate_data(), axis=-1)
+        assert np.allclose(h5["grid/points"], points.transpose(2, 1, 0, 3))
+        assert np.allclose(h5["static/thetas"], vtkdata_cyl.u2_data.transpose())
+        assert h5["static/rho0"].shape == shape
+        for name in ("rho", "v1"):
+            assert h5[f"fields/{name}"].shape == (len(time), *shape)
+            assert h5[f"fields/{name}"].chunks == (1, *shape)
+            for it, t in enumerate(time):
+                expected = vtkdata_cyl.get_solution(name, t).transpose()
+                assert np.allclose(h5[f"fields/{name}"][it], expected, atol=1e-6)
+    xdmf = xdmffile.read_text()
+    assert xdmf.count("<Time Value=") == len(time)
+    assert f"{file.name}:/fields/rho" in xdmf
+    assert f"{file.name}:/static/thetas" in xdmf
+
+
+def test_hdf5_export_small_batches(vtkdata_cart, tmpdir, monkeypatch):
+    h5py = pytest.importorskip("h5py")
+    stepper = vtkdata_cart.get_time_stepper("rho")
+    monkeypatch.setattr(stepper, "max_batch_elements", 2 * stepper.size)
+    file = tmpdir / "test_hdf5_batches.h5"
+    time = np.linspace(0, 1, 5)
+    vtkdata_cart.export_to_hdf5(filename=file, time=time, names="rho")
+    with h5py.File(file, "r") as h5:
+        expected = stepper.get_solutions(time, dtype="float32")
+        assert np.allclose(h5["fields/rho"], expected.transpose(0, 3, 2, 1))
+
+
+def test_hdf5_export_error_restores_state(vtkdata_cart, tmpdir, monkeypatch):
+    pytest.importorskip("h5py")
+
+    def _fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    stepper = vtkdata_cart.get_time_stepper("rho")
+    monkeypatch.setattr(stepper, "get_solutions", _fail)
+    print_bg_info = vtkdata_cart.data._print_bg_info
+    with pytest.raises(OSError, match="disk full"):
+        vtkdata_cart.export_to_hdf5(
+            filename=tmpdir / "test_hdf5_error.h5", time=[0, 1], names="rho"
+        )
+    assert vtkdata_cart.data._print_bg_info == print_bg_info
+    assert not (tmpdir / "test_hdf5_error.xdmf").exists()
+
+
+def test_hdf5_export_no_h5py(vtkdata_cart, tmpdir, monkeypatch):
+    monkeypatch.setattr(pylbo.visualisation.modes.vtk_export, "h5py", None)
+    with pytest.raises(ModuleNotFoundError):
+        vtkdata_cart.export_to_hdf5(filename=tmpdir / "test.h5", time=0, names="rho")